@@ -0,0 +1,85 @@
+# bench/bench_candid_decoder.py
+"""
+Microbenchmark: typed Candid decoder vs the untyped py_serialize path for list_agents results.
+
+  python bench/bench_candid_decoder.py --agents 500 --repeat 20
+  python bench/bench_candid_decoder.py --did ../canisters/registery/registry_backend/registry_backend.did
+
+Inputs are real ic-py results: agents are Candid-encoded and decoded with the method's
+return types, exactly as the canister client returns them.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ic.candid import decode, encode  # noqa: E402
+
+from orchestrator.candid_decoder import RegistryDecoder, parse_did_methods  # noqa: E402
+from orchestrator.main import normalize_agent_list_untyped  # noqa: E402
+
+# Same record shape /register sends to the canister
+SAMPLE_DID = """
+type AgentManifest = record {
+  id : text; name : text; description : text; developer : principal; version : text;
+  created_at : nat64; pubkey : opt text; manifest_hash : opt text; endpoint : opt text;
+  health_check : opt text; allowed_tools : opt vec text;
+};
+service : {
+  register_agent : (AgentManifest) -> (bool);
+  list_agents : () -> (vec AgentManifest) query;
+  get_agent : (text) -> (opt AgentManifest) query;
+}
+"""
+
+
+def make_agents(n):
+    return [{
+        "id": f"agent_{i}", "name": f"Agent {i}", "description": "Synthetic agent for decoder benchmarks " * 2,
+        "developer": "2vxsx-fae", "version": "0.1.0", "created_at": 1700000000 + i,
+        "pubkey": ["ab" * 32] if i % 2 else [], "manifest_hash": ["cd" * 32],
+        "endpoint": [f"http://127.0.0.1:{7000 + i % 100}"], "health_check": [],
+        "allowed_tools": [["search_docs", "call_agent", "send_email"]],
+    } for i in range(n)]
+
+
+def timed(fn, raw, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(raw)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), min(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--agents", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--did", help="path to registry_backend.did (defaults to the built-in sample)")
+    args = ap.parse_args()
+
+    did = open(args.did, encoding="utf-8").read() if args.did else SAMPLE_DID
+    methods = parse_did_methods(did)
+    rets = methods["list_agents"].retTypes
+    raw = [r["value"] for r in decode(encode([{"type": rets[0], "value": make_agents(args.agents)}]), rets)]
+
+    t0 = time.perf_counter()
+    decoder = RegistryDecoder(methods)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    assert decoder.agent_list(raw) == normalize_agent_list_untyped(raw), "typed and untyped outputs differ"
+
+    untyped_med, untyped_min = timed(normalize_agent_list_untyped, raw, args.repeat)
+    typed_med, typed_min = timed(decoder.agent_list, raw, args.repeat)
+    print(f"list_agents with {args.agents} agents, {args.repeat} runs (decoder compile: {compile_ms:.2f} ms)")
+    print(f"  untyped (py_serialize + normalize): median {untyped_med:8.2f} ms   min {untyped_min:8.2f} ms")
+    print(f"  typed decoder                     : median {typed_med:8.2f} ms   min {typed_min:8.2f} ms")
+    print(f"  speedup (median)                  : {untyped_med / typed_med:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# bench/bench_embed_batching.py
+"""
+Throughput of micro-batched query embedding vs one encode() call per request.
+
+  python bench/bench_embed_batching.py --concurrency 1,8,32,64 --requests 512
+  python bench/bench_embed_batching.py --model sentence-transformers/all-MiniLM-L6-v2
+
+Each mode serves --requests queries from --concurrency closed-loop clients on one event
+loop, the way mock_mcp's search_docs does. "per-request" runs encode([q]) in the default
+executor for every query; "batched" goes through EmbedBatcher. Without --model (or when
+sentence-transformers is not installed) a synthetic encoder stands in: a fixed per-call
+cost (tokenizer / kernel launch / Python overhead) plus a per-text matmul, which is the
+cost shape that makes batching pay off.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from mcp_common.embed_batcher import EmbedBatcher  # noqa: E402
+
+
+class SyntheticEncoder:
+    def __init__(self, call_ms: float, dim: int = 384, work: int = 256):
+        self.call_s = call_ms / 1000.0
+        rng = np.random.default_rng(0)
+        self.weights = rng.standard_normal((work, dim)).astype(np.float32)
+        self.work = work
+
+    def encode(self, texts):
+        time.sleep(self.call_s)
+        x = np.stack([np.full(self.work, (hash(t) % 997) / 997.0, dtype=np.float32) for t in texts])
+        for _ in range(20):  # per-text compute
+            y = x @ self.weights
+        return y
+
+
+def load_encoder(args):
+    if args.model:
+        try:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(args.model)
+            return lambda texts: model.encode(texts, batch_size=len(texts)), args.model
+        except ImportError:
+            print("[bench] sentence-transformers not installed; using the synthetic encoder", file=sys.stderr)
+    enc = SyntheticEncoder(args.call_ms)
+    return enc.encode, f"synthetic(call_ms={args.call_ms})"
+
+
+async def run_mode(mode, encode, queries, concurrency, max_batch, max_wait_ms):
+    batcher = EmbedBatcher(encode, max_batch=max_batch, max_wait_ms=max_wait_ms)
+    loop = asyncio.get_running_loop()
+    latencies = []
+    it = iter(queries)
+
+    async def client():
+        for q in it:
+            t0 = time.perf_counter()
+            if mode == "batched":
+                await batcher.embed(q)
+            else:
+                await loop.run_in_executor(None, encode, [q])
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await batcher.aclose()
+    latencies.sort()
+    out = {
+        "mode": mode, "concurrency": concurrency, "requests": len(latencies),
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+    }
+    if mode == "batched":
+        out["mean_batch"] = batcher.stats()["mean_batch"]
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=512)
+    ap.add_argument("--concurrency", default="1,8,32,64")
+    ap.add_argument("--max-batch", type=int, default=32)
+    ap.add_argument("--max-wait-ms", type=float, default=5.0)
+    ap.add_argument("--model", help="real sentence-transformers model name (optional)")
+    ap.add_argument("--call-ms", type=float, default=4.0, help="synthetic encoder fixed cost per call")
+    ap.add_argument("--json", action="store_true", help="print results as JSON")
+    args = ap.parse_args()
+
+    encode, label = load_encoder(args)
+    encode(["warm up"])
+    queries = [f"why does login return 401 for user {i % 97}" for i in range(args.requests)]
+    rows = []
+    for c in [int(x) for x in args.concurrency.split(",") if x.strip()]:
+        for mode in ("per-request", "batched"):
+            rows.append(asyncio.run(run_mode(mode, encode, queries, c, args.max_batch, args.max_wait_ms)))
+
+    if args.json:
+        print(json.dumps({"encoder": label, "results": rows}, indent=2))
+        return
+    print(f"encoder: {label}  max_batch={args.max_batch}  max_wait_ms={args.max_wait_ms}")
+    print(f"{'mode':<12} {'conc':>5} {'qps':>9} {'p50 ms':>9} {'p99 ms':>9} {'batch':>6}")
+    for r in rows:
+        print(f"{r['mode']:<12} {r['concurrency']:>5} {r['qps']:>9} {r['p50_ms']:>9} {r['p99_ms']:>9} "
+              f"{r.get('mean_batch') or '':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# bench/bench_hybrid_retrieval.py
+"""
+Latency and recall of vector-only, BM25-only, hybrid (RRF) and routed retrieval.
+
+  python bench/bench_hybrid_retrieval.py                     # docs/ + 20k synthetic docs
+  python bench/bench_hybrid_retrieval.py --docs 100000 --queries 300
+  python bench/bench_hybrid_retrieval.py --model sentence-transformers/all-MiniLM-L6-v2
+
+Retrieval runs against mcp_common.vector_index.LocalVectorIndex (exact scan below
+VECTOR_IVF_MIN_ROWS rows, IVF above) with its BM25 index. "routed" is what search_docs and
+rag_agent do: keyword-looking queries (is_keyword_query) go to BM25 alone, the rest to hybrid.
+
+Corpora:
+  docs      the repo's docs/*.txt with hand-labelled queries; embedded with --model if
+            sentence-transformers is installed, else the hashing embedder from agent_index.
+  synthetic N docs, each = words from one topic + filler + a unique id (ERR-/TICKET-/INC-nnnn).
+            Unless --model is given, a synthetic "semantic" embedder stands in for MiniLM:
+            words of a topic share a direction, ids embed as noise (as MiniLM does for rare
+            tokens). Query kinds:
+              keyword   the id alone                   relevant: that doc
+              mixed     id + 3 of the doc's words      relevant: that doc
+              semantic  4 topic words no doc contains  relevant: any doc of the topic
+            keyword/mixed report recall@k; semantic reports precision@k.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.agent_index import HashingEmbedder  # noqa: E402
+from mcp_common.bm25 import is_keyword_query  # noqa: E402
+from mcp_common.vector_index import LocalVectorIndex  # noqa: E402
+
+DOCS_DIR = os.path.join(os.path.dirname(__file__), "..", "docs")
+DOCS_QUERIES = [  # (query, relevant doc title)
+    ("401", "doc1.txt"),
+    ("customer cannot login", "doc1.txt"),
+    ("unauthorized account access error", "doc1.txt"),
+    ("password reset", "doc2.txt"),
+    ("module A bug", "doc2.txt"),
+]
+FILLER = "system user request service update issue report team data process status check".split()
+ID_PREFIXES = ["ERR", "TICKET", "INC"]
+
+
+class TopicEmbedder:
+    """Synthetic sentence embedder: topic words share a direction, other tokens are noise."""
+
+    def __init__(self, topics, dim=384, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.words = {}
+        for words in topics:
+            center = self.rng.standard_normal(dim)
+            for w in words:
+                self.words[w] = center + 0.6 * self.rng.standard_normal(dim)
+        for w in FILLER:
+            self.words[w] = 0.3 * self.rng.standard_normal(dim)
+
+    def _word(self, w):
+        if w not in self.words:  # ids and unknown tokens: a stable random direction
+            rng = np.random.default_rng(zlib.crc32(w.encode("utf-8")))
+            self.words[w] = 0.8 * rng.standard_normal(self.dim)
+        return self.words[w]
+
+    def encode(self, texts):
+        out = np.stack([np.sum([self._word(w) for w in t.lower().split()], axis=0) for t in texts])
+        return out.astype(np.float32)
+
+
+class DenseHashing:
+    def __init__(self, dim=2048):
+        self.inner = HashingEmbedder(dim)
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), self.inner.dim), dtype=np.float32)
+        for i, vec in enumerate(self.inner.embed(texts)):
+            for j, v in vec.items():
+                out[i, j] = v
+        return out
+
+
+def load_model(name):
+    if not name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(name)
+        return model
+    except ImportError:
+        print("[bench] sentence-transformers not installed; using the stand-in embedders", file=sys.stderr)
+        return None
+
+
+def synthetic_corpus(n_docs, n_topics, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = [[f"t{t}w{j}" for j in range(40)] for t in range(n_topics)]
+    docs, doc_topics = [], []
+    for i in range(n_docs):
+        t = int(rng.integers(n_topics))
+        words = list(rng.choice(topics[t][:30], size=12)) + list(rng.choice(FILLER, size=6))
+        rng.shuffle(words)
+        ident = f"{ID_PREFIXES[i % 3]}-{1000 + i}"
+        docs.append({"id": str(i), "title": ident, "text": f"{ident} " + " ".join(words)})
+        doc_topics.append(t)
+    return docs, doc_topics, topics
+
+
+def synthetic_queries(docs, doc_topics, topics, n, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for q in range(n):
+        i = int(rng.integers(len(docs)))
+        ident = docs[i]["title"]
+        kind = ("keyword", "mixed", "semantic")[q % 3]
+        if kind == "keyword":
+            queries.append((kind, ident, {docs[i]["id"]}))
+        elif kind == "mixed":
+            own = [w for w in docs[i]["text"].split()[1:] if w not in FILLER]
+            queries.append((kind, f"{ident} " + " ".join(rng.choice(own, size=3)), {docs[i]["id"]}))
+        else:
+            t = doc_topics[i]
+            relevant = {d["id"] for d, dt in zip(docs, doc_topics) if dt == t}
+            queries.append((kind, " ".join(rng.choice(topics[t][30:], size=4)), relevant))
+    return queries
+
+
+def build_index(path, docs, encode, batch=2048):
+    index = LocalVectorIndex(path)
+    for start in range(0, len(docs), batch):
+        chunk = docs[start:start + batch]
+        index.add(chunk, encode([d["text"] for d in chunk]))
+    return index
+
+
+def run(index, queries, encode, k):
+    methods = {
+        "vector": lambda q, v: index.search(v, k),
+        "bm25": lambda q, v: index.lexical_search(q, k),
+        "hybrid": lambda q, v: index.hybrid_search(q, v, k),
+        "routed": lambda q, v: (index.lexical_search(q, k) if is_keyword_query(q) else []) or index.hybrid_search(q, v, k),
+    }
+    embed_ms = []
+    vectors = []
+    for _, q, _ in queries:
+        t0 = time.perf_counter()
+        vectors.append(encode([q])[0])
+        embed_ms.append((time.perf_counter() - t0) * 1000.0)
+    rows = []
+    for name, fn in methods.items():
+        by_kind, lat = {}, []
+        skipped_embed = 0
+        for (kind, q, relevant), vec in zip(queries, vectors):
+            t0 = time.perf_counter()
+            hits = fn(q, vec)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+            ids = [rec["id"] for _, rec in hits]
+            if kind == "semantic":
+                score = sum(i in relevant for i in ids) / k
+            else:
+                score = float(bool(relevant & set(ids)))
+            by_kind.setdefault(kind, []).append(score)
+            # routed answers keyword queries with a BM25 hit without embedding them
+            if name == "bm25" or (name == "routed" and is_keyword_query(q) and index.lexical_search(q, 1)):
+                skipped_embed += 1
+        lat.sort()
+        rows.append({
+            "method": name,
+            **{kind: round(statistics.mean(v), 3) for kind, v in sorted(by_kind.items())},
+            "mean_ms": round(statistics.mean(lat), 3),
+            "p95_ms": round(lat[int(len(lat) * 0.95)], 3),
+            "no_embed": round(skipped_embed / len(queries), 3),
+        })
+    return rows, round(statistics.mean(embed_ms), 3)
+
+
+def print_table(title, rows, embed_ms):
+    print(f"\n== {title}  (query embedding: {embed_ms} ms mean, not included below)")
+    kinds = [c for c in rows[0] if c not in ("method", "mean_ms", "p95_ms", "no_embed")]
+    print(f"{'method':<8}" + "".join(f"{k:>10}" for k in kinds) + f"{'mean ms':>10}{'p95 ms':>10}{'no-embed':>10}")
+    for r in rows:
+        print(f"{r['method']:<8}" + "".join(f"{r[k]:>10}" for k in kinds)
+              + f"{r['mean_ms']:>10}{r['p95_ms']:>10}{r['no_embed']:>10}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=20000, help="synthetic corpus size")
+    ap.add_argument("--topics", type=int, default=50)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--model", help="sentence-transformers model for real embeddings (optional)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+    model = load_model(args.model)
+    report = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = []
+        for name in sorted(os.listdir(DOCS_DIR)):
+            if name.endswith(".txt"):
+                with open(os.path.join(DOCS_DIR, name), "r", encoding="utf-8") as f:
+                    docs.append({"id": name, "title": name, "text": f.read().strip()})
+        encode = model.encode if model is not None else DenseHashing().encode
+        index = build_index(os.path.join(tmp, "docs"), docs, encode)
+        queries = [("labelled", q, {rel}) for q, rel in DOCS_QUERIES]
+        report["docs"] = run(index, queries, encode, 1)  # 2 docs: hit@1
+
+        docs, doc_topics, topics = synthetic_corpus(args.docs, args.topics)
+        encode = model.encode if model is not None else TopicEmbedder(topics).encode
+        t0 = time.perf_counter()
+        index = build_index(os.path.join(tmp, "synthetic"), docs, encode)
+        build_s = time.perf_counter() - t0
+        queries = synthetic_queries(docs, doc_topics, topics, args.queries)
+        report["synthetic"] = run(index, queries, encode, args.k)
+        meta = {"docs": args.docs, "build_s": round(build_s, 2), "index": index.stats(),
+                "embedder": args.model if model is not None else "synthetic topic embedder"}
+
+    if args.json:
+        print(json.dumps({"meta": meta, "docs": report["docs"][0], "synthetic": report["synthetic"][0]}, indent=2))
+        return
+    print_table("docs/ corpus (hit@1)", *report["docs"])
+    print_table(f"synthetic corpus: {args.docs} docs, {args.queries} queries, k={args.k}, "
+                f"{meta['index']['mode']} vectors", *report["synthetic"])
+    print(f"\nembedder: {meta['embedder']}; index build {meta['build_s']} s; "
+          f"BM25 {meta['index']['lexical']['terms']} terms")
+
+
+if __name__ == "__main__":
+    main()
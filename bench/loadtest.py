@@ -0,0 +1,321 @@
+# bench/loadtest.py
+"""
+Offline load test of the full request path: orchestrator (USE_MOCK_REGISTRY=true,
+LLM_PROVIDER=stub) -> mock_mcp -> demo agents, all started locally on bench ports.
+
+  python bench/loadtest.py                                   # all scenarios, concurrency 1,8,32
+  python bench/loadtest.py --scenarios execute --concurrency 64 --duration 30
+  python bench/loadtest.py --out results/$(git rev-parse --short HEAD).json
+  python bench/loadtest.py --compare results/base.json --out results/new.json
+  python bench/loadtest.py --url http://localhost:8000      # drive an already running stack
+  python bench/loadtest.py --sim-agents 50 --sim-mix normal,slow,flaky   # simulated fleet (sim_agents.py)
+
+Each (scenario, concurrency) cell runs closed-loop workers for --duration seconds after a
+--warmup, and reports p50/p95/p99 latency, RPS and error rate. Prompts cycle through
+--prompts distinct variants so single-flight coalescing and caches see a realistic mix
+(--prompts 1 measures the fully-coalesced best case).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# module, port offset from --port-base
+DEMO_AGENTS = [
+    ("dev_agent", "dev_agent", 11, "Dev Agent", "Echoes the prompt back; developer test agent."),
+    ("web_search_agent", "web_search_agent", 12, "Web Search Agent", "Searches the web for information given a query."),
+    ("summarise_agent", "summarise_agent", 13, "Summarise Agent", "Summarizes text content into concise points."),
+    ("email_agent", "email_agent", 14, "Email Agent", "Sends emails to specified recipients."),
+    ("rag_agent", "rag_agent", 15, "Knowledge Base Agent", "Stores and retrieves information using vector search (RAG)."),
+]
+ALLOWED_TOOLS = ["search_docs", "create_ticket", "call_agent"]
+SCENARIOS = ("plan", "execute", "chat")
+PROMPTS = [
+    "summarise the latest release notes", "find documentation about canister upgrades",
+    "email the team about the outage", "search the web for agent frameworks",
+    "what is the refund policy", "draft a ticket for the login bug",
+]
+
+
+# ---------- stack management ----------
+class Stack:
+    def __init__(self, port_base: int, log_dir: str):
+        self.port_base = port_base
+        self.log_dir = log_dir
+        self.procs: List[subprocess.Popen] = []
+        self._logs: List[Any] = []
+        self.url = f"http://127.0.0.1:{port_base}"
+        self.mcp_url = f"http://127.0.0.1:{port_base + 1}"
+        self.agents: List[Dict[str, Any]] = []
+
+    def _spawn(self, name: str, app: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+        log = open(os.path.join(self.log_dir, f"{name}.log"), "wb")
+        self._logs.append(log)
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        self.procs.append(proc)
+        return proc
+
+    def start(self, with_agents: bool = True, sim_agents: int = 0, sim_mix: str = ""):
+        env = dict(os.environ)
+        env.update({
+            "USE_MOCK_REGISTRY": "true", "LLM_PROVIDER": "stub",
+            # empty keys keep .env files from switching the planners to a real provider
+            "GROQ_API_KEY": "", "OPENAI_API_KEY": "", "HF_API_KEY": "",
+            "MCP_ENDPOINT": self.mcp_url, "PYTHONUNBUFFERED": "1",
+        })
+        self._spawn("orchestrator", "orchestrator.main:app", self.port_base, env)
+        self._spawn("mock_mcp", "mcp-servers.mock_mcp:app", self.port_base + 1, env)
+        pending = []
+        if sim_agents:
+            sim_port = self.port_base + 20
+            sim_env = dict(env, SIM_AGENTS=str(sim_agents), **({"SIM_MIX": sim_mix} if sim_mix else {}))
+            proc = self._spawn("sim_agents", "sim_agents:app", sim_port, sim_env)
+            sim_url = f"http://127.0.0.1:{sim_port}"
+            if not wait_healthy(sim_url, proc=proc):
+                raise RuntimeError(f"sim_agents did not start (logs in {self.log_dir})")
+            # slow-starting profiles report 503 on /health (and fail /register) until ready
+            for manifest in httpx.get(sim_url + "/sim/manifests", timeout=10.0).json():
+                pending.append((proc, manifest))
+        elif with_agents:
+            for name, module, offset, title, desc in DEMO_AGENTS:
+                port = self.port_base + offset
+                proc = self._spawn(name, f"{module}:app", port, env)
+                pending.append((proc, {"id": name, "name": title, "description": desc, "developer": "2vxsx-fae",
+                                       "endpoint": f"http://127.0.0.1:{port}", "allowed_tools": ALLOWED_TOOLS}))
+        for url in (self.url, self.mcp_url):
+            if not wait_healthy(url):
+                raise RuntimeError(f"{url} did not become healthy (logs in {self.log_dir})")
+        for proc, manifest in pending:
+            if wait_healthy(manifest["endpoint"], proc=proc):
+                self.agents.append(manifest)
+            else:
+                # e.g. rag_agent without chromadb installed
+                print(f"[bench] skipping {manifest['id']}: not healthy (see {self.log_dir}/{manifest['id']}.log)", file=sys.stderr)
+
+    def stop(self):
+        for proc in self.procs:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        for log in self._logs:
+            log.close()
+
+
+def wait_healthy(url: str, timeout: float = 30.0, proc: Optional[subprocess.Popen] = None) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        try:
+            if httpx.get(url.rstrip("/") + "/health", timeout=2.0).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def register_agents(url: str, agents: List[Dict[str, Any]]) -> List[str]:
+    ids = []
+    for manifest in agents:
+        resp = httpx.post(url + "/register", json=manifest, timeout=30.0)
+        if resp.status_code == 200:
+            ids.append(manifest["id"])
+        else:
+            print(f"[bench] register {manifest['id']} failed: HTTP {resp.status_code} {resp.text[:200]}", file=sys.stderr)
+    return ids
+
+
+# ---------- load generation ----------
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def make_request(scenario: str, i: int, agent_ids: List[str], n_prompts: int):
+    prompt = f"{PROMPTS[i % len(PROMPTS)]} #{i % n_prompts}"
+    agent = agent_ids[i % len(agent_ids)]
+    if scenario == "plan":
+        return "/plan", {"manifest_id": agent, "prompt": prompt}
+    if scenario == "execute":
+        return "/execute", {"manifest_id": agent, "prompt": prompt, "user": "2vxsx-fae"}
+    return "/chat/plan", {"prompt": prompt, "messages": [{"role": "user", "content": prompt}]}
+
+
+async def run_cell(url: str, scenario: str, concurrency: int, duration: float, warmup: float,
+                   agent_ids: List[str], n_prompts: int, timeout: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = {"i": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+
+        async def worker():
+            while True:
+                now = loop.time()
+                if now >= stop_at:
+                    return
+                counter["i"] += 1
+                path, body = make_request(scenario, counter["i"], agent_ids, n_prompts)
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(path, json=body)
+                    status = str(resp.status_code)
+                except httpx.TimeoutException:
+                    status = "timeout"
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                elapsed = time.perf_counter() - started
+                if measure_from <= now:
+                    statuses[status] = statuses.get(status, 0) + 1
+                    if status == "200":
+                        latencies.append(elapsed * 1000.0)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    total = sum(statuses.values())
+    errors = total - statuses.get("200", 0)
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "requests": total,
+        "ok": statuses.get("200", 0),
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rps": round(statuses.get("200", 0) / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "p50": _r(percentile(latencies, 50)), "p95": _r(percentile(latencies, 95)),
+            "p99": _r(percentile(latencies, 99)), "max": _r(latencies[-1] if latencies else None),
+            "mean": _r(sum(latencies) / len(latencies) if latencies else None),
+        },
+        "status_codes": dict(sorted(statuses.items())),
+    }
+
+
+def _r(v: Optional[float]) -> Optional[float]:
+    return round(v, 2) if v is not None else None
+
+
+# ---------- reporting ----------
+def git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any]):
+    """Print p50/p99/RPS deltas for cells present in both reports."""
+    index = {(c["scenario"], c["concurrency"]): c for c in base.get("results", [])}
+    print(f"\ncompare {base['meta'].get('git')} -> {new['meta'].get('git')}")
+    for cell in new["results"]:
+        old = index.get((cell["scenario"], cell["concurrency"]))
+        if old is None:
+            continue
+        parts = []
+        for label, a, b in (("p50", old["latency_ms"]["p50"], cell["latency_ms"]["p50"]),
+                            ("p99", old["latency_ms"]["p99"], cell["latency_ms"]["p99"]),
+                            ("rps", old["rps"], cell["rps"])):
+            delta = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else "n/a"
+            parts.append(f"{label} {a} -> {b} ({delta})")
+        print(f"  {cell['scenario']:<8} c={cell['concurrency']:<4} " + "  ".join(parts))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma list of plan, execute, chat")
+    ap.add_argument("--concurrency", default="1,8,32", help="comma list of concurrency levels")
+    ap.add_argument("--duration", type=float, default=15.0, help="measured seconds per cell")
+    ap.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each cell")
+    ap.add_argument("--prompts", type=int, default=50, help="distinct prompt variants to cycle through")
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-request timeout (s)")
+    ap.add_argument("--port-base", type=int, default=18000, help="orchestrator port; MCP +1, agents +11..+15")
+    ap.add_argument("--sim-agents", type=int, default=0, help="use N simulated agents instead of the demo agents")
+    ap.add_argument("--sim-mix", default="", help="sim_agents profile rotation, e.g. fast,normal,slow,flaky")
+    ap.add_argument("--url", help="use an already running orchestrator instead of starting the stack")
+    ap.add_argument("--agents", default="", help="comma list of registered agent ids to target (with --url)")
+    ap.add_argument("--out", help="write the JSON report here (default: stdout)")
+    ap.add_argument("--compare", help="previous JSON report to diff against")
+    args = ap.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenarios: {unknown}")
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    stack = None
+    try:
+        if args.url:
+            url = args.url.rstrip("/")
+            agent_ids = [a.strip() for a in args.agents.split(",") if a.strip()]
+            if not agent_ids:
+                agent_ids = [a["id"] for a in httpx.get(url + "/agents", timeout=10.0).json()["agents"]]
+        else:
+            stack = Stack(args.port_base, tempfile.mkdtemp(prefix="agenthub-bench-"))
+            print(f"[bench] starting stack on ports {args.port_base}+ (logs in {stack.log_dir})", file=sys.stderr)
+            stack.start(sim_agents=args.sim_agents, sim_mix=args.sim_mix)
+            url = stack.url
+            agent_ids = register_agents(url, stack.agents)
+        if not agent_ids:
+            raise SystemExit("no agents available to target")
+
+        results = []
+        for scenario in scenarios:
+            for c in levels:
+                cell = asyncio.run(run_cell(url, scenario, c, args.duration, args.warmup, agent_ids, args.prompts, args.timeout))
+                lat = cell["latency_ms"]
+                print(f"[bench] {scenario:<8} c={c:<4} rps={cell['rps']:<8} p50={lat['p50']} p95={lat['p95']} "
+                      f"p99={lat['p99']} ms  errors={cell['error_rate']:.2%}", file=sys.stderr)
+                results.append(cell)
+    finally:
+        if stack is not None:
+            stack.stop()
+
+    report = {
+        "meta": {
+            "git": git_revision(), "timestamp": int(time.time()), "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count(), "agents": agent_ids,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 # mcp-servers/search_docs.py
 from fastapi import FastAPI
 from pydantic import BaseModel
-import weaviate
 import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from mcp_common.vector_index import VECTOR_BACKEND, VECTOR_INDEX_PATH, LocalVectorIndex  # noqa: E402
 
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 CLASS_NAME = os.getenv("VECTOR_CLASS", "Document")
@@ -13,19 +16,35 @@ class SearchArgs(BaseModel):
     query: str
     k: int = 3
 
-client = weaviate.Client(url=WEAVIATE_URL)
+# VECTOR_BACKEND=local searches the embedded index built by tools/ingest_docs.py --backend local
+if VECTOR_BACKEND == "local":
+    client = None
+    index = LocalVectorIndex(VECTOR_INDEX_PATH)
+else:
+    import weaviate
+    client = weaviate.Client(url=WEAVIATE_URL)
+    index = None
+
+_model = None
+
+def get_model():
+    # compute embedding locally with same model as ingest (loaded once, not per request)
+    global _model
+    if _model is None:
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    return _model
 
 @app.post("/tool/search_docs")
 def search_docs(args: SearchArgs):
     q = args.query
     k = args.k or 3
-    # compute embedding locally with same model as ingest
-    # to avoid importing sentence-transformers here, we can call weaviate's vector-search with textual query?
-    # But since we used vectorizer none, we must compute embedding locally here too.
-    # For simplicity, compute embedding using sentence-transformers
-    from sentence_transformers import SentenceTransformer
-    model = SentenceTransformer(os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
-    v = model.encode(q).tolist()
+    # Since we used vectorizer none, we must compute embedding locally here too.
+    v = get_model().encode(q).tolist()
+    if index is not None:
+        index.refresh()
+        return {"results": [{"id": rec.get("id", ""), "title": rec.get("title", ""),
+                             "snippet": (rec.get("text") or "")[:400]} for _, rec in index.search(v, k)]}
     # run vector search
     res = (
         client.query
@@ -45,4 +64,3 @@ def search_docs(args: SearchArgs):
             "snippet": text[:400] if text else ""
         })
     return {"results": results}
-
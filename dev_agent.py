@@ -1,8 +1,10 @@
 # dev_agent.py -- a tiny developer-hosted agent for testing (Model A)
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from orchestrator.tracing import install_tracing
 
 app = FastAPI(title="Dev Agent (mock)")
+install_tracing(app, "dev_agent")
 
 @app.get("/health")
 def health():
@@ -1,8 +1,10 @@
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from orchestrator.tracing import install_tracing
 
 app = FastAPI(title="Email Agent")
+install_tracing(app, "email_agent")
 
 @app.post("/execute")
 async def execute(request: Request):
@@ -1,23 +1,72 @@
-import { fetchApi } from './client';
+import { BASE_URL, fetchApi } from './client';
 import type { Agent } from '../types/agent';
 
-export async function getAllAgents(): Promise<Agent[]> {
-    const data = await fetchApi('/agents');
+export interface AgentQuery {
+    limit?: number;
+    cursor?: string;
+    tool?: string;
+    developer?: string;
+    namePrefix?: string;
+    fields?: string[];
+}
 
-    // Handle nested list response from backend [[{...}, {...}]]
-    let rawAgents: any[] = [];
-    if (Array.isArray(data)) {
-        if (data.length > 0 && Array.isArray(data[0])) {
-            rawAgents = data[0];
-        } else {
-            rawAgents = data;
-        }
+export interface AgentPage {
+    agents: any[];
+    next_cursor: string | null;
+    total: number;
+    version: string;
+}
+
+// Last response per URL, revalidated with If-None-Match so unchanged pages cost a 304
+const etagCache = new Map<string, { etag: string; data: AgentPage }>();
+
+export async function listAgents(query: AgentQuery = {}): Promise<AgentPage> {
+    const params = new URLSearchParams();
+    if (query.limit) params.set('limit', String(query.limit));
+    if (query.cursor) params.set('cursor', query.cursor);
+    if (query.tool) params.set('tool', query.tool);
+    if (query.developer) params.set('developer', query.developer);
+    if (query.namePrefix) params.set('name_prefix', query.namePrefix);
+    if (query.fields?.length) params.set('fields', query.fields.join(','));
+    const qs = params.toString();
+    const url = `${BASE_URL}/agents${qs ? `?${qs}` : ''}`;
+
+    const cached = etagCache.get(url);
+    const response = await fetch(url, {
+        cache: 'no-store',
+        headers: cached ? { 'If-None-Match': cached.etag } : {},
+    });
+    if (response.status === 304 && cached) {
+        return cached.data;
     }
+    if (!response.ok) {
+        const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+        throw new Error(error.detail || `API Error: ${response.statusText}`);
+    }
+    const data: AgentPage = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) etagCache.set(url, { etag, data });
+    return data;
+}
+
+// Walks every page matching the filter (server-side filtering, 200 agents per request)
+export async function getAgents(filter: Omit<AgentQuery, 'cursor' | 'limit'> = {}): Promise<Agent[]> {
+    const rawAgents: any[] = [];
+    let cursor: string | undefined;
+    do {
+        const page = await listAgents({ ...filter, limit: 200, cursor });
+        rawAgents.push(...page.agents);
+        cursor = page.next_cursor ?? undefined;
+    } while (cursor);
 
     // Normalize agent data
     return rawAgents.map(normalizeAgent);
 }
 
+export async function getAllAgents(): Promise<Agent[]> {
+    return getAgents();
+}
+
 export async function getFeaturedAgents(): Promise<Agent[]> {
     const agents = await getAllAgents();
     return agents.slice(0, 4);
@@ -1,4 +1,4 @@
-const BASE_URL = 'http://localhost:8000';
+export const BASE_URL = 'http://localhost:8000';
 
 export async function fetchApi(endpoint: string, options: RequestInit = {}) {
     const response = await fetch(`${BASE_URL}${endpoint}`, {
@@ -1,4 +1,4 @@
-import { fetchApi } from './client';
+import { BASE_URL, fetchApi } from './client';
 
 export interface PlanStep {
     tool: string;
@@ -43,6 +43,77 @@ export async function executePlan(
     });
 }
 
+export interface ExecutionEvent {
+    event: string;
+    data: any;
+}
+
+export interface StreamTimings {
+    ttfbMs: number;   // time to first byte of the event stream
+    totalMs: number;  // time until the receipt (or error) arrived
+}
+
+/**
+ * Same request as executePlan, but against /execute/stream: per-step progress is
+ * delivered to onEvent as Server-Sent Events while the plan runs.
+ * Resolves with the final receipt (same shape as executePlan's result).
+ */
+export async function executePlanStream(
+    manifestId: string,
+    prompt: string,
+    plan: Plan,
+    userPrincipal: string,
+    onEvent: (ev: ExecutionEvent) => void,
+    signal?: AbortSignal
+): Promise<{ result: ExecutionResult; timings: StreamTimings }> {
+    const started = performance.now();
+    const response = await fetch(`${BASE_URL}/execute/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        body: JSON.stringify({ manifest_id: manifestId, prompt, plan, user: userPrincipal }),
+        signal,
+    });
+    if (!response.ok || !response.body) {
+        const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+        throw new Error(error.detail || `API Error: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let ttfbMs = -1;
+    let buffer = '';
+    let result: ExecutionResult | null = null;
+
+    const handleBlock = (block: string) => {
+        let event = 'message';
+        const data: string[] = [];
+        for (const line of block.split('\n')) {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+        }
+        if (!data.length) return;
+        const parsed = JSON.parse(data.join('\n'));
+        onEvent({ event, data: parsed });
+        if (event === 'receipt') result = parsed;
+        if (event === 'error') throw new Error(parsed.detail || 'Execution failed');
+    };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        if (ttfbMs < 0) ttfbMs = performance.now() - started;
+        buffer += decoder.decode(value, { stream: true });
+        let sep;
+        while ((sep = buffer.indexOf('\n\n')) >= 0) {
+            handleBlock(buffer.slice(0, sep));
+            buffer = buffer.slice(sep + 2);
+        }
+    }
+    if (buffer.trim()) handleBlock(buffer);
+    if (!result) throw new Error('Stream ended without a receipt');
+    return { result, timings: { ttfbMs, totalMs: performance.now() - started } };
+}
+
 export async function registerAgent(agentData: any): Promise<{ ok: boolean }> {
     return fetchApi('/register', {
         method: 'POST',
@@ -2,7 +2,7 @@ import { useState } from 'react';
 import { useQuery } from '@tanstack/react-query';
 import { ChatWindow } from '../components/ChatWindow';
 import { PlanPreviewModal } from '../components/PlanPreviewModal';
-import { executePlan, chatPlan, type Plan } from '../api/orchestrator';
+import { executePlanStream, chatPlan, type Plan } from '../api/orchestrator';
 import { getAllAgents } from '../api/agents';
 import { useAuth } from '../contexts/AuthContext';
 
@@ -102,11 +102,26 @@ export function Chat() {
 
         setIsLoading(true);
         try {
-            const result = await executePlan(
+            const total = currentPlan.steps?.length || 0;
+            const done = new Set<number>();
+            const setProgress = (content: string) => setMessages(prev => prev.map(msg =>
+                msg.id === processingMsgId ? { ...msg, content } : msg
+            ));
+
+            const { result } = await executePlanStream(
                 MANIFEST_ID,
                 currentPlan.prompt || "", // Use the prompt from the current plan
                 currentPlan,
-                user?.principal || 'anonymous'
+                user?.principal || 'anonymous',
+                ({ event, data }) => {
+                    if (event === 'step_started') {
+                        setProgress(`Executing step ${data.index + 1}/${total}: ${data.tool}...`);
+                    } else if (event === 'step_finished' || event === 'step_failed') {
+                        done.add(data.index);
+                        const status = event === 'step_failed' ? `failed (${data.error})` : 'done';
+                        setProgress(`Step ${data.index + 1}/${total} (${data.tool}) ${status}. ${done.size}/${total} complete.`);
+                    }
+                }
             );
 
             // Update the processing message with the result
@@ -3,7 +3,7 @@ import { useAuth } from '../contexts/AuthContext';
 import { Navigate } from 'react-router-dom';
 import { Plus, Settings, Activity, Box, Loader2 } from 'lucide-react';
 import { RegisterAgentForm } from '../components/RegisterAgentForm';
-import { getAllAgents } from '../api/agents';
+import { getAgents } from '../api/agents';
 import { AgentCard } from '../components/AgentCard';
 import type { Agent } from '../types/agent';
 
@@ -23,9 +23,8 @@ export function Dashboard() {
     const fetchMyAgents = async () => {
         setIsLoadingAgents(true);
         try {
-            const allAgents = await getAllAgents();
-            // Filter agents where developer matches user principal
-            const userAgents = allAgents.filter(agent => agent.developer === user?.principal);
+            // Only this developer's agents are fetched (filtered server-side)
+            const userAgents = await getAgents({ developer: user?.principal });
             setMyAgents(userAgents);
         } catch (error) {
             console.error("Failed to fetch agents:", error);
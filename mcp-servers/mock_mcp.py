@@ -1,6 +1,7 @@
 # mcp-servers/mock_mcp.py
 # Single FastAPI app that exposes:
-#  - POST /tool/search_docs   -> real Weaviate-backed search if WEAVIATE_URL is available, else returns safe mock results
+#  - POST /tool/search_docs   -> real Weaviate-backed search if WEAVIATE_URL is available (or the embedded
+#                                index with VECTOR_BACKEND=local), else returns safe mock results
 #  - POST /tool/create_ticket -> simple ticket creation mock used by the orchestrator
 
 import os
@@ -8,15 +9,43 @@ from typing import List, Dict, Any
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 import logging
+import threading
+import time
 import httpx
 from urllib.parse import urljoin
+from orchestrator.tracing import install_tracing, inject as inject_trace
+from mcp_common.embed_batcher import EmbedBatcher
+from mcp_common.worker_pool import WorkerPool
+from orchestrator.cache import TTLCache, is_miss
 
 # Optional heavy deps: import lazily so server still starts without weaviate/sentence-transformers installed
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
 CLASS_NAME = os.getenv("VECTOR_CLASS", "Document")
+# Micro-batch concurrent query embeddings (EMBED_BATCH_MAX / EMBED_BATCH_WAIT_MS tune the window)
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "true").lower() in ("1", "true", "yes")
+# Blocking work runs off the event loop: encoding on a pool sized to the cores, vector-store
+# calls (and lazy client / model loading) on a separate I/O pool so a slow Weaviate can't starve encoding
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0")) or (os.cpu_count() or 1)
+VECTOR_IO_WORKERS = int(os.getenv("VECTOR_IO_WORKERS", "8"))
+# After Weaviate or the embed model fails to initialize, searches use the mock results
+# without retrying until this many seconds have passed
+INIT_RETRY_INTERVAL = float(os.getenv("INIT_RETRY_INTERVAL", "30"))
+# /plan and /execute both search with the raw prompt: cache query -> vector and
+# (query, k, class, index version) -> results. POST /index/changed bumps the version.
+SEARCH_EMBED_CACHE_MAX = int(os.getenv("SEARCH_EMBED_CACHE_MAX", "2048"))
+SEARCH_EMBED_CACHE_TTL = float(os.getenv("SEARCH_EMBED_CACHE_TTL", "3600"))
+SEARCH_RESULT_CACHE_MAX = int(os.getenv("SEARCH_RESULT_CACHE_MAX", "1024"))
+SEARCH_RESULT_CACHE_TTL = float(os.getenv("SEARCH_RESULT_CACHE_TTL", "60"))
+# Local index retrieval: hybrid (BM25 + vector, RRF; keyword queries BM25-only) | vector | lexical
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid").lower()
+# weaviate | local (embedded memmap index + BM25; needs numpy, imported only for this backend)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate").lower()
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
 
 app = FastAPI(title="Mock MCP / Search Docs (dev)")
+# continue the orchestrator's trace (traceparent) and forward it to agents in call_agent
+install_tracing(app, "mock_mcp")
 
 log = logging.getLogger("mock_mcp")
 logging.basicConfig(level=logging.INFO)
@@ -24,36 +53,135 @@ logging.basicConfig(level=logging.INFO)
 # Lazily initialized resources
 _weaviate_client = None
 _embed_model = None
+_embed_batcher = None
+_local_index = None
+# getters run on pool threads; one lock per resource so a slow Weaviate connect never
+# holds up model loading or the local index (and vice versa)
+_weaviate_lock = threading.Lock()
+_model_lock = threading.Lock()
+_index_lock = threading.Lock()
+_weaviate_failed_at = None
+_model_failed_at = None
+embed_pool = WorkerPool("embed", EMBED_WORKERS)
+io_pool = WorkerPool("vector_io", VECTOR_IO_WORKERS)
+_embed_cache = TTLCache(maxsize=SEARCH_EMBED_CACHE_MAX, ttl=SEARCH_EMBED_CACHE_TTL)
+_result_cache = TTLCache(maxsize=SEARCH_RESULT_CACHE_MAX, ttl=SEARCH_RESULT_CACHE_TTL)
+_index_version = 0
+_search_paths = {"lexical": 0, "vector": 0, "hybrid": 0}
+
+def _retry_pending(failed_at) -> bool:
+    return failed_at is not None and time.monotonic() - failed_at < INIT_RETRY_INTERVAL
 
 def get_weaviate_client():
-    global _weaviate_client
-    if _weaviate_client is None:
-        try:
-            import weaviate
-            _weaviate_client = weaviate.Client(url=WEAVIATE_URL)
-            log.info("Connected to Weaviate at %s", WEAVIATE_URL)
-        except Exception as e:
-            log.warning("Weaviate client init failed: %s", e)
-            _weaviate_client = None
-    return _weaviate_client
+    """
+    Weaviate client, or None. While one search is connecting the others don't queue behind
+    it (they get None and serve mock results); a failed connect is retried after INIT_RETRY_INTERVAL.
+    """
+    global _weaviate_client, _weaviate_failed_at
+    if _weaviate_client is not None or _retry_pending(_weaviate_failed_at):
+        return _weaviate_client
+    if not _weaviate_lock.acquire(blocking=False):
+        return None
+    try:
+        if _weaviate_client is None:
+            try:
+                import weaviate
+                _weaviate_client = weaviate.Client(url=WEAVIATE_URL)
+                _weaviate_failed_at = None
+                log.info("Connected to Weaviate at %s", WEAVIATE_URL)
+            except Exception as e:
+                log.warning("Weaviate client init failed (retry in %ss): %s", INIT_RETRY_INTERVAL, e)
+                _weaviate_failed_at = time.monotonic()
+        return _weaviate_client
+    finally:
+        _weaviate_lock.release()
+
+def get_local_index():
+    """Embedded index (VECTOR_BACKEND=local), remapped when tools/ingest_docs.py publishes a new version."""
+    global _local_index
+    with _index_lock:
+        if _local_index is None:
+            from mcp_common.vector_index import LocalVectorIndex
+            _local_index = LocalVectorIndex(VECTOR_INDEX_PATH)
+            log.info("Opened local vector index at %s (%d rows)", VECTOR_INDEX_PATH, len(_local_index))
+    _local_index.refresh()
+    return _local_index
 
 def get_embed_model():
-    global _embed_model
-    if _embed_model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            _embed_model = SentenceTransformer(EMBED_MODEL)
-            log.info("Loaded embed model: %s", EMBED_MODEL)
-        except Exception as e:
-            log.warning("Embedding model init failed: %s", e)
-            _embed_model = None
-    return _embed_model
+    """Embedding model, loaded once (concurrent first searches wait for it); None if unavailable."""
+    global _embed_model, _model_failed_at
+    if _embed_model is not None or _retry_pending(_model_failed_at):
+        return _embed_model
+    with _model_lock:
+        if _embed_model is None and not _retry_pending(_model_failed_at):
+            try:
+                from sentence_transformers import SentenceTransformer
+                _embed_model = SentenceTransformer(EMBED_MODEL)
+                _model_failed_at = None
+                log.info("Loaded embed model: %s", EMBED_MODEL)
+            except Exception as e:
+                log.warning("Embedding model init failed (retry in %ss): %s", INIT_RETRY_INTERVAL, e)
+                _model_failed_at = time.monotonic()
+        return _embed_model
+
+def get_embed_batcher():
+    global _embed_batcher
+    if _embed_batcher is None:
+        model = get_embed_model()
+        if model is None:
+            return None
+        _embed_batcher = EmbedBatcher(lambda texts: model.encode(texts, batch_size=len(texts)),
+                                      executor=embed_pool)
+    return _embed_batcher
+
+async def embed_query(model, query: str) -> List[float]:
+    """Query vector (cached), batched with concurrent searches unless EMBED_BATCHING is off."""
+    vec = _embed_cache.get(query)
+    if vec is None:
+        if EMBED_BATCHING:
+            vec = (await get_embed_batcher().embed(query)).tolist()
+        else:
+            vec = (await embed_pool.run(model.encode, query)).tolist()
+        _embed_cache.set(query, vec)
+    return vec
+
+def bump_index_version() -> int:
+    """The indexed collection changed: cached results are stale (query vectors are not)."""
+    global _index_version
+    _index_version += 1
+    _result_cache.clear()
+    return _index_version
+
+async def local_search(index, model, query: str, k: int) -> List[Dict[str, Any]]:
+    """
+    Embedded index. Keyword-looking queries ("401", "TICKET-4821"), SEARCH_MODE=lexical, or no
+    embedding model: BM25 only, nothing embedded. Otherwise vector or hybrid (RRF of both), and
+    also when the lexical path finds nothing.
+    """
+    from mcp_common.bm25 import is_keyword_query
+
+    hits = []
+    if SEARCH_MODE == "lexical" or model is None or (SEARCH_MODE == "hybrid" and is_keyword_query(query)):
+        hits = await io_pool.run(index.lexical_search, query, k)
+        if hits:
+            _search_paths["lexical"] += 1
+    if not hits and model is not None:
+        vec = await embed_query(model, query)
+        if SEARCH_MODE == "vector":
+            hits = await io_pool.run(index.search, vec, k)
+            _search_paths["vector"] += 1
+        else:
+            hits = await io_pool.run(index.hybrid_search, query, vec, k)
+            _search_paths["hybrid"] += 1
+    return [{"id": rec.get("id", ""), "title": rec.get("title", ""), "snippet": (rec.get("text") or "")[:400]}
+            for _, rec in hits]
 
 @app.post("/tool/search_docs")
 async def search_docs(request: Request):
     """
     Query body: { "query": "<text>", "k": 3 }
-    If Weaviate is available and the embedding model is available, performs a vector search.
+    If Weaviate (or, with VECTOR_BACKEND=local, the embedded index at VECTOR_INDEX_PATH) and the
+    embedding model are available, performs a vector search.
     Otherwise returns deterministic mock results.
     Returns: {"results": [{"id": "...", "title": "...", "snippet": "..."}]}
     """
@@ -64,51 +192,63 @@ async def search_docs(request: Request):
     if not query:
         raise HTTPException(status_code=400, detail="query is required")
 
-    client = get_weaviate_client()
-    model = get_embed_model()
+    # first call connects / loads the model (seconds): keep that off the loop too
+    index = await io_pool.run(get_local_index) if VECTOR_BACKEND == "local" else None
+    client = await io_pool.run(get_weaviate_client) if index is None else None
+    model = await io_pool.run(get_embed_model)
 
-    # If Weaviate + model available, do real vector search
-    if client is not None and model is not None:
+    # Real search with Weaviate + model, or a non-empty local index (its BM25 path needs no model)
+    if (client is not None and model is not None) or index:
+        cache_key = (query, k, CLASS_NAME, _index_version, index.version if index is not None else None)
+        cached = _result_cache.lookup(cache_key)
+        if not is_miss(cached):
+            return JSONResponse({"results": cached})
         try:
-            # Compute embedding vector (list)
-            vec = model.encode(query).tolist()
-
-            # Build query - include additional id in response
-            # request properties you stored during ingestion (title, text, source, etc.)
-            q = (
-                client.query
-                .get(CLASS_NAME, ["title", "text", "source"])
-                .with_near_vector({"vector": vec})
-                .with_additional(["id", "certainty"])
-                .with_limit(k)
-            )
-            res = q.do()
-
-            hits = res.get("data", {}).get("Get", {}).get(CLASS_NAME, [])
-            results = []
-            seen_ids = set()
-            for h in hits:
-                # id is under '_additional' when using with_additional
-                add = h.get("_additional", {}) or {}
-                doc_id = add.get("id") or ""
-                title = h.get("title") or h.get("name") or ""
-                # try several common property names for content
-                text = h.get("text") or h.get("content") or ""
-                snippet = (text[:400] if isinstance(text, str) else "") or ""
-                # avoid duplicates
-                if doc_id in seen_ids:
-                    continue
-                seen_ids.add(doc_id)
-                results.append({"id": doc_id, "title": title, "snippet": snippet})
+            if index is not None:
+                # embedded index (VECTOR_BACKEND=local): BM25 / vector / hybrid, see local_search
+                results = await local_search(index, model, query, k)
+            else:
+                # Compute embedding vector (list)
+                vec = await embed_query(model, query)
+
+                # Build query - include additional id in response
+                # request properties you stored during ingestion (title, text, source, etc.)
+                q = (
+                    client.query
+                    .get(CLASS_NAME, ["title", "text", "source"])
+                    .with_near_vector({"vector": vec})
+                    .with_additional(["id", "certainty"])
+                    .with_limit(k)
+                )
+                res = await io_pool.run(q.do)
+
+                hits = res.get("data", {}).get("Get", {}).get(CLASS_NAME, [])
+                results = []
+                seen_ids = set()
+                for h in hits:
+                    # id is under '_additional' when using with_additional
+                    add = h.get("_additional", {}) or {}
+                    doc_id = add.get("id") or ""
+                    title = h.get("title") or h.get("name") or ""
+                    # try several common property names for content
+                    text = h.get("text") or h.get("content") or ""
+                    snippet = (text[:400] if isinstance(text, str) else "") or ""
+                    # avoid duplicates
+                    if doc_id in seen_ids:
+                        continue
+                    seen_ids.add(doc_id)
+                    results.append({"id": doc_id, "title": title, "snippet": snippet})
             # If no hits returned, fallthrough to mock format
             if not results:
-                log.info("Weaviate returned no results, falling back to mock snippets")
+                log.info("Vector search returned no results, falling back to mock snippets")
                 results = [
                     {"id":"", "title":"", "snippet": f"No relevant snippets found for: {query}"}
                 ]
+            if cache_key[3] == _index_version:  # don't store results raced by an index change
+                _result_cache.set(cache_key, results)
             return JSONResponse({"results": results})
         except Exception as e:
-            log.exception("Weaviate query failed, returning mock results: %s", e)
+            log.exception("Vector search failed, returning mock results: %s", e)
             # fallthrough to mock
 
     # Fallback mock results (when weaviate or model not available)
@@ -181,9 +321,9 @@ async def call_agent(request: Request):
     try:
         async with httpx.AsyncClient(timeout=15.0) as client:
             if method == "POST":
-                resp = await client.post(url, json=payload)
+                resp = await client.post(url, json=payload, headers=inject_trace())
             elif method == "GET":
-                resp = await client.get(url, params=payload)
+                resp = await client.get(url, params=payload, headers=inject_trace())
             else:
                 raise HTTPException(status_code=400, detail=f"unsupported method {method}")
 
@@ -208,4 +348,33 @@ async def call_agent(request: Request):
 # health / debug endpoint
 @app.get("/health")
 async def health():
-    return {"status":"ok", "weaviate": bool(get_weaviate_client() is not None)}
+    """Current state only: never connects to Weaviate, loads the model or opens the index."""
+    if VECTOR_BACKEND == "local":
+        return {"status": "ok", "vector_backend": "local",
+                "index": _local_index.stats() if _local_index is not None else None,
+                "embed_model": _embed_model is not None,
+                "embed_batcher": _embed_batcher.stats() if _embed_batcher is not None else None}
+    return {"status":"ok", "weaviate": _weaviate_client is not None, "embed_model": _embed_model is not None,
+            "embed_batcher": _embed_batcher.stats() if _embed_batcher is not None else None}
+
+
+@app.post("/index/changed")
+async def index_changed():
+    """Called after ingestion (tools/ingest_docs.py --notify): drop cached search results."""
+    version = bump_index_version()
+    log.info("Search index changed; result cache cleared (version %d)", version)
+    return {"index_version": version}
+
+
+@app.get("/debug/search_cache")
+async def search_cache():
+    """Hit rates and sizes of the query-embedding and search-result caches."""
+    return {"index_version": _index_version, "embeddings": _embed_cache.stats(), "results": _result_cache.stats(),
+            "search_paths": dict(_search_paths)}
+
+
+@app.get("/debug/pools")
+async def pools():
+    """Queue depth, active workers and utilization of the encode and vector I/O pools."""
+    return {"embed": embed_pool.stats(), "vector_io": io_pool.stats(),
+            "embed_batcher": _embed_batcher.stats() if _embed_batcher is not None else None}
@@ -0,0 +1,119 @@
+# mcp-servers/test_mock_mcp_cache.py
+import sys
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import mock_mcp
+from orchestrator.cache import TTLCache
+
+
+class FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kw):
+        self.encoded.extend([texts] if isinstance(texts, str) else texts)
+        return np.ones((len(texts), 3)) if not isinstance(texts, str) else np.ones(3)
+
+
+class FakeQuery:
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self
+
+    def do(self):
+        self.client.searches += 1
+        return {"data": {"Get": {"Document": [{"title": "doc1.txt", "text": f"v{self.client.searches}",
+                                               "_additional": {"id": "u1"}}]}}}
+
+
+class FakeClient:
+    def __init__(self):
+        self.searches = 0
+
+    @property
+    def query(self):
+        return FakeQuery(self)
+
+
+def test_repeat_searches_hit_both_caches_until_index_changes(monkeypatch):
+    model, client = FakeModel(), FakeClient()
+    monkeypatch.setattr(mock_mcp, "get_embed_model", lambda: model)
+    monkeypatch.setattr(mock_mcp, "get_weaviate_client", lambda: client)
+    monkeypatch.setattr(mock_mcp, "_embed_batcher", None)
+    monkeypatch.setattr(mock_mcp, "_embed_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(mock_mcp, "_result_cache", TTLCache(maxsize=8, ttl=60))
+    http = TestClient(mock_mcp.app)
+
+    first = http.post("/tool/search_docs", json={"query": "login 401", "k": 3}).json()
+    again = http.post("/tool/search_docs", json={"query": "login 401", "k": 3}).json()
+    assert first == again and client.searches == 1 and model.encoded == ["login 401"]
+
+    http.post("/tool/search_docs", json={"query": "login 401", "k": 5})  # new k: search, cached vector
+    assert client.searches == 2 and model.encoded == ["login 401"]
+
+    version = http.post("/index/changed").json()["index_version"]
+    fresh = http.post("/tool/search_docs", json={"query": "login 401", "k": 3}).json()
+    assert fresh != first and client.searches == 3 and model.encoded == ["login 401"]
+
+    stats = http.get("/debug/search_cache").json()
+    assert stats["index_version"] == version
+    assert stats["embeddings"]["hits"] == 2 and stats["results"]["hits"] == 1
+
+
+def test_local_backend_hybrid_search_and_lexical_shortcut(monkeypatch, tmp_path):
+    from mcp_common.vector_index import LocalVectorIndex
+
+    writer = LocalVectorIndex(str(tmp_path))
+    writer.add([{"id": "doc1.txt", "title": "doc1.txt", "text": "Users receive 401 after login."}], [[1.0, 1.0, 1.0]])
+    model = FakeModel()
+    monkeypatch.setattr(mock_mcp, "VECTOR_BACKEND", "local")
+    monkeypatch.setattr(mock_mcp, "SEARCH_MODE", "hybrid")
+    monkeypatch.setattr(mock_mcp, "VECTOR_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr(mock_mcp, "_local_index", None)
+    monkeypatch.setattr(mock_mcp, "get_embed_model", lambda: model)
+    monkeypatch.setattr(mock_mcp, "get_weaviate_client", None)  # must not be touched with the local backend
+    monkeypatch.setattr(mock_mcp, "_embed_batcher", None)
+    monkeypatch.setattr(mock_mcp, "_embed_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(mock_mcp, "_result_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(mock_mcp, "_search_paths", {"lexical": 0, "vector": 0, "hybrid": 0})
+    http = TestClient(mock_mcp.app)
+
+    results = http.post("/tool/search_docs", json={"query": "login problems", "k": 3}).json()["results"]
+    assert results == [{"id": "doc1.txt", "title": "doc1.txt", "snippet": "Users receive 401 after login."}]
+
+    writer.add([{"id": "doc2.txt", "title": "doc2.txt", "text": "Reset password."}], [[1.0, 1.0, 0.9]])
+    results = http.post("/tool/search_docs", json={"query": "login problems", "k": 3}).json()["results"]
+    assert [r["id"] for r in results] == ["doc1.txt", "doc2.txt"]  # new index version: not served from cache
+
+    # keyword query: answered by BM25 alone, never embedded
+    results = http.post("/tool/search_docs", json={"query": "401", "k": 3}).json()["results"]
+    assert [r["id"] for r in results] == ["doc1.txt"] and model.encoded == ["login problems"]
+    assert http.get("/debug/search_cache").json()["search_paths"] == {"lexical": 1, "vector": 0, "hybrid": 2}
+    assert http.get("/health").json()["index"]["count"] == 2
+
+
+def test_weaviate_down_does_not_hold_up_searches_and_health_does_not_connect(monkeypatch):
+    attempts = []
+
+    class DownWeaviate:
+        def Client(self, url):
+            attempts.append(url)
+            raise ConnectionError("connection refused")
+
+    monkeypatch.setitem(sys.modules, "weaviate", DownWeaviate())
+    monkeypatch.setattr(mock_mcp, "VECTOR_BACKEND", "weaviate")
+    monkeypatch.setattr(mock_mcp, "_weaviate_client", None)
+    monkeypatch.setattr(mock_mcp, "_weaviate_failed_at", None)
+    http = TestClient(mock_mcp.app)
+
+    assert http.get("/health").json()["weaviate"] is False and attempts == []
+    assert mock_mcp.get_weaviate_client() is None and mock_mcp.get_weaviate_client() is None
+    assert len(attempts) == 1  # not retried until INIT_RETRY_INTERVAL has passed
+
+    monkeypatch.setattr(mock_mcp, "_weaviate_failed_at", None)
+    with mock_mcp._weaviate_lock:  # another search is mid-connect: don't wait for it
+        assert mock_mcp.get_weaviate_client() is None and len(attempts) == 1
@@ -0,0 +1,122 @@
+# mcp_common/bm25.py
+"""
+In-memory inverted index with Okapi BM25 scoring, plus reciprocal rank fusion.
+
+Short keyword queries (error codes like "401", ticket ids like "TICKET-4821") are
+where MiniLM vectors are weakest and an exact lexical match is strongest, so
+search_docs and rag_agent fuse BM25 with vector results, and answer keyword-looking
+queries (is_keyword_query) from BM25 alone without embedding them at all.
+
+Documents are numbered by insertion order (row ids match LocalVectorIndex rows).
+add() is incremental: postings are appended, IDF and average length are computed
+at query time. Thread-safe (one lock; searches are sub-millisecond on docs-sized corpora).
+"""
+
+import math
+import re
+import threading
+from array import array
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_SPLIT = re.compile(r"[-_.]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or please the this to "
+    "what when where which who why with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words; compound ids ("ticket-4821") are kept whole and also split into parts."""
+    out = []
+    for tok in _WORD.findall(text.lower()):
+        parts = _SPLIT.split(tok)
+        if len(parts) > 1:
+            out.append(tok)
+        out.extend(p for p in parts if p and p not in _STOPWORDS)
+    return out
+
+
+def is_keyword_query(query: str, max_tokens: int = 3) -> bool:
+    """Short query containing an identifier-like token (digits), e.g. "401" or "ERR-4821 login"."""
+    tokens = [t for t in _WORD.findall(query.lower()) if t not in _STOPWORDS]
+    return 0 < len(tokens) <= max_tokens and any(any(c.isdigit() for c in t) for t in tokens)
+
+
+def rrf(rankings: Iterable[Sequence[Hashable]], k: int = RRF_K) -> List[Tuple[float, Hashable]]:
+    """Reciprocal rank fusion: score(d) = sum over rankings of 1 / (k + rank). Best first."""
+    scores: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(((s, item) for item, s in scores.items()), key=lambda x: -x[0])
+
+
+class BM25Index:
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._rows: Dict[str, array] = {}
+        self._tfs: Dict[str, array] = {}
+        self._lengths = array("i")
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, texts: Iterable[str]) -> int:
+        """Index texts as the next rows. Returns the new document count."""
+        with self._lock:
+            for text in texts:
+                row = len(self._lengths)
+                tokens = tokenize(text or "")
+                counts: Dict[str, int] = {}
+                for tok in tokens:
+                    counts[tok] = counts.get(tok, 0) + 1
+                for tok, tf in counts.items():
+                    if tok not in self._rows:
+                        self._rows[tok] = array("i")
+                        self._tfs[tok] = array("i")
+                    self._rows[tok].append(row)
+                    self._tfs[tok].append(tf)
+                self._lengths.append(len(tokens))
+                self._total_length += len(tokens)
+            return len(self._lengths)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[float, int]]:
+        """[(bm25 score, row)] for rows matching at least one query term, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._lengths)
+            if not n or not terms:
+                return []
+            lengths = np.array(self._lengths, dtype=np.float32)
+            avgdl = self._total_length / n or 1.0
+            scores = np.zeros(n, dtype=np.float32)
+            for term in terms:
+                rows = self._rows.get(term)
+                if rows is None:
+                    continue
+                rows = np.array(rows, dtype=np.int64)
+                tf = np.array(self._tfs[term], dtype=np.float32)
+                idf = math.log(1.0 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[rows] / avgdl)
+                scores[rows] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        best = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(float(scores[r]), int(r)) for r in best]
+
+    def stats(self) -> Dict[str, float]:
+        n = len(self._lengths)
+        return {"docs": n, "terms": len(self._rows), "avg_length": round(self._total_length / n, 2) if n else 0.0}
@@ -0,0 +1,115 @@
+# mcp_common/embed_batcher.py
+"""
+Micro-batching for query embeddings.
+
+Concurrent embed(text) calls are queued; a single worker collects them for up to
+max_wait_ms (or until max_batch texts are waiting), encodes the whole batch with one
+encode_fn(texts) call in an executor, and resolves each caller's future with its own
+vector. Identical texts in a batch are encoded once. While a batch is being encoded
+new requests keep queuing, so batches grow naturally under load. executor may be any
+object with an Executor-style submit() (e.g. a WorkerPool); None uses the loop default.
+"""
+
+import asyncio
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+EncodeFn = Callable[[List[str]], Sequence[Any]]
+
+
+class EmbedBatcher:
+    def __init__(self, encode_fn: EncodeFn, max_batch: int = EMBED_BATCH_MAX,
+                 max_wait_ms: float = EMBED_BATCH_WAIT_MS, executor: Optional[Any] = None):
+        self.encode_fn = encode_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = 0
+        self.batches = 0
+        self.encoded = 0
+        self.max_batch_seen = 0
+        self.errors = 0
+
+    async def embed(self, text: str) -> Any:
+        """Vector for one text, encoded together with whatever else arrives within the batch window."""
+        self._ensure_worker()
+        fut = self._loop.create_future()
+        self.requests += 1
+        await self._queue.put((text, fut))
+        return await fut
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            # first use, or a new event loop (tests, reloads): start a fresh queue + worker
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            live = [(t, f) for t, f in batch if not f.done()]  # skip callers that already gave up
+            if not live:
+                continue
+            texts = list(dict.fromkeys(t for t, _ in live))
+            self.batches += 1
+            self.encoded += len(texts)
+            self.max_batch_seen = max(self.max_batch_seen, len(live))
+            try:
+                vectors = await self._loop.run_in_executor(self.executor, self.encode_fn, texts)
+                by_text = dict(zip(texts, vectors))
+                for text, fut in live:
+                    if not fut.done():
+                        fut.set_result(by_text[text])
+            except Exception as e:
+                self.errors += 1
+                for _, fut in live:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    async def aclose(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "mean_batch": round(self.requests / self.batches, 2) if self.batches else None,
+            "max_batch_seen": self.max_batch_seen,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "errors": self.errors,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+        }
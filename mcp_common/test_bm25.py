@@ -0,0 +1,62 @@
+# orchestrator/test_bm25.py
+from mcp_common.bm25 import BM25Index, is_keyword_query, rrf, tokenize
+from mcp_common.vector_index import LocalVectorIndex
+
+DOCS = [
+    "Customer cannot login to account. They receive 401.",
+    "Password reset flow is buggy in module A.",
+    "TICKET-4821: login page returns 500 after the password reset.",
+    "Login login login: the login service overview.",
+]
+
+
+def test_tokenize_keeps_identifiers_and_detects_keyword_queries():
+    assert tokenize("TICKET-4821 fails with the 401") == ["ticket-4821", "ticket", "4821", "fails", "401"]
+    assert is_keyword_query("401") and is_keyword_query("TICKET-4821 status")
+    assert not is_keyword_query("why does login fail for customers") and not is_keyword_query("password reset")
+
+
+def test_bm25_ranks_rare_exact_terms_and_grows_incrementally():
+    index = BM25Index()
+    assert index.add(DOCS[:2]) == 2
+    assert [row for _, row in index.search("401")] == [0]
+    index.add(DOCS[2:])
+    assert [row for _, row in index.search("ticket-4821")] == [2]
+    assert index.search("password reset", k=2)[0][1] == 1  # shorter doc wins the tie on tf
+    assert index.search("login", k=1)[0][1] == 3 and index.search("nothing matches") == []
+    assert index.stats()["docs"] == 4
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = rrf([["a", "b", "c"], ["c", "a"]])
+    assert [item for _, item in fused] == ["a", "c", "b"]
+
+
+def test_hybrid_search_fuses_lexical_only_matches(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    # vectors deliberately ignore the ticket id: only BM25 can find doc 2 for "TICKET-4821"
+    index.add([{"id": str(i), "text": t} for i, t in enumerate(DOCS)],
+              [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0], [1.0, 0.1]])
+    assert [r["id"] for _, r in index.search([1.0, 0.0], k=2)] == ["0", "3"]
+    assert [r["id"] for _, r in index.lexical_search("TICKET-4821", k=3)] == ["2"]
+    fused = [r["id"] for _, r in index.hybrid_search("TICKET-4821", [1.0, 0.0], k=3)]
+    assert fused == ["2", "0", "3"]  # ranked last by vectors, first by BM25
+
+    reader = LocalVectorIndex(str(tmp_path))  # a fresh reader rebuilds BM25 from meta.jsonl
+    index.add([{"id": "4", "text": "ERR-77 quota exceeded"}], [[0.5, 0.5]])
+    reader.refresh()
+    assert len(reader.lexical) == 5 and reader.lexical_search("err-77")[0][1]["id"] == "4"
+
+
+def test_reader_rebuilds_bm25_when_index_is_rebuilt(tmp_path):
+    import shutil
+
+    LocalVectorIndex(str(tmp_path)).add([{"id": "old", "text": "ERR-1 legacy outage"}], [[1.0, 0.0]])
+    reader = LocalVectorIndex(str(tmp_path))
+    assert reader.lexical_search("err-1")[0][1]["id"] == "old"
+
+    shutil.rmtree(tmp_path)  # rebuilt with the same row count and version
+    LocalVectorIndex(str(tmp_path)).add([{"id": "new", "text": "ERR-2 fresh incident"}], [[0.0, 1.0]])
+    assert reader.refresh() and reader.version == 1
+    assert reader.lexical_search("legacy") == []
+    assert [r["id"] for _, r in reader.lexical_search("err-2")] == ["new"]
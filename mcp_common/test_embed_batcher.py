@@ -0,0 +1,62 @@
+# orchestrator/test_embed_batcher.py
+import asyncio
+
+import pytest
+
+from mcp_common.embed_batcher import EmbedBatcher
+
+
+def test_concurrent_queries_share_one_encode_call():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [[len(t), i] for i, t in enumerate(texts)]
+
+    batcher = EmbedBatcher(encode, max_batch=8, max_wait_ms=20)
+
+    async def go():
+        return await asyncio.gather(*(batcher.embed(q) for q in ["a", "bb", "a", "ccc"]))
+
+    vectors = asyncio.run(go())
+    assert calls == [["a", "bb", "ccc"]]  # one call, duplicates encoded once
+    assert [v[0] for v in vectors] == [1, 2, 1, 3] and vectors[0] == vectors[2]
+    st = batcher.stats()
+    assert st["batches"] == 1 and st["requests"] == 4 and st["max_batch_seen"] == 4
+
+
+def test_max_batch_splits_and_errors_reach_every_waiter():
+    sizes = []
+
+    def encode(texts):
+        sizes.append(len(texts))
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return [[0.0]] * len(texts)
+
+    batcher = EmbedBatcher(encode, max_batch=3, max_wait_ms=50)
+
+    async def go():
+        ok = await asyncio.gather(*(batcher.embed(f"q{i}") for i in range(7)))
+        bad = await asyncio.gather(batcher.embed("boom"), batcher.embed("x"), return_exceptions=True)
+        return ok, bad
+
+    ok, bad = asyncio.run(go())
+    assert len(ok) == 7 and sizes[:3] == [3, 3, 1]
+    assert all(isinstance(r, RuntimeError) for r in bad)
+    assert batcher.stats()["errors"] == 1
+
+
+def test_cancelled_caller_does_not_break_the_batch():
+    batcher = EmbedBatcher(lambda texts: [t.upper() for t in texts], max_batch=4, max_wait_ms=30)
+
+    async def go():
+        gone = asyncio.ensure_future(batcher.embed("gone"))
+        kept = asyncio.ensure_future(batcher.embed("kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await gone
+        return await kept
+
+    assert asyncio.run(go()) == "KEPT"
@@ -0,0 +1,72 @@
+# orchestrator/test_vector_index.py
+import numpy as np
+
+from mcp_common.vector_index import LocalVectorIndex, normalize
+
+
+def _corpus(n, dim=16, clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.2 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_exact_search_and_reader_sees_new_versions(tmp_path):
+    writer = LocalVectorIndex(str(tmp_path))
+    reader = LocalVectorIndex(str(tmp_path))
+    assert len(reader) == 0 and reader.search([1.0, 0.0], k=3) == []
+
+    writer.add([{"id": "x"}, {"id": "y"}], [[1.0, 0.0], [0.0, 2.0]], model="m")
+    assert reader.refresh() and not reader.refresh()
+    hits = reader.search([0.1, 1.0], k=5)
+    assert [rec["id"] for _, rec in hits] == ["y", "x"] and abs(hits[0][0] - 0.995) < 1e-3
+
+    writer.add([{"id": "z"}], [[-1.0, 0.0]], model="m")
+    reader.refresh()
+    assert reader.version == 2 and reader.search([-1.0, 0.1], k=1)[0][1]["id"] == "z"
+    assert reader.stats()["mode"] == "exact"
+
+
+def test_ivf_kicks_in_and_matches_exact_on_clustered_data(tmp_path):
+    data = _corpus(3000)
+    ivf = LocalVectorIndex(str(tmp_path / "ivf"), ivf_min_rows=1000, nprobe=16)
+    exact = LocalVectorIndex(str(tmp_path / "exact"), ivf_min_rows=10 ** 9)
+    for start in range(0, 3000, 500):  # incremental adds: assigned to existing lists, retrained on doubling
+        records = [{"id": str(i)} for i in range(start, start + 500)]
+        ivf.add(records, data[start:start + 500])
+        exact.add(records, data[start:start + 500])
+    assert ivf.stats()["mode"] == "ivf" and ivf.info["trained_at"] == 2000
+
+    queries = data[:50] + 0.05
+    recall = np.mean([len({r["id"] for _, r in ivf.search(q, 5)} & {r["id"] for _, r in exact.search(q, 5)}) / 5
+                      for q in queries])
+    assert recall > 0.9
+    truth = np.argsort(-(normalize(data) @ normalize(queries[0])[0]))[:5]
+    assert [r["id"] for _, r in exact.search(queries[0], 5)] == [str(i) for i in truth]
+
+
+def test_rows_past_the_published_count_are_discarded(tmp_path):
+    index = LocalVectorIndex(str(tmp_path))
+    index.add([{"id": "a"}], [[1.0, 0.0]])
+    with open(tmp_path / "vectors.f32", "ab") as f:  # a writer that crashed before publishing
+        f.write(np.ones(2, dtype=np.float32).tobytes())
+    with open(tmp_path / "meta.jsonl", "a") as f:
+        f.write('{"id": "ghost"}\n')
+    assert len(LocalVectorIndex(str(tmp_path))) == 1
+    index.add([{"id": "b"}], [[0.0, 1.0]])
+    assert [r["id"] for r in LocalVectorIndex(str(tmp_path)).meta] == ["a", "b"]
+
+
+def test_retrained_ivf_is_published_with_index_json(tmp_path):
+    data = _corpus(2000)
+    writer = LocalVectorIndex(str(tmp_path), ivf_min_rows=500)
+    for start in range(0, 2000, 500):  # trained at 500, 1000 and 2000 rows
+        writer.add([{"id": str(i)} for i in range(start, start + 500)], data[start:start + 500])
+    assert writer.info["trained_at"] == 2000
+    ivf_files = sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("ivf."))
+    assert ivf_files == ["ivf.2.i32", "ivf.2.npy", "ivf.4.i32", "ivf.4.npy"]  # current + previous generation
+
+    writer._train(dict(writer.info, version=5))  # new IVF files written, index.json not yet replaced
+    reader = LocalVectorIndex(str(tmp_path))
+    centroids = reader._snapshot[2]
+    assert reader.info["ivf"] == 4 and len(centroids) == reader.info["nlist"]
+    assert reader.search(data[7], k=1)[0][1]["id"] == "7"
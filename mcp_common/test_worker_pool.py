@@ -0,0 +1,60 @@
+# orchestrator/test_worker_pool.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp_common.embed_batcher import EmbedBatcher
+from mcp_common.worker_pool import WorkerPool
+
+
+def test_blocking_work_does_not_stall_the_loop_and_is_counted():
+    pool = WorkerPool("t", workers=2)
+    release = threading.Event()
+
+    def blocking(x):
+        release.wait(2)
+        return x * 2
+
+    async def go():
+        jobs = [asyncio.ensure_future(pool.run(blocking, i)) for i in range(3)]
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.05)  # the loop keeps running while workers block
+        ticked = time.perf_counter() - t0
+        mid = pool.stats()
+        release.set()
+        return ticked, mid, await asyncio.gather(*jobs)
+
+    ticked, mid, results = asyncio.run(go())
+    assert ticked < 0.5 and results == [0, 2, 4]
+    assert mid["active"] == 2 and mid["queued"] == 1 and mid["max_queued"] >= 1
+    st = pool.stats()
+    assert st["completed"] == 3 and st["active"] == 0 and st["queued"] == 0 and st["utilization"] > 0
+    pool.shutdown()
+
+
+def test_failures_cancellation_and_batcher_executor():
+    pool = WorkerPool("t", workers=1)
+    gate = threading.Event()
+
+    def boom():
+        raise ValueError("bad")
+
+    async def go():
+        with pytest.raises(ValueError):
+            await pool.run(boom)
+        busy = asyncio.ensure_future(pool.run(gate.wait, 2))
+        waiting = asyncio.ensure_future(pool.run(time.sleep, 0))
+        await asyncio.sleep(0.02)
+        waiting.cancel()  # never started: leaves the queue
+        await asyncio.sleep(0)
+        gate.set()
+        await busy
+        batcher = EmbedBatcher(lambda texts: [len(t) for t in texts], max_wait_ms=0, executor=pool)
+        return await batcher.embed("abc")
+
+    assert asyncio.run(go()) == 3
+    st = pool.stats()
+    assert st["failed"] == 1 and st["queued"] == 0 and st["completed"] == 2
+    pool.shutdown()
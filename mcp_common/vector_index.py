@@ -0,0 +1,294 @@
+# mcp_common/vector_index.py
+"""
+Embedded vector index: single-node retrieval without an external Weaviate.
+
+On-disk layout (one directory, VECTOR_INDEX_PATH):
+
+    vectors.f32   row-major float32 matrix (count x dim), L2-normalised, memory-mapped
+    meta.jsonl    one JSON record per row ({"id", "title", "text", "source"})
+    ivf.<g>.i32   inverted-list id per row (only once an IVF has been trained)
+    ivf.<g>.npy   IVF centroids (nlist x dim)
+    index.json    {"dim", "count", "version", "model", "nlist", "ivf", "trained_at", "created"};
+                  written last (atomic replace), so readers never see rows that are only half
+                  written. "ivf" is the generation <g> of the IVF files: a retrain writes new
+                  files and the same replace publishes them, so a reader never pairs new
+                  centroids with an old nlist / count. The previous generation is kept for
+                  readers still loading it; older ones are deleted.
+
+Search is cosine similarity. Below VECTOR_IVF_MIN_ROWS rows it is an exact NumPy scan
+(a matrix-vector product over the memmap + argpartition). Above that, rows are
+clustered with k-means into ~4*sqrt(n) lists and a query scans only the
+VECTOR_IVF_NPROBE closest lists (approximate). New rows are appended and assigned to
+the nearest existing centroid; the clustering is retrained when the corpus has doubled.
+
+lexical_search() / hybrid_search() add BM25 over the records' text (mcp_common/bm25.py),
+fused with the vector candidates by reciprocal rank fusion.
+
+Single writer (tools/ingest_docs.py), any number of readers: readers call refresh()
+(cheap stat of index.json) and remap when the version changed. An index rebuilt from
+scratch in the same directory (new "created" stamp / vectors.f32 inode, or a lower
+version) also resets the reader's BM25 index instead of extending it.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bm25 import BM25Index, rrf
+
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate").lower()  # weaviate | local
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
+VECTOR_IVF_MIN_ROWS = int(os.getenv("VECTOR_IVF_MIN_ROWS", "20000"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+
+_VECTORS = "vectors.f32"
+_META = "meta.jsonl"
+_ASSIGN = "ivf.{}.i32"
+_CENTROIDS = "ivf.{}.npy"
+_INFO = "index.json"
+
+
+def normalize(vectors: Any) -> np.ndarray:
+    arr = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return arr / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def kmeans(data: np.ndarray, nlist: int, iters: int = 10, seed: int = 0, sample: int = 50000) -> np.ndarray:
+    """Spherical k-means centroids (unit length) trained on a sample of the rows."""
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    train = data[np.sort(rng.choice(n, size=min(n, sample), replace=False))] if n > sample else np.asarray(data)
+    nlist = min(nlist, len(train))
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]  # reseed empty lists
+        centroids = normalize(sums)
+    return centroids
+
+
+def assign_lists(data: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    out = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), chunk):
+        out[start:start + chunk] = np.argmax(np.asarray(data[start:start + chunk]) @ centroids.T, axis=1)
+    return out
+
+
+class LocalVectorIndex:
+    def __init__(self, path: str = VECTOR_INDEX_PATH, ivf_min_rows: int = VECTOR_IVF_MIN_ROWS,
+                 nprobe: int = VECTOR_IVF_NPROBE):
+        self.path = path
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._lock = threading.Lock()
+        self._info_mtime: Optional[Tuple[int, int]] = None
+        self.info: Dict[str, Any] = {"dim": 0, "count": 0, "version": 0, "model": None, "nlist": 0, "trained_at": 0}
+        # (vectors, meta, centroids, list order, list offsets), swapped as one so a search
+        # running on another thread never mixes two versions
+        self._snapshot: Tuple[Any, ...] = (np.empty((0, 0), dtype=np.float32), [], None, None, None)
+        # BM25 over the records' text, extended incrementally with the rows each refresh adds
+        self.lexical = BM25Index()
+        self._origin: Optional[Tuple[Any, Any]] = None  # (info["created"], vectors.f32 inode) BM25 was built from
+        self.refresh()
+
+    # ---- reading ----
+
+    @property
+    def version(self) -> int:
+        return self.info["version"]
+
+    @property
+    def meta(self) -> List[Dict[str, Any]]:
+        return self._snapshot[1]
+
+    def __len__(self) -> int:
+        return self.info["count"]
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def refresh(self) -> bool:
+        """Remap if a writer published a new version. Returns True when reloaded."""
+        try:
+            st = os.stat(self._file(_INFO))
+        except FileNotFoundError:
+            return False
+        mtime = (st.st_ino, st.st_mtime_ns)  # index.json is replaced, never rewritten in place
+        if mtime == self._info_mtime:
+            return False
+        with self._lock:
+            if mtime == self._info_mtime:
+                return False
+            with open(self._file(_INFO), "r", encoding="utf-8") as f:
+                info = json.load(f)
+            count, dim = info["count"], info["dim"]
+            vectors = (np.memmap(self._file(_VECTORS), dtype=np.float32, mode="r", shape=(count, dim))
+                       if count else np.empty((0, dim), dtype=np.float32))
+            meta = []
+            with open(self._file(_META), "r", encoding="utf-8") as f:
+                for line in f:
+                    if len(meta) == count:
+                        break
+                    meta.append(json.loads(line))
+            centroids = order = offsets = None
+            if info.get("nlist"):
+                try:
+                    centroids = np.load(self._file(_CENTROIDS.format(info["ivf"])))
+                    assign = np.fromfile(self._file(_ASSIGN.format(info["ivf"])), dtype=np.int32, count=count)
+                except FileNotFoundError:
+                    return False  # retrained twice since index.json was read: pick up the newer one next time
+                order = np.argsort(assign, kind="stable")
+                offsets = np.searchsorted(assign[order], np.arange(info["nlist"] + 1))
+            try:
+                origin = (info.get("created"), os.stat(self._file(_VECTORS)).st_ino)
+            except FileNotFoundError:
+                origin = (info.get("created"), None)
+            if origin != self._origin or info["version"] < self.info["version"] or len(self.lexical) > count:
+                self.lexical = BM25Index()  # first load, or the index was rebuilt from scratch
+                self._origin = origin
+            self.lexical.add(rec.get("text", "") for rec in meta[len(self.lexical):])
+            self._snapshot = (vectors, meta, centroids, order, offsets)
+            self.info = info
+            self._info_mtime = mtime
+            return True
+
+    def _vector_rows(self, snapshot: Tuple[Any, ...], query: Sequence[float], k: int,
+                     nprobe: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        vectors, _, centroids, order, offsets = snapshot
+        q = normalize(query)[0]
+        if centroids is None:
+            rows = top_k(vectors @ q, k)
+            return rows, np.asarray(vectors[rows] @ q)
+        lists = top_k(centroids @ q, nprobe or self.nprobe)
+        candidates = np.sort(np.concatenate([order[offsets[i]:offsets[i + 1]] for i in lists]))
+        cand_scores = np.asarray(vectors[candidates] @ q)
+        best = top_k(cand_scores, k)
+        return candidates[best], cand_scores[best]
+
+    def search(self, query: Sequence[float], k: int = 3, nprobe: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """[(cosine score, metadata record)], best first."""
+        snapshot = self._snapshot
+        meta = snapshot[1]
+        if not len(meta):
+            return []
+        rows, scores = self._vector_rows(snapshot, query, k, nprobe)
+        return [(float(s), meta[int(r)]) for s, r in zip(scores, rows)]
+
+    def lexical_search(self, query: str, k: int = 3) -> List[Tuple[float, Dict[str, Any]]]:
+        """[(BM25 score, metadata record)], best first; no embedding needed."""
+        meta = self._snapshot[1]
+        return [(score, meta[row]) for score, row in self.lexical.search(query, k) if row < len(meta)]
+
+    def hybrid_search(self, query: str, vector: Sequence[float], k: int = 3, candidates: Optional[int] = None,
+                      nprobe: Optional[int] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """Vector and BM25 top candidates fused with reciprocal rank fusion: [(rrf score, record)]."""
+        snapshot = self._snapshot
+        meta = snapshot[1]
+        if not len(meta):
+            return []
+        n = candidates or max(4 * k, 20)
+        vector_rows, _ = self._vector_rows(snapshot, vector, n, nprobe)
+        lexical_rows = [row for _, row in self.lexical.search(query, n) if row < len(meta)]
+        fused = rrf([[int(r) for r in vector_rows], lexical_rows])[:k]
+        return [(score, meta[row]) for score, row in fused]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "count": len(self), "dim": self.info["dim"], "version": self.version,
+                "mode": "ivf" if self._snapshot[2] is not None else "exact", "nlist": self.info.get("nlist", 0),
+                "nprobe": self.nprobe, "model": self.info.get("model"), "lexical": self.lexical.stats()}
+
+    # ---- writing (single writer) ----
+
+    def add(self, records: List[Dict[str, Any]], vectors: Any, model: Optional[str] = None) -> int:
+        """Append rows and publish a new version. Returns the new row count."""
+        vecs = normalize(vectors)
+        if len(records) != len(vecs):
+            raise ValueError(f"{len(records)} records but {len(vecs)} vectors")
+        self.refresh()
+        info = dict(self.info)
+        if info["count"] and vecs.shape[1] != info["dim"]:
+            raise ValueError(f"vector dim {vecs.shape[1]} does not match index dim {info['dim']}")
+        if model and info.get("model") and model != info["model"]:
+            raise ValueError(f"index was built with {info['model']}, not {model}")
+        os.makedirs(self.path, exist_ok=True)
+        if not info["count"]:
+            info["created"] = time.time_ns()
+        self._truncate_to(info)
+        with open(self._file(_VECTORS), "ab") as f:
+            f.write(vecs.astype("<f4").tobytes())
+        with open(self._file(_META), "a", encoding="utf-8") as f:
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        count = info["count"] + len(vecs)
+        info.update(dim=int(vecs.shape[1]), count=count, version=info["version"] + 1, model=model or info.get("model"))
+
+        if count >= self.ivf_min_rows and count >= 2 * max(info.get("trained_at", 0), 1):
+            self._train(info)
+        elif info.get("nlist"):
+            # rows past the published count are ignored by readers, so appending in place is safe
+            with open(self._file(_ASSIGN.format(info["ivf"])), "ab") as f:
+                f.write(assign_lists(vecs, np.load(self._file(_CENTROIDS.format(info["ivf"])))).tobytes())
+        previous = self.info.get("ivf")
+        self._publish(info)
+        self._drop_ivf_except(info.get("ivf"), previous)
+        return count
+
+    def _truncate_to(self, info: Dict[str, Any]):
+        """Drop bytes a crashed writer appended past the published row count."""
+        files = [(_VECTORS, 4 * info["dim"])]
+        if info.get("nlist"):
+            files.append((_ASSIGN.format(info["ivf"]), 4))
+        for name, row_bytes in files:
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > info["count"] * row_bytes:
+                os.truncate(path, info["count"] * row_bytes)
+        if os.path.exists(self._file(_META)):
+            with open(self._file(_META), "r+", encoding="utf-8") as f:
+                for _ in range(info["count"]):
+                    f.readline()
+                f.truncate(f.tell())
+
+    def _train(self, info: Dict[str, Any]):
+        count, dim = info["count"], info["dim"]
+        data = np.memmap(self._file(_VECTORS), dtype=np.float32, mode="r", shape=(count, dim))
+        nlist = max(1, min(count, int(4 * np.sqrt(count))))
+        centroids = kmeans(data, nlist)
+        # new generation of files; readers keep using the old ones until index.json points here
+        generation = info["version"]
+        np.save(self._file(_CENTROIDS.format(generation)), centroids)
+        assign_lists(data, centroids).tofile(self._file(_ASSIGN.format(generation)))
+        info.update(nlist=len(centroids), ivf=generation, trained_at=count)
+
+    def _drop_ivf_except(self, *generations: Any):
+        keep = {name.format(g) for g in generations if g is not None for name in (_ASSIGN, _CENTROIDS)}
+        for name in os.listdir(self.path):
+            if name.startswith("ivf.") and name not in keep:
+                try:
+                    os.remove(self._file(name))
+                except FileNotFoundError:
+                    pass
+
+    def _publish(self, info: Dict[str, Any]):
+        tmp = self._file(f"{_INFO}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+        os.replace(tmp, self._file(_INFO))
+        self.refresh()
@@ -0,0 +1,92 @@
+# mcp_common/worker_pool.py
+"""
+Instrumented thread pool for blocking work called from async handlers.
+
+WorkerPool.run(fn, *args) awaits fn in a dedicated ThreadPoolExecutor so the event
+loop keeps serving other requests. Threads suit the blocking calls we offload:
+torch / numpy release the GIL during encode, and vector-store clients block on
+sockets. stats() reports queue depth (submitted but not yet started), active
+workers and utilization (busy worker-seconds / available worker-seconds).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class WorkerPool:
+    def __init__(self, name: str, workers: Optional[int] = None):
+        self.name = name
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Executor-compatible submit, so the pool can be passed to loop.run_in_executor."""
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self.executor.submit(self._call, time.monotonic(), fn, args, kwargs)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        if future.cancelled():  # caller gave up before a worker picked it up
+            with self._lock:
+                self.queued -= 1
+
+    def _call(self, submitted_at: float, fn, args, kwargs):
+        started = time.monotonic()
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_s += started - submitted_at
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.busy_s += time.monotonic() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def shutdown(self, wait: bool = False):
+        self.executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            uptime = max(time.monotonic() - self.started_at, 1e-9)
+            done = self.completed + self.failed
+            return {
+                "workers": self.workers,
+                "active": self.active,
+                "queued": self.queued,
+                "max_queued": self.max_queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "utilization": round(self.busy_s / (self.workers * uptime), 4),
+                "mean_wait_ms": round(self.wait_s / done * 1000.0, 3) if done else None,
+                "mean_run_ms": round(self.busy_s / done * 1000.0, 3) if done else None,
+            }
@@ -0,0 +1,306 @@
+# orchestrator/agent_index.py
+"""
+In-memory vector index over agent manifests, used to shortlist agents before
+discover_and_plan so the discovery prompt carries only the top-k relevant agents
+instead of the whole registry.
+
+Each manifest's id, name, description and tools are embedded once (at startup,
+on /register, or the first time /chat/plan sees it) and re-embedded only when that
+text changes. Embedders (AGENT_INDEX_EMBEDDER):
+  - auto                  : sentence-transformers if installed, else hashing (default)
+  - hashing               : dependency-free hashed bag-of-words
+  - sentence-transformers : EMBED_MODEL via sentence_transformers (hashing if not installed)
+
+When no agent clears the similarity threshold the shortlist falls back to the top-k
+by score, and to the first k agents when nothing matches at all: the planner never gets
+an empty registry, nor more than k agents.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+AGENT_SHORTLIST_ENABLED = os.getenv("AGENT_SHORTLIST_ENABLED", "true").lower() in ("1", "true", "yes")
+AGENT_SHORTLIST_K = int(os.getenv("AGENT_SHORTLIST_K", "8"))
+AGENT_SHORTLIST_THRESHOLD = float(os.getenv("AGENT_SHORTLIST_THRESHOLD", "0.05"))
+AGENT_INDEX_EMBEDDER = os.getenv("AGENT_INDEX_EMBEDDER", "auto").lower()
+AGENT_INDEX_DIM = int(os.getenv("AGENT_INDEX_DIM", "2048"))
+EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+Vector = Dict[int, float]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or please the this to "
+    "what when where which who with you your".split()
+)
+
+
+def _tokens(text: str) -> List[str]:
+    out = []
+    for tok in _TOKEN.findall(text.lower()):
+        if tok in _STOPWORDS:
+            continue
+        # crude plural folding so "emails" matches "email"
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        out.append(tok)
+    return out
+
+
+def _normalize(vec: Vector) -> Vector:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {i: v / norm for i, v in vec.items()} if norm else {}
+
+
+class HashingEmbedder:
+    """Sublinear-tf hashed unigrams + bigrams, L2-normalized. Deterministic across processes."""
+    name = "hashing"
+    heavy = False
+
+    def __init__(self, dim: int = AGENT_INDEX_DIM):
+        self.dim = max(16, int(dim))
+
+    def _feature(self, term: str) -> int:
+        return zlib.crc32(term.encode("utf-8")) % self.dim
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        vectors = []
+        for text in texts:
+            toks = _tokens(text)
+            counts: Dict[int, float] = {}
+            for term in toks + [f"{a} {b}" for a, b in zip(toks, toks[1:])]:
+                f = self._feature(term)
+                counts[f] = counts.get(f, 0.0) + 1.0
+            vectors.append(_normalize({f: 1.0 + math.log(c) for f, c in counts.items()}))
+        return vectors
+
+
+class SentenceTransformerEmbedder:
+    name = "sentence-transformers"
+    heavy = True  # run off the event loop
+
+    def __init__(self, model_name: str = EMBED_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name)
+
+    def embed(self, texts: List[str]) -> List[Vector]:
+        rows = self._model.encode(texts, normalize_embeddings=True)
+        return [{i: float(v) for i, v in enumerate(row)} for row in rows]
+
+
+def make_embedder(kind: str = AGENT_INDEX_EMBEDDER):
+    if kind in ("auto", "sentence-transformers", "sentence_transformers", "st"):
+        try:
+            return SentenceTransformerEmbedder()
+        except ImportError as e:
+            if kind != "auto":
+                print(f"[orchestrator] warning: sentence-transformers embedder unavailable ({e}); using hashing embedder")
+        except Exception as e:
+            print(f"[orchestrator] warning: sentence-transformers embedder unavailable ({e}); using hashing embedder")
+    return HashingEmbedder()
+
+
+def _flatten(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [s for v in value for s in _flatten(v)]
+    return [str(value)]
+
+
+def agent_text(manifest: Dict[str, Any]) -> str:
+    """Text embedded for an agent: id, name, description and tool names."""
+    parts = [str(manifest.get("id") or ""), str(manifest.get("name") or "")]
+    parts += _flatten(manifest.get("description"))
+    tools = _flatten(manifest.get("allowed_tools"))
+    if tools:
+        parts.append("tools: " + " ".join(tools))
+    return "\n".join(p for p in parts if p)
+
+
+def _dot(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+class AgentIndex:
+    def __init__(self, embedder=None, k: int = AGENT_SHORTLIST_K, threshold: float = AGENT_SHORTLIST_THRESHOLD):
+        self._embedder = embedder
+        self.k = int(k)
+        self.threshold = float(threshold)
+        # agent id -> (text digest, vector)
+        self._vectors: Dict[str, Tuple[str, Vector]] = {}
+        self.rebuilds = 0
+        self.embedded = 0
+        self.reused = 0
+        self.last_sync_ms: Optional[float] = None
+        self.last_sync_at: Optional[float] = None
+        self.queries = 0
+        self.last_query: Optional[Dict[str, Any]] = None
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = make_embedder()
+        return self._embedder
+
+    async def _load_embedder(self):
+        # loading a sentence-transformers model takes seconds: keep it off the event loop
+        if self._embedder is None:
+            embedder = await asyncio.to_thread(make_embedder)
+            if self._embedder is None:
+                self._embedder = embedder
+        return self._embedder
+
+    # ---------- maintenance ----------
+    def _stale(self, agents: List[Dict[str, Any]]) -> List[Tuple[str, str, str]]:
+        todo = []
+        for ag in agents:
+            aid = ag.get("id")
+            if not aid:
+                continue
+            text = agent_text(ag)
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            current = self._vectors.get(aid)
+            if current is None or current[0] != digest:
+                todo.append((aid, digest, text))
+        return todo
+
+    def _apply(self, todo: List[Tuple[str, str, str]], vectors: List[Vector]):
+        for (aid, digest, _), vec in zip(todo, vectors):
+            self._vectors[aid] = (digest, vec)
+        self.embedded += len(todo)
+
+    def upsert(self, agents: List[Dict[str, Any]]) -> int:
+        """Embed new or changed agents; returns how many were (re)embedded."""
+        todo = self._stale(agents)
+        if todo:
+            self._apply(todo, self.embedder.embed([t[2] for t in todo]))
+        return len(todo)
+
+    def remove(self, agent_id: str):
+        self._vectors.pop(agent_id, None)
+
+    def sync(self, agents: List[Dict[str, Any]]) -> int:
+        """Make the index mirror `agents` exactly (drops agents no longer registered)."""
+        started = time.perf_counter()
+        live = {ag.get("id") for ag in agents if ag.get("id")}
+        for aid in [a for a in self._vectors if a not in live]:
+            del self._vectors[aid]
+        changed = self.upsert(agents)
+        self._record_sync(started, len(live), changed)
+        return changed
+
+    async def upsert_async(self, agents: List[Dict[str, Any]]) -> int:
+        """upsert() with model inference moved off the event loop for heavy embedders."""
+        if not (await self._load_embedder()).heavy:
+            return self.upsert(agents)
+        todo = self._stale(agents)
+        if todo:
+            self._apply(todo, await asyncio.to_thread(self.embedder.embed, [t[2] for t in todo]))
+        return len(todo)
+
+    async def sync_async(self, agents: List[Dict[str, Any]]) -> int:
+        """Async sync(); used at startup."""
+        started = time.perf_counter()
+        live = {ag.get("id") for ag in agents if ag.get("id")}
+        for aid in [a for a in self._vectors if a not in live]:
+            del self._vectors[aid]
+        changed = await self.upsert_async(agents)
+        self._record_sync(started, len(live), changed)
+        return changed
+
+    def _record_sync(self, started: float, size: int, changed: int):
+        if changed:
+            self.rebuilds += 1
+        self.reused += size - changed
+        self.last_sync_ms = round((time.perf_counter() - started) * 1000, 3)
+        self.last_sync_at = time.time()
+
+    # ---------- queries ----------
+    def _query_vector(self, query: str) -> Vector:
+        return self.embedder.embed([query])[0]
+
+    def _rank(self, query: str, candidates: Optional[set] = None) -> List[Tuple[str, float]]:
+        qv = self._query_vector(query)
+        scored = [(aid, _dot(qv, vec)) for aid, (_, vec) in self._vectors.items()
+                  if candidates is None or aid in candidates]
+        scored.sort(key=lambda s: s[1], reverse=True)
+        return scored
+
+    def search(self, query: str, k: Optional[int] = None, threshold: Optional[float] = None,
+               candidates: Optional[set] = None) -> List[Tuple[str, float]]:
+        k = self.k if k is None else k
+        threshold = self.threshold if threshold is None else threshold
+        return [s for s in self._rank(query, candidates) if s[1] >= threshold][:k]
+
+    async def shortlist(self, agents: List[Dict[str, Any]], prompt: str,
+                        messages: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k agents (by similarity to the prompt and recent user turns) in registry order.
+        Registries no larger than k are returned unchanged. If no agent clears the threshold,
+        the top-k by score are used; if none scores above zero, the first k agents are returned.
+        """
+        if len(agents) <= self.k:
+            return agents
+        # upsert, not sync: callers may pass a filtered subset (e.g. healthy agents only)
+        await self.upsert_async(agents)
+        candidates = {ag.get("id") for ag in agents}
+        query = " ".join([prompt or ""] + [str(m.get("content", "")) for m in (messages or [])[-2:]
+                                            if isinstance(m, dict) and m.get("role", "user") == "user"])
+        started = time.perf_counter()
+        if self.embedder.heavy:
+            ranked = await asyncio.to_thread(self._rank, query, candidates)
+        else:
+            ranked = self._rank(query, candidates)
+        hits = [s for s in ranked if s[1] >= self.threshold][:self.k]
+        fallback = None
+        if not hits:
+            # nothing cleared the threshold: best-scoring agents, or the first k if nothing matched
+            hits = [s for s in ranked if s[1] > 0][:self.k]
+            fallback = "top_k" if hits else "first_k"
+            if not hits:
+                hits = [(ag.get("id"), 0.0) for ag in agents[:self.k]]
+        self.queries += 1
+        self.last_query = {
+            "candidates": len(agents),
+            "selected": [{"id": aid, "score": round(score, 4)} for aid, score in hits],
+            "fallback": fallback,
+            "search_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        keep = {aid for aid, _ in hits}
+        return [ag for ag in agents if ag.get("id") in keep]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": AGENT_SHORTLIST_ENABLED,
+            "embedder": getattr(self._embedder, "name", AGENT_INDEX_EMBEDDER),
+            "size": len(self._vectors),
+            "k": self.k,
+            "threshold": self.threshold,
+            "rebuilds": self.rebuilds,
+            "embedded": self.embedded,
+            "reused": self.reused,
+            "last_sync_ms": self.last_sync_ms,
+            "last_sync_at": self.last_sync_at,
+            "queries": self.queries,
+            "last_query": self.last_query,
+        }
+
+
+_index: Optional[AgentIndex] = None
+
+
+def get_agent_index() -> AgentIndex:
+    global _index
+    if _index is None:
+        _index = AgentIndex()
+    return _index
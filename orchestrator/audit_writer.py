@@ -0,0 +1,346 @@
+# orchestrator/audit_writer.py
+"""
+Background, batched audit writer.
+
+/execute used to await the registry canister's write_audit_async inline, which puts an
+update call (consensus latency, seconds) on the user-facing path. Receipts are now
+queued and a background task flushes them in batches:
+
+  - one write_audit_batch_async(records) call per batch when the registry has it (the
+    mock registry; the deployed canister would need a write_audit_batch method), otherwise
+    one write_audit_async(manifest_id, user, receipt) per record, issued concurrently
+    (at most AUDIT_WRITE_CONCURRENCY in flight)
+  - failed writes are retried with exponential backoff; with per-record writes only the
+    records that failed are retried
+  - every record is appended to a local JSONL journal in submit(), before it is queued
+    (write-ahead), so a crash loses nothing; the journal is replayed on the next start
+  - once a batch is confirmed written its records are dropped from the journal: the
+    file is removed when nothing is outstanding, and otherwise rewritten without the
+    confirmed records once they make up at least half of it
+  - records that cannot be kept in memory (queue full, retries exhausted, shutdown
+    with the registry unreachable) simply stay in the journal until the next start
+
+Delivery is at-least-once: a batch that timed out but did land, or one confirmed just
+before a crash (before the journal was compacted), may be written again.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .metrics import STAGE_SECONDS, ERRORS
+
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "50"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_QUEUE_MAX = int(os.getenv("AUDIT_QUEUE_MAX", "10000"))
+AUDIT_MAX_RETRIES = int(os.getenv("AUDIT_MAX_RETRIES", "5"))
+AUDIT_RETRY_BASE = float(os.getenv("AUDIT_RETRY_BASE", "0.5"))
+AUDIT_RETRY_MAX = float(os.getenv("AUDIT_RETRY_MAX", "30"))
+AUDIT_SHUTDOWN_TIMEOUT = float(os.getenv("AUDIT_SHUTDOWN_TIMEOUT", "10"))
+AUDIT_WRITE_CONCURRENCY = int(os.getenv("AUDIT_WRITE_CONCURRENCY", "16"))
+AUDIT_JOURNAL_PATH = os.getenv("AUDIT_JOURNAL_PATH", str(os.path.join(os.path.dirname(__file__), "audit_journal.jsonl")))
+# fsync each journal append (survives an OS crash, not just a process crash; one disk sync per receipt)
+AUDIT_JOURNAL_FSYNC = os.getenv("AUDIT_JOURNAL_FSYNC", "false").lower() in ("1", "true", "yes")
+
+
+class AuditWriter:
+    """
+    Queue + batching worker in front of the registry's audit methods.
+    get_registry is called per flush so the registry can be swapped (startup, tests).
+    """
+
+    def __init__(self, get_registry: Callable[[], Any],
+                 batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL,
+                 queue_max: int = AUDIT_QUEUE_MAX,
+                 max_retries: int = AUDIT_MAX_RETRIES,
+                 retry_base: float = AUDIT_RETRY_BASE,
+                 retry_max: float = AUDIT_RETRY_MAX,
+                 write_concurrency: int = AUDIT_WRITE_CONCURRENCY,
+                 journal_path: Optional[str] = AUDIT_JOURNAL_PATH,
+                 journal_fsync: bool = AUDIT_JOURNAL_FSYNC):
+        self.get_registry = get_registry
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.queue_max = max(1, int(queue_max))
+        self.max_retries = int(max_retries)
+        self.retry_base = float(retry_base)
+        self.retry_max = float(retry_max)
+        self.write_concurrency = max(1, int(write_concurrency))
+        self.journal_path = journal_path
+        self.journal_fsync = journal_fsync
+        # a deque (not asyncio.Queue) so pending records survive a change of event loop
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._inflight: List[Dict[str, Any]] = []
+        self._journal_lock = threading.Lock()
+        self._journal_file = None
+        self._ids = f"{os.getpid()}-{os.urandom(4).hex()}"
+        self._next = 0
+        self._acked: Set[str] = set()  # confirmed, but still in the journal until it is compacted
+        self._parked = 0  # records held only in the journal (not in memory) until the next start
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.journaled = 0
+        self.replayed = 0
+        self.compactions = 0
+        self.last_error: Optional[str] = None
+
+    # ---------- producer side ----------
+    def submit(self, manifest_id: str, user: str, receipt: Any):
+        """Journal and queue one receipt; never blocks on the registry."""
+        self._next += 1
+        record = {"id": f"{self._ids}-{self._next}", "manifest_id": manifest_id, "user": user,
+                  "receipt": receipt, "ts": time.time()}
+        self.submitted += 1
+        self._append_journal([record])
+        if len(self._pending) >= self.queue_max:
+            self._park([record])
+            return
+        self._pending.append(record)
+        self._ensure_worker()
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        """Start the worker on the running loop and re-queue anything left in the journal."""
+        self._replay_journal()
+        self._ensure_worker()
+
+    def _ensure_worker(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet; the next submit/start from async code starts the worker
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    # ---------- worker ----------
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+            if len(self._pending) < self.batch_size:
+                # give the batch a moment to fill before paying for a canister call
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._flush_once()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popleft())
+        return batch
+
+    async def _flush_once(self):
+        self._inflight = self._take_batch()
+        if not self._inflight:
+            return
+        attempt = 0
+        while True:
+            with STAGE_SECONDS.labels("audit_write").time():
+                failed, error = await self._write(self._inflight)
+            failed_ids = {r["id"] for r in failed}
+            written = [r for r in self._inflight if r["id"] not in failed_ids]
+            if written:
+                self.written += len(written)
+                await self._confirm(written)
+            # only what failed is retried (or interrupted and re-queued by aclose)
+            self._inflight = failed
+            if not failed:
+                self.batches += 1
+                break
+            self.last_error = str(error)
+            ERRORS.labels("audit_write").inc()
+            attempt += 1
+            if attempt > self.max_retries:
+                print(f"[orchestrator] warning: {len(failed)} audit records failed after {attempt} attempts ({error}); journaling")
+                self._park(failed)
+                break
+            self.retries += 1
+            await asyncio.sleep(min(self.retry_max, self.retry_base * (2 ** (attempt - 1))))
+        self._inflight = []
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[Exception]]:
+        """Write a batch; returns (records that failed, last error)."""
+        registry = self.get_registry()
+        if registry is None:
+            return batch, RuntimeError("registry not initialized")
+        if hasattr(registry, "write_audit_batch_async"):
+            try:
+                await registry.write_audit_batch_async([(r["manifest_id"], r["user"], r["receipt"]) for r in batch])
+                return [], None
+            except Exception as e:
+                return batch, e
+        if not hasattr(registry, "write_audit_async"):
+            return [], None  # registries without audit support: nothing to write
+        # the ic-py canister has no batch method: one update call per record, issued concurrently
+        sem = asyncio.Semaphore(self.write_concurrency)
+
+        async def write_one(r):
+            async with sem:
+                await registry.write_audit_async(r["manifest_id"], r["user"], r["receipt"])
+
+        outcomes = await asyncio.gather(*(write_one(r) for r in batch), return_exceptions=True)
+        errors = [o for o in outcomes if isinstance(o, Exception)]
+        return [r for r, o in zip(batch, outcomes) if isinstance(o, Exception)], (errors[-1] if errors else None)
+
+    async def flush(self):
+        """Write everything queued so far (used by tests and on shutdown)."""
+        while self._pending:
+            await self._flush_once()
+
+    async def aclose(self, timeout: float = AUDIT_SHUTDOWN_TIMEOUT):
+        """Stop the worker, try a final flush, and journal whatever could not be written."""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        # a batch interrupted mid-write goes back to the front of the queue
+        if self._inflight:
+            self._pending.extendleft(reversed(self._inflight))
+            self._inflight = []
+        if not self._pending:
+            self._close_journal()
+            return
+        saved_retries, self.max_retries = self.max_retries, 0
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except (asyncio.TimeoutError, Exception) as e:
+            self.last_error = str(e) or type(e).__name__
+        finally:
+            self.max_retries = saved_retries
+            if self._inflight:
+                self._pending.extendleft(reversed(self._inflight))
+                self._inflight = []
+            if self._pending:
+                self._park(list(self._pending))
+                self._pending.clear()
+            self._close_journal()
+
+    # ---------- journal ----------
+    def _append_journal(self, records: List[Dict[str, Any]]):
+        if not self.journal_path:
+            return
+        try:
+            with self._journal_lock:
+                if self._journal_file is None:
+                    self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+                for r in records:
+                    self._journal_file.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+                self._journal_file.flush()
+                if self.journal_fsync:
+                    os.fsync(self._journal_file.fileno())
+        except Exception as e:
+            print(f"[orchestrator] ERROR: could not journal {len(records)} audit records: {e}")
+
+    def _close_journal(self):
+        with self._journal_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+
+    def _park(self, records: List[Dict[str, Any]]):
+        """Give up on records in memory; they are already journaled and replay on the next start."""
+        if not self.journal_path:
+            print(f"[orchestrator] warning: dropping {len(records)} audit records (no journal configured)")
+            return
+        self._parked += len(records)
+        self.journaled += len(records)
+
+    async def _confirm(self, records: List[Dict[str, Any]]):
+        """Drop confirmed records from the journal once they make up at least half of it."""
+        if not self.journal_path:
+            return
+        self._acked.update(r["id"] for r in records)
+        if len(self._acked) < len(self._pending) + self._parked:
+            return
+        acked, self._acked = self._acked, set()
+        try:
+            await asyncio.to_thread(self._compact_journal, acked)
+            self.compactions += 1
+        except Exception as e:
+            self._acked |= acked
+            print(f"[orchestrator] warning: could not compact the audit journal: {e}")
+
+    def _read_journal(self) -> List[Dict[str, Any]]:
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print("[orchestrator] warning: skipping corrupt audit journal line")
+        return records
+
+    def _compact_journal(self, acked: Set[str]):
+        """Atomically rewrite the journal without acked records (removed when none are left). Runs in a thread."""
+        with self._journal_lock:
+            if self._journal_file is not None:
+                self._journal_file.close()
+                self._journal_file = None
+            if not os.path.exists(self.journal_path):
+                return
+            keep = [r for r in self._read_journal() if r.get("id") not in acked]
+            if not keep:
+                os.remove(self.journal_path)
+                return
+            tmp = f"{self.journal_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for r in keep:
+                    f.write(json.dumps(r, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.journal_path)
+
+    def _replay_journal(self):
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        # replayed records stay in the journal until confirmed; ones this process
+        # submitted before start() are already queued
+        queued = {r["id"] for r in self._pending} | {r["id"] for r in self._inflight} | self._acked
+        todo = [r for r in self._read_journal() if r.get("id") not in queued]
+        room = max(0, self.queue_max - len(self._pending))
+        self._pending.extend(todo[:room])
+        self._parked = len(todo[room:])
+        self.replayed += len(todo)
+        if todo:
+            print(f"[orchestrator] replaying {len(todo)} journaled audit records")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._pending),
+            "in_flight": len(self._inflight),
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "journaled": self.journaled,
+            "replayed": self.replayed,
+            "parked": self._parked,
+            "compactions": self.compactions,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "queue_max": self.queue_max,
+            "journal_path": self.journal_path,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,227 @@
+# orchestrator/candid_decoder.py
+"""
+Typed decoders for registry canister responses, compiled once from registry_backend.did.
+
+ic-py hands back method results as generic Python values (records as dicts, opt as
+[] / [x], principals as Principal objects). The untyped path in main.py runs every
+response through py_serialize (recursive, with __dict__ reflection), the heuristic
+normalize_serialized_manifest and per-field opt unwrapping. Here the return types
+declared in the DID are walked once at startup and turned into a tree of small
+closures that map a result straight to flat manifest dicts in a single pass.
+
+Decoders are strict about shape and raise CandidDecodeError on anything unexpected;
+callers fall back to the untyped path in that case.
+
+The parsed DID (ic-py's method table) is also cached on disk, keyed by the DID text and
+ic-py version, so a restart skips the antlr parse (see canister_from_did). ic-py itself is
+imported on first use, not when this module is imported.
+"""
+
+import hashlib
+import os
+import pickle
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CANDID_CACHE_DIR = os.getenv("CANDID_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".candid_cache"))
+
+Decoder = Callable[[Any], Any]
+
+
+class CandidDecodeError(ValueError):
+    pass
+
+
+def _parse_did(did_text: str) -> Dict[str, Any]:
+    """Parse a .did file with ic-py's DID parser (as ic.canister.Canister does); returns the actor."""
+    from antlr4 import CommonTokenStream, ParseTreeWalker
+    from antlr4.InputStream import InputStream
+    from ic.parser.DIDEmitter import DIDEmitter, DIDLexer, DIDParser
+
+    parser = DIDParser(CommonTokenStream(DIDLexer(InputStream(did_text))))
+    tree = parser.program()
+    emitter = DIDEmitter()
+    ParseTreeWalker().walk(emitter, tree)
+    return emitter.getActor()
+
+
+def parse_did_methods(did_text: str) -> Dict[str, Any]:
+    """{method: FuncClass} for a .did file (uncached parse)."""
+    return _parse_did(did_text)["methods"]
+
+
+def _did_cache_path(did_text: str, cache_dir: str) -> str:
+    try:
+        from importlib.metadata import version
+        ic_version = version("ic-py")
+    except Exception:
+        ic_version = "unknown"
+    digest = hashlib.sha256(f"{ic_version}\n{did_text}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(cache_dir, f"{digest}.pickle")
+
+
+def load_did_actor(did_text: str, cache_dir: Optional[str] = CANDID_CACHE_DIR) -> Tuple[Dict[str, Any], bool]:
+    """
+    ic-py actor ({"methods": {...}, ...}) for a DID, from the on-disk cache when possible.
+    Returns (actor, cache_hit). The cache is a local pickle written only by this function;
+    an unreadable or stale entry is simply re-parsed and overwritten.
+    """
+    path = _did_cache_path(did_text, cache_dir) if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f), True
+        except Exception as e:
+            print(f"[orchestrator] warning: ignoring unreadable Candid cache {path}: {e}")
+    actor = _parse_did(did_text)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(actor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[orchestrator] warning: could not write Candid cache {path}: {e}")
+    return actor, False
+
+
+def canister_from_did(agent: Any, canister_id: str, did_text: str,
+                      cache_dir: Optional[str] = CANDID_CACHE_DIR) -> Tuple[Any, bool]:
+    """
+    Equivalent of ic.canister.Canister(agent, canister_id, candid=did_text), but built from
+    the cached actor instead of re-parsing the DID. Returns (canister, cache_hit).
+    """
+    from ic.canister import Canister, CaniterMethod, CaniterMethodAsync
+
+    actor, hit = load_did_actor(did_text, cache_dir)
+    canister = Canister.__new__(Canister)
+    canister.agent = agent
+    canister.canister_id = canister_id
+    canister.candid = did_text
+    canister.actor = actor
+    # same method binding as Canister.__init__
+    for name, method in actor["methods"].items():
+        anno = None if len(method.annotations) == 0 else method.annotations[0]
+        setattr(canister, name, CaniterMethod(agent, canister_id, name, method.argTypes, method.retTypes, anno))
+        setattr(canister, name + "_async", CaniterMethodAsync(agent, canister_id, name, method.argTypes, method.retTypes, anno))
+    return canister, hit
+
+
+def _principal(v: Any) -> Any:
+    return v.to_str() if hasattr(v, "to_str") else v
+
+
+def compile_type(t: Any, _memo: Optional[Dict[int, Decoder]] = None) -> Optional[Decoder]:
+    """
+    Build a decoder for an ic-py candid type. Returns None for types whose decoded
+    value is already plain Python (text, numbers, bool, null), so callers can skip the call.
+    """
+    from ic import candid as C
+
+    memo = {} if _memo is None else _memo
+    if isinstance(t, C.RecClass):
+        key = id(t)
+        if key in memo:
+            return memo[key]
+        # recursive types: bind lazily through a cell
+        cell: List[Optional[Decoder]] = [None]
+        memo[key] = lambda v: cell[0](v) if cell[0] else v
+        cell[0] = compile_type(t.getType(), memo)
+        return cell[0]
+
+    if isinstance(t, C.PrincipalClass):
+        return _principal
+
+    if isinstance(t, C.OptClass):
+        inner_t = t._type.getType() if isinstance(t._type, C.RecClass) else t._type
+        inner = compile_type(t._type, memo)
+        # an absent `opt vec` reads as [] (what unwrap_manifest_opts has always produced)
+        absent_is_list = isinstance(inner_t, C.VecClass)
+
+        def dec_opt(v):
+            if v.__class__ is not list or len(v) > 1:
+                raise CandidDecodeError(f"expected opt ([] or [x]), got {type(v).__name__}")
+            if not v:
+                return [] if absent_is_list else None
+            return inner(v[0]) if inner else v[0]
+        return dec_opt
+
+    if isinstance(t, C.VecClass):
+        inner = compile_type(t._type, memo)
+
+        def dec_vec(v):
+            if v.__class__ is not list:
+                raise CandidDecodeError(f"expected vec (list), got {type(v).__name__}")
+            return [inner(x) for x in v] if inner else list(v)
+        return dec_vec
+
+    if isinstance(t, C.RecordClass):
+        fields = tuple((name, compile_type(ft, memo)) for name, ft in t._fields.items())
+
+        def dec_record(v):
+            if v.__class__ is not dict:
+                raise CandidDecodeError(f"expected record (dict), got {type(v).__name__}")
+            get = v.get
+            return {name: (dec(get(name)) if dec else get(name)) for name, dec in fields}
+        return dec_record
+
+    if isinstance(t, C.VariantClass):
+        fields = {name: compile_type(ft, memo) for name, ft in t._fields.items()}
+
+        def dec_variant(v):
+            if v.__class__ is not dict or len(v) != 1:
+                raise CandidDecodeError("expected variant (single-key dict)")
+            (name, val), = v.items()
+            dec = fields.get(name)
+            return {name: dec(val) if dec else val}
+        return dec_variant
+
+    return None
+
+
+class RegistryDecoder:
+    """Compiled decoders for the registry methods the orchestrator reads (get_agent, list_agents)."""
+
+    def __init__(self, methods: Dict[str, Any]):
+        self._decoders: Dict[str, List[Optional[Decoder]]] = {}
+        memo: Dict[int, Decoder] = {}
+        for name, func in methods.items():
+            self._decoders[name] = [compile_type(rt, memo) for rt in func.retTypes]
+
+    @classmethod
+    def from_did(cls, did_text: str, cache_dir: Optional[str] = None) -> "RegistryDecoder":
+        if cache_dir:
+            return cls(load_did_actor(did_text, cache_dir)[0]["methods"])
+        return cls(parse_did_methods(did_text))
+
+    @classmethod
+    def from_canister(cls, canister: Any) -> "RegistryDecoder":
+        """Reuse the method table ic-py already parsed for the Canister (no second DID parse)."""
+        return cls(canister.actor["methods"])
+
+    def has(self, method: str) -> bool:
+        return method in self._decoders
+
+    def result(self, method: str, raw: Any) -> Any:
+        """Decode the first return value of an ic-py method result (a list with one value per return type)."""
+        decs = self._decoders.get(method)
+        if not decs:
+            raise CandidDecodeError(f"no decoder for method {method}")
+        if raw.__class__ is not list or len(raw) != len(decs):
+            raise CandidDecodeError(f"{method}: expected {len(decs)} return value(s)")
+        dec = decs[0]
+        return dec(raw[0]) if dec else raw[0]
+
+    def manifest(self, raw: Any) -> Optional[Dict[str, Any]]:
+        """get_agent result -> flat manifest dict, or None for an unknown id."""
+        value = self.result("get_agent", raw)
+        if value is not None and value.__class__ is not dict:
+            raise CandidDecodeError("get_agent: expected opt record")
+        return value
+
+    def agent_list(self, raw: Any) -> List[Dict[str, Any]]:
+        """list_agents result -> list of flat manifest dicts."""
+        value = self.result("list_agents", raw)
+        if value.__class__ is not list or any(a.__class__ is not dict for a in value):
+            raise CandidDecodeError("list_agents: expected vec record")
+        return value
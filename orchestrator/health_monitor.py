@@ -0,0 +1,269 @@
+# orchestrator/health_monitor.py
+"""
+Background agent health monitor with per-endpoint circuit breakers.
+
+A background task probes every registered agent's health_check (or endpoint + /health)
+concurrently every HEALTH_CHECK_INTERVAL seconds and keeps a health table with a
+latency EWMA. Probe outcomes and real call_agent outcomes (reported by the runner)
+drive one circuit breaker per endpoint:
+
+  closed     -> calls allowed; BREAKER_FAILURE_THRESHOLD consecutive failures open it
+  open       -> calls rejected immediately (no 15 s timeout on a dead agent)
+  half_open  -> after BREAKER_RESET_TIMEOUT one trial call is let through;
+                success closes the breaker, failure re-opens it
+
+Endpoints that were never probed are treated as available (fail open).
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .http_pool import get_http_pool
+
+HEALTH_MONITOR_ENABLED = os.getenv("HEALTH_MONITOR_ENABLED", "true").lower() in ("1", "true", "yes")
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "15"))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "3"))
+HEALTH_EWMA_ALPHA = float(os.getenv("HEALTH_EWMA_ALPHA", "0.3"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def endpoint_key(endpoint: Any) -> Optional[str]:
+    if isinstance(endpoint, (list, tuple)):
+        endpoint = endpoint[0] if endpoint else None
+    if not endpoint or not isinstance(endpoint, str):
+        return None
+    return endpoint.strip().rstrip("/")
+
+
+def health_url(manifest: Dict[str, Any]) -> Optional[str]:
+    url = manifest.get("health_check")
+    if isinstance(url, (list, tuple)):
+        url = url[0] if url else None
+    if url:
+        return url
+    ep = endpoint_key(manifest.get("endpoint"))
+    return ep + "/health" if ep else None
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_at: Optional[float] = None
+
+    def _trial_pending(self, now: float) -> bool:
+        # a trial whose outcome never arrived (e.g. cancelled run) expires after reset_timeout
+        return self._trial_at is not None and now - self._trial_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+            self._trial_at = None
+        # half-open: a single trial call at a time
+        if self._trial_pending(now):
+            return False
+        self._trial_at = now
+        return True
+
+    def available(self) -> bool:
+        """Like allow() but without consuming the half-open trial."""
+        now = time.monotonic()
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return now - self.opened_at >= self.reset_timeout
+        return not self._trial_pending(now)
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self._trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_at = None
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+
+class HealthMonitor:
+    def __init__(self,
+                 interval: float = HEALTH_CHECK_INTERVAL,
+                 timeout: float = HEALTH_CHECK_TIMEOUT,
+                 alpha: float = HEALTH_EWMA_ALPHA,
+                 failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT,
+                 client: Any = None):
+        self.interval = float(interval)
+        self.timeout = float(timeout)
+        self.alpha = float(alpha)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._client = client  # defaults to the shared HTTP pool
+        self._table: Dict[str, Dict[str, Any]] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.rounds = 0
+
+    def _breaker(self, key: str) -> CircuitBreaker:
+        br = self._breakers.get(key)
+        if br is None:
+            br = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return br
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        entry = self._table.get(key)
+        if entry is None:
+            entry = self._table[key] = {
+                "endpoint": key, "agents": [], "healthy": None, "latency_ewma_ms": None,
+                "last_latency_ms": None, "last_checked": None, "last_ok": None,
+                "consecutive_failures": 0, "last_error": None,
+            }
+        return entry
+
+    # ---------- outcome recording (probes and real calls) ----------
+    def record_success(self, endpoint: Any, latency_s: Optional[float] = None):
+        key = endpoint_key(endpoint)
+        if key is None:
+            return
+        entry = self._entry(key)
+        now = time.time()
+        entry.update(healthy=True, last_checked=now, last_ok=now, consecutive_failures=0, last_error=None)
+        if latency_s is not None:
+            ms = latency_s * 1000.0
+            prev = entry["latency_ewma_ms"]
+            entry["last_latency_ms"] = round(ms, 2)
+            entry["latency_ewma_ms"] = round(ms if prev is None else self.alpha * ms + (1 - self.alpha) * prev, 2)
+        self._breaker(key).record_success()
+
+    def record_failure(self, endpoint: Any, error: str = ""):
+        key = endpoint_key(endpoint)
+        if key is None:
+            return
+        entry = self._entry(key)
+        entry.update(healthy=False, last_checked=time.time(), last_error=error or None)
+        entry["consecutive_failures"] += 1
+        self._breaker(key).record_failure()
+
+    def allow(self, endpoint: Any) -> bool:
+        """Whether a call to this endpoint should be attempted now (consumes the half-open trial)."""
+        key = endpoint_key(endpoint)
+        if key is None or key not in self._breakers:
+            return True
+        return self._breakers[key].allow()
+
+    def is_available(self, endpoint: Any) -> bool:
+        """Non-consuming check used for filtering: False only while the breaker is open."""
+        key = endpoint_key(endpoint)
+        br = self._breakers.get(key) if key else None
+        return br is None or br.available()
+
+    def filter_agents(self, agents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop agents whose endpoint breaker is open; agents without an endpoint are kept."""
+        return [a for a in agents if not a.get("endpoint") or self.is_available(a.get("endpoint"))]
+
+    # ---------- probing ----------
+    async def probe(self, manifest: Dict[str, Any]) -> bool:
+        key = endpoint_key(manifest.get("endpoint")) or endpoint_key(health_url(manifest))
+        url = health_url(manifest)
+        if key is None or url is None:
+            return False
+        entry = self._entry(key)
+        if manifest.get("id") and manifest["id"] not in entry["agents"]:
+            entry["agents"].append(manifest["id"])
+        client = self._client or get_http_pool()
+        started = time.perf_counter()
+        try:
+            r = await client.get(url, timeout=self.timeout)
+            if r.status_code != 200:
+                raise RuntimeError(f"HTTP {r.status_code}")
+        except Exception as e:
+            self.record_failure(key, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+            return False
+        self.record_success(key, time.perf_counter() - started)
+        return True
+
+    async def probe_all(self, agents: List[Dict[str, Any]]) -> Dict[str, bool]:
+        # one probe per endpoint even if several manifests share it
+        by_key: Dict[str, Dict[str, Any]] = {}
+        for ag in agents:
+            key = endpoint_key(ag.get("endpoint")) or endpoint_key(health_url(ag))
+            if key is None:
+                continue
+            if key in by_key:
+                entry = self._entry(key)
+                if ag.get("id") and ag["id"] not in entry["agents"]:
+                    entry["agents"].append(ag["id"])
+                continue
+            by_key[key] = ag
+        results = await asyncio.gather(*(self.probe(ag) for ag in by_key.values()))
+        self.rounds += 1
+        return dict(zip(by_key.keys(), results))
+
+    async def run(self, list_agents: Callable[[], Awaitable[List[Dict[str, Any]]]]):
+        while True:
+            try:
+                await self.probe_all(await list_agents())
+            except Exception as e:
+                print(f"[orchestrator] warning: health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, list_agents: Callable[[], Awaitable[List[Dict[str, Any]]]]):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(list_agents))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        agents = {}
+        for key, entry in self._table.items():
+            br = self._breakers.get(key)
+            agents[key] = dict(entry, agents=list(entry["agents"]),
+                               breaker=br.state if br else CLOSED,
+                               available=self.is_available(key))
+        return {
+            "interval": self.interval,
+            "rounds": self.rounds,
+            "running": self._task is not None and not self._task.done(),
+            "endpoints": agents,
+        }
+
+
+# ---------- Process-wide instance ----------
+_monitor: Optional[HealthMonitor] = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    global _monitor
+    if _monitor is None:
+        _monitor = HealthMonitor()
+    return _monitor
+
+
+def set_health_monitor(monitor: Optional[HealthMonitor]):
+    """Swap the process-wide monitor (tests)."""
+    global _monitor
+    _monitor = monitor
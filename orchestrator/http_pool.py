@@ -0,0 +1,163 @@
+# orchestrator/http_pool.py
+"""
+Process-wide pooled HTTP clients for the orchestrator.
+
+One long-lived httpx.AsyncClient is kept per origin (scheme://host:port), so every
+agent / MCP host gets its own keep-alive pool and limits. Created in startup_event
+and closed on shutdown; hot paths call get_http_pool() instead of opening a fresh
+AsyncClient per request.
+"""
+
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30"))
+HTTP_POOL_HTTP2 = os.getenv("HTTP_POOL_HTTP2", "false").lower() in ("1", "true", "yes")
+HTTP_DEFAULT_TIMEOUT = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    scheme = parts.scheme or "http"
+    port = parts.port or (443 if scheme == "https" else 80)
+    return f"{scheme}://{(parts.hostname or '').lower()}:{port}"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class HttpClientManager:
+    """
+    Lazily creates one AsyncClient per origin and routes calls to it.
+    Exposes get/post/request with the same call shape as httpx.AsyncClient so it can
+    be passed anywhere a client is expected (e.g. runner.execute_plan).
+    """
+
+    def __init__(self,
+                 max_connections: int = HTTP_POOL_MAX_CONNECTIONS,
+                 max_keepalive: int = HTTP_POOL_MAX_KEEPALIVE,
+                 keepalive_expiry: float = HTTP_POOL_KEEPALIVE_EXPIRY,
+                 http2: bool = HTTP_POOL_HTTP2,
+                 default_timeout: float = HTTP_DEFAULT_TIMEOUT,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        if http2 and not _http2_available():
+            print("[orchestrator] warning: HTTP_POOL_HTTP2 requested but 'h2' is not installed; using HTTP/1.1")
+            http2 = False
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.default_timeout = default_timeout
+        self._transport = transport  # test hook (e.g. httpx.MockTransport)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+        self._in_flight: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._closed = False
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        if self._closed:
+            raise RuntimeError("HTTP client pool is closed")
+        origin = _origin(url)
+        client = self._clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(limits=self.limits, http2=self.http2, timeout=self.default_timeout,
+                                       transport=self._transport)
+            self._clients[origin] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        origin = _origin(url)
+        client = self.client_for(url)
+        self._requests[origin] = self._requests.get(origin, 0) + 1
+        self._in_flight[origin] = self._in_flight.get(origin, 0) + 1
+        try:
+            return await client.request(method, url, **kwargs)
+        except Exception:
+            self._errors[origin] = self._errors.get(origin, 0) + 1
+            raise
+        finally:
+            self._in_flight[origin] -= 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host connection counts (idle/active) plus request counters, for pool sizing."""
+        hosts = {}
+        for origin, client in self._clients.items():
+            idle = active = 0
+            try:
+                for conn in client._transport._pool.connections:
+                    if conn.is_closed():
+                        continue
+                    if conn.is_idle():
+                        idle += 1
+                    else:
+                        active += 1
+            except Exception:
+                pass
+            hosts[origin] = {
+                "idle_connections": idle,
+                "active_connections": active,
+                "in_flight": self._in_flight.get(origin, 0),
+                "requests": self._requests.get(origin, 0),
+                "errors": self._errors.get(origin, 0),
+            }
+        return {
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "http2": self.http2,
+            "default_timeout": self.default_timeout,
+            "hosts": hosts,
+        }
+
+    async def aclose(self):
+        self._closed = True
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"[orchestrator] warning: error closing HTTP client: {e}")
+
+
+# ---------- Process-wide instance ----------
+_pool: Optional[HttpClientManager] = None
+
+
+def init_http_pool(**kwargs) -> HttpClientManager:
+    global _pool
+    if _pool is None:
+        _pool = HttpClientManager(**kwargs)
+    return _pool
+
+
+def get_http_pool() -> HttpClientManager:
+    """Return the shared pool, creating it on first use (e.g. when startup_event did not run)."""
+    return _pool if _pool is not None else init_http_pool()
+
+
+async def close_http_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
@@ -7,15 +7,24 @@ that returns a dict with "steps": [ { "tool": str, "args": { ... } }, ... ].
 Defaults to a deterministic STUB provider (safe offline).
 Optionally supports OpenAI if LLM_PROVIDER=openai and OPENAI_API_KEY is set.
 
+Providers are implemented as coroutines (plan_with_llm_async, discover_and_plan_async)
+so the orchestrator's async handlers never block the event loop on an LLM round trip.
+Provider clients are long-lived (one per event loop) and each provider is capped by a
+concurrency semaphore. The synchronous functions are thin wrappers kept for scripts/tests.
+
 This file intentionally avoids heavy dependencies; OpenAI usage is guarded and optional.
 """
 
 import os
 import json
 import time
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional
-import requests, time
 from .llm_utils import validate_llm_plan
+from .plan_cache import get_plan_cache, plan_cache_key
+from .metrics import LLM_SECONDS, ERRORS
 
 
 # If you want stronger validation, import pydantic and define models.
@@ -27,6 +36,147 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 # Safe default list of allowed tool names (the orchestrator and MCP should still enforce)
 ALLOWED_TOOLS = ["search_docs", "create_ticket", "call_api", "send_email", "call_agent"]
 
+# Max concurrent in-flight calls per provider (LLM_MAX_CONCURRENCY_<PROVIDER> overrides)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+
+# ---------- Long-lived clients / semaphores (per event loop) ----------
+# httpx-based clients and asyncio primitives are bound to the loop that created them,
+# so they are kept per loop: the uvicorn loop reuses one set for the process lifetime.
+_loop_state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Dict[str, Any]]]" = weakref.WeakKeyDictionary()
+
+def _state() -> Dict[str, Dict[str, Any]]:
+    loop = asyncio.get_running_loop()
+    st = _loop_state.get(loop)
+    if st is None:
+        st = _loop_state[loop] = {"clients": {}, "semaphores": {}}
+    return st
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    sems = _state()["semaphores"]
+    sem = sems.get(provider)
+    if sem is None:
+        limit = int(os.getenv(f"LLM_MAX_CONCURRENCY_{provider.upper()}", str(LLM_MAX_CONCURRENCY)))
+        sem = sems[provider] = asyncio.Semaphore(max(1, limit))
+    return sem
+
+def _async_openai_client(api_key: str, base_url: Optional[str] = None):
+    clients = _state()["clients"]
+    key = ("openai", api_key, base_url)
+    client = clients.get(key)
+    if client is None:
+        from openai import AsyncOpenAI
+        kwargs = {"api_key": api_key, "timeout": LLM_TIMEOUT}
+        if base_url:
+            kwargs["base_url"] = base_url
+        client = clients[key] = AsyncOpenAI(**kwargs)
+    return client
+
+def _async_http_client():
+    clients = _state()["clients"]
+    client = clients.get("httpx")
+    if client is None:
+        import httpx
+        client = clients["httpx"] = httpx.AsyncClient(timeout=LLM_TIMEOUT)
+    return client
+
+async def close_llm_clients():
+    """Close provider clients owned by the current event loop (call on shutdown)."""
+    st = _loop_state.pop(asyncio.get_running_loop(), None)
+    if not st:
+        return
+    for client in st["clients"].values():
+        try:
+            close = getattr(client, "aclose", None) or getattr(client, "close")
+            await close()
+        except Exception as e:
+            print(f"[orchestrator] warning: error closing LLM client: {e}")
+
+def _run_sync(coro):
+    """Run a provider coroutine from synchronous code (sync wrappers below)."""
+    async def _with_cleanup():
+        try:
+            return await coro
+        finally:
+            await close_llm_clients()
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_with_cleanup())
+    # called from inside a running loop: don't block it re-entrantly, use a helper thread
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, _with_cleanup()).result()
+
+# ---------- Plan cache ----------
+def _provider_model(provider: str) -> Optional[str]:
+    if provider == "openai":
+        return os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    if provider in ("hf", "huggingface"):
+        return HF_MODEL
+    if provider == "groq":
+        return GROQ_MODEL
+    return None
+
+async def _timed_llm(kind: str, provider: str, model: Optional[str], compute) -> Dict[str, Any]:
+    """Run an uncached provider call, recording its latency per kind/provider/model."""
+    started = time.perf_counter()
+    try:
+        return await compute()
+    except Exception:
+        ERRORS.labels("llm").inc()
+        raise
+    finally:
+        LLM_SECONDS.labels(kind, provider, model or "").observe(time.perf_counter() - started)
+
+async def _cached_plan(key: str, compute) -> Dict[str, Any]:
+    """
+    Serve a plan from the plan cache (re-validated, marked in _meta) or compute and store it.
+    """
+    cache = get_plan_cache()
+    if cache is None:
+        return await compute()
+    hit = await cache.aget(key)
+    if hit is not None:
+        plan_json, created_at = hit
+        try:
+            plan = json.loads(plan_json)
+            validate_llm_plan(plan)
+            meta = plan.setdefault("_meta", {})
+            meta["cached"] = True
+            meta["cache_age_s"] = round(time.time() - created_at, 3)
+            return plan
+        except Exception as e:
+            print(f"[orchestrator] warning: dropping cached plan that no longer validates: {e}")
+            await cache.adiscard_stale(key)
+    plan = await compute()
+    await cache.aset(key, json.dumps(plan, ensure_ascii=False))
+    return plan
+
+def _context_text(context_snippets: Optional[List[Dict[str, Any]]]) -> str:
+    if not context_snippets:
+        return ""
+    parts = []
+    for s in context_snippets[:5]:
+        snip = s.get("snippet") or s.get("text") or ""
+        if snip:
+            parts.append(snip.strip())
+    return "\n\n".join(parts)
+
+def _parse_model_json(text: str, label: str) -> Dict[str, Any]:
+    """Parse a JSON object out of model output, tolerating leading/trailing prose."""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        start = text.find("{")
+        end = text.rfind("}")
+        if start != -1 and end != -1 and end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except Exception as e:
+                raise RuntimeError(f"Invalid JSON from {label} model: {text}") from e
+        raise RuntimeError(f"{label} did not return JSON: {text}")
+
 # ---------- Helpers ----------
 def _normalize_manifest(manifest: Any) -> Dict[str, Any]:
     # ensure manifest is a plain dict we can introspect
@@ -91,24 +241,8 @@ def _stub_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional
     return plan
 
 # ---------- OpenAI provider ----------
-def _openai_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
-    from openai import OpenAI
-
-    if not OPENAI_API_KEY:
-        raise RuntimeError("OPENAI_API_KEY is not set in the environment")
-
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-    # Build context for the prompt
-    context_text = ""
-    if context_snippets:
-        parts = []
-        for s in context_snippets[:5]:
-            snip = s.get("snippet") or s.get("text") or ""
-            if snip:
-                parts.append(snip.strip())
-        if parts:
-            context_text = "\n\n".join(parts)
+def _openai_messages(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> List[Dict[str, str]]:
+    context_text = _context_text(context_snippets)
 
     system_prompt = (
         "You are a planner that converts a user's natural-language request into a "
@@ -124,45 +258,40 @@ def _openai_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Option
         "Allowed tools: search_docs, create_ticket, call_api, send_email.\n"
         "Return STRICT JSON. No explanation."
     )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
 
+async def _openai_plan_async(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY is not set in the environment")
+
+    client = _async_openai_client(OPENAI_API_KEY)
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     try:
-        resp = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.2,
-            max_tokens=600,
-        )
+        async with _provider_semaphore("openai"):
+            resp = await client.chat.completions.create(
+                model=model,
+                messages=_openai_messages(manifest, prompt, context_snippets),
+                temperature=0.2,
+                max_tokens=600,
+            )
     except Exception as e:
         raise RuntimeError(f"OpenAI API error: {e}")
 
-    text = resp.choices[0].message.content.strip()
-
-    # attempt to parse JSON
-    try:
-        plan = json.loads(text)
-    except Exception:
-        # try extracting JSON substring
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            try:
-                plan = json.loads(text[start:end + 1])
-            except Exception:
-                raise RuntimeError(f"Invalid JSON from model: {text}")
-        else:
-            raise RuntimeError(f"OpenAI did not return JSON: {text}")
-
+    plan = _parse_model_json(resp.choices[0].message.content, "OpenAI")
     _validate_plan_shape(plan)
-    plan["_meta"] = {"provider": "openai", "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini")}
+    plan["_meta"] = {"provider": "openai", "model": model}
     validate_llm_plan(plan)
     return plan
 
+def _openai_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return _run_sync(_openai_plan_async(manifest, prompt, context_snippets))
+
 
 # ---------- Public entrypoint ----------
-def plan_with_llm(manifest: Any, prompt: str, context_snippets: Optional[List[Dict[str, Any]]] = None, provider: Optional[str] = None) -> Dict[str, Any]:
+async def plan_with_llm_async(manifest: Any, prompt: str, context_snippets: Optional[List[Dict[str, Any]]] = None, provider: Optional[str] = None) -> Dict[str, Any]:
     """
     Main entrypoint. Choose provider via argument, env LLM_PROVIDER or default 'stub'.
     Returns a dict with 'steps': [...]
@@ -187,17 +316,24 @@ def plan_with_llm(manifest: Any, prompt: str, context_snippets: Optional[List[Di
             raise RuntimeError(f"Stub produced invalid plan: {e}")
         return plan
 
-    if provider == "openai":
-        return _openai_plan(manifest_dict, prompt_text, context_snippets)
-
-    if provider in ("hf", "huggingface"):
-        return _hf_plan(manifest_dict, prompt_text, context_snippets)
-
-    if provider == "groq":
-        return _groq_plan(manifest_dict, prompt_text, context_snippets)
+    providers = {
+        "openai": _openai_plan_async,
+        "hf": _hf_plan_async,
+        "huggingface": _hf_plan_async,
+        "groq": _groq_plan_async,
+    }
+    if provider in providers:
+        model = _provider_model(provider)
+        key = plan_cache_key("plan", prompt_text, manifest_dict, context_snippets, provider, model)
+        return await _cached_plan(key, lambda: _timed_llm(
+            "plan", provider, model, lambda: providers[provider](manifest_dict, prompt_text, context_snippets)))
 
     raise RuntimeError(f"Unknown LLM provider '{provider}'. Supported: stub, openai.")
 
+def plan_with_llm(manifest: Any, prompt: str, context_snippets: Optional[List[Dict[str, Any]]] = None, provider: Optional[str] = None) -> Dict[str, Any]:
+    """Synchronous wrapper around plan_with_llm_async."""
+    return _run_sync(plan_with_llm_async(manifest, prompt, context_snippets, provider))
+
 
 
 # ----- add this HF provider helper somewhere near other providers -----
@@ -205,14 +341,7 @@ HF_API_KEY = os.getenv("HF_API_KEY", "")
 HF_MODEL = os.getenv("HF_MODEL", "meta-llama/Llama-4-Scout-17B-16E")
 HF_INFERENCE_URL_TEMPLATE = "https://router.huggingface.co/hf-inference/v1/models/{model}"
 
-def _hf_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
-    """
-    Call Hugging Face Inference API (serverless) for text generation.
-    Expects HF_API_KEY env var. Returns parsed plan (same shape as stub/openai).
-    """
-    if not HF_API_KEY:
-        raise RuntimeError("HF_API_KEY not set in environment")
-
+def _hf_payload(prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
     # Compose a strict JSON-only instruction to the model so it returns JSON plan
     # Use the short prompt template; include context snippets if present
     ctx = ""
@@ -227,50 +356,45 @@ def _hf_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[L
         "Example: {\"steps\":[{\"tool\":\"search_docs\",\"args\":{\"query\":\"...\",\"k\":3}},"
         "{\"tool\":\"create_ticket\",\"args\":{\"title\":\"...\",\"body\":\"...\",\"priority\":\"normal\"}}]}"
     )
-
     # HF Inference expects application/json with {"inputs": "...", "parameters": {...}}
-    url = HF_INFERENCE_URL_TEMPLATE.format(model=HF_MODEL)
-    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
-    payload = {"inputs": user_instr, "parameters": {"max_new_tokens": 600, "temperature": 0.2}}
-
-    # Make request (serverless inference)
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    if r.status_code != 200:
-        raise RuntimeError(f"Hugging Face inference error {r.status_code}: {r.text}")
+    return {"inputs": user_instr, "parameters": {"max_new_tokens": 600, "temperature": 0.2}}
 
+def _hf_generated_text(resp_json: Any) -> str:
     # HF returns JSON; models sometimes return nested formats. Extract text.
-    resp_json = r.json()
     # Many models return a list of generations: [{"generated_text":"..."}] or [{"generated_text": "..."}]
     if isinstance(resp_json, list) and len(resp_json) > 0 and isinstance(resp_json[0], dict):
         # try common shapes
         if "generated_text" in resp_json[0]:
-            text = resp_json[0]["generated_text"]
-        elif "generated_texts" in resp_json[0]:  # fallback
-            text = resp_json[0]["generated_texts"][0]
-        else:
-            # sometimes the API returns {"error": "..."} or a different structure
-            text = json.dumps(resp_json)
-    elif isinstance(resp_json, dict) and "generated_text" in resp_json:
-        text = resp_json["generated_text"]
-    else:
-        # fallback: stringify whole response
-        text = json.dumps(resp_json)
+            return resp_json[0]["generated_text"]
+        if "generated_texts" in resp_json[0]:  # fallback
+            return resp_json[0]["generated_texts"][0]
+        # sometimes the API returns {"error": "..."} or a different structure
+        return json.dumps(resp_json)
+    if isinstance(resp_json, dict) and "generated_text" in resp_json:
+        return resp_json["generated_text"]
+    # fallback: stringify whole response
+    return json.dumps(resp_json)
+
+async def _hf_plan_async(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Call Hugging Face Inference API (serverless) for text generation.
+    Expects HF_API_KEY env var. Returns parsed plan (same shape as stub/openai).
+    """
+    if not HF_API_KEY:
+        raise RuntimeError("HF_API_KEY not set in environment")
 
-    text = text.strip()
+    url = HF_INFERENCE_URL_TEMPLATE.format(model=HF_MODEL)
+    headers = {"Authorization": f"Bearer {HF_API_KEY}"}
+
+    # Make request (serverless inference)
+    async with _provider_semaphore("hf"):
+        r = await _async_http_client().post(url, headers=headers, json=_hf_payload(prompt, context_snippets), timeout=LLM_TIMEOUT)
+    if r.status_code != 200:
+        raise RuntimeError(f"Hugging Face inference error {r.status_code}: {r.text}")
+
+    text = _hf_generated_text(r.json())
     # Attempt to parse JSON plan out of the model text
-    try:
-        plan = json.loads(text)
-    except Exception:
-        # Extract first JSON object substring
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            try:
-                plan = json.loads(text[start:end+1])
-            except Exception as e:
-                raise RuntimeError(f"Failed to parse JSON from HF model output. Raw output: {text}") from e
-        else:
-            raise RuntimeError(f"Failed to parse JSON from HF model output. Raw output: {text}")
+    plan = _parse_model_json(text, "Hugging Face")
 
     # Validate shape
     _validate_plan_shape(plan)
@@ -278,9 +402,8 @@ def _hf_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[L
     validate_llm_plan(plan)
     return plan
 
-# ----- modify plan_with_llm to support 'hf' provider (add near existing provider branches) -----
-    if provider == "hf" or provider == "huggingface":
-        return _hf_plan(manifest_dict, prompt_text, context_snippets)
+def _hf_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    return _run_sync(_hf_plan_async(manifest, prompt, context_snippets))
 
 
 # ---------- GROQ provider (OpenAI-compatible) ----------
@@ -288,27 +411,8 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 GROQ_BASE_URL = "https://api.groq.com/openai/v1"
 
-def _groq_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]):
-    """
-    Uses Groq (OpenAI-compatible) to generate strict JSON tool plans.
-    This is FREE and super fast (Llama-3.1 models).
-    """
-    if not GROQ_API_KEY:
-        raise RuntimeError("GROQ_API_KEY not set")
-
-    from openai import OpenAI
-    client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
-
-    # Build context
-    context_text = ""
-    if context_snippets:
-        parts = []
-        for s in context_snippets[:5]:
-            snip = s.get("snippet") or s.get("text") or ""
-            if snip:
-                parts.append(snip.strip())
-        if parts:
-            context_text = "\n\n".join(parts)
+def _groq_messages(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]) -> List[Dict[str, str]]:
+    context_text = _context_text(context_snippets)
 
     system_prompt = (
         "You are a planner that converts a user's task into a JSON plan of tool calls. "
@@ -323,45 +427,43 @@ def _groq_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional
         "{\"tool\":\"search_docs\",\"args\":{\"query\":\"...\",\"k\":3}}\n"
         "Allowed tools: search_docs, create_ticket, call_api, send_email."
     )
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+async def _groq_plan_async(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]):
+    """
+    Uses Groq (OpenAI-compatible) to generate strict JSON tool plans.
+    This is FREE and super fast (Llama-3.1 models).
+    """
+    if not GROQ_API_KEY:
+        raise RuntimeError("GROQ_API_KEY not set")
 
+    client = _async_openai_client(GROQ_API_KEY, GROQ_BASE_URL)
     try:
-        resp = client.chat.completions.create(
-            model=GROQ_MODEL,
-            temperature=0.2,
-            max_tokens=600,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ]
-        )
+        async with _provider_semaphore("groq"):
+            resp = await client.chat.completions.create(
+                model=GROQ_MODEL,
+                temperature=0.2,
+                max_tokens=600,
+                messages=_groq_messages(manifest, prompt, context_snippets),
+            )
     except Exception as e:
         raise RuntimeError(f"Groq API error: {e}")
 
-    text = resp.choices[0].message.content.strip()
-
-    # Parse JSON
-    try:
-        plan = json.loads(text)
-    except Exception:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            plan = json.loads(text[start:end+1])
-        else:
-            raise RuntimeError(f"Groq returned non-JSON: {text}")
-
+    plan = _parse_model_json(resp.choices[0].message.content, "Groq")
     _validate_plan_shape(plan)
     plan["_meta"] = {"provider": "groq", "model": GROQ_MODEL}
     validate_llm_plan(plan)
     return plan
 
+def _groq_plan(manifest: Dict[str, Any], prompt: str, context_snippets: Optional[List[Dict[str, Any]]]):
+    return _run_sync(_groq_plan_async(manifest, prompt, context_snippets))
 
-def discover_and_plan(agents: List[Dict[str, Any]], prompt: str, messages: Optional[List[Dict[str, str]]] = None, provider: str = "groq") -> Dict[str, Any]:
-    """
-    1. Summarize available agents.
-    2. Ask LLM to select relevant agents and generate a plan.
-    """
-    
+
+def _discovery_messages(agents: List[Dict[str, Any]], prompt: str, messages: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Build the discovery prompt: agent summaries + recent conversation history."""
     agent_summaries = []
     for ag in agents:
         # minimal summary to save tokens
@@ -435,39 +537,40 @@ def discover_and_plan(agents: List[Dict[str, Any]], prompt: str, messages: Optio
         "IMPORTANT: Use the Conversation History to resolve coreferences (e.g. 'he', 'it', 'that'). The 'prompt' sent to the agent MUST be self-contained and explicit."
     )
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+async def discover_and_plan_async(agents: List[Dict[str, Any]], prompt: str, messages: Optional[List[Dict[str, str]]] = None, provider: str = "groq") -> Dict[str, Any]:
+    """
+    1. Summarize available agents.
+    2. Ask LLM to select relevant agents and generate a plan.
+    """
     if not GROQ_API_KEY:
          # Fallback to stub if no key (shouldn't happen given the task)
          print("[orchestrator] No GROQ_API_KEY, returning stub plan.")
          return _stub_plan({}, prompt, None)
 
-    from openai import OpenAI
-    client = OpenAI(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL)
+    key = plan_cache_key("discover", prompt, agents, None, "groq-discovery", GROQ_MODEL, messages=messages)
+    return await _cached_plan(key, lambda: _timed_llm(
+        "discover", "groq", GROQ_MODEL, lambda: _discover_uncached(agents, prompt, messages)))
+
+async def _discover_uncached(agents: List[Dict[str, Any]], prompt: str, messages: Optional[List[Dict[str, str]]]) -> Dict[str, Any]:
+    client = _async_openai_client(GROQ_API_KEY, GROQ_BASE_URL)
 
     try:
-        resp = client.chat.completions.create(
-            model=GROQ_MODEL,
-            temperature=0.2,
-            max_tokens=1000,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ]
-        )
+        async with _provider_semaphore("groq"):
+            resp = await client.chat.completions.create(
+                model=GROQ_MODEL,
+                temperature=0.2,
+                max_tokens=1000,
+                messages=_discovery_messages(agents, prompt, messages),
+            )
     except Exception as e:
         raise RuntimeError(f"Groq Discovery API error: {e}")
 
-    text = resp.choices[0].message.content.strip()
-    
-    # Parse JSON
-    try:
-        plan = json.loads(text)
-    except Exception:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            plan = json.loads(text[start:end+1])
-        else:
-            raise RuntimeError(f"Groq returned non-JSON: {text}")
+    plan = _parse_model_json(resp.choices[0].message.content, "Groq")
 
     # Basic validation
     if "steps" not in plan:
@@ -475,3 +578,7 @@ def discover_and_plan(agents: List[Dict[str, Any]], prompt: str, messages: Optio
     
     plan["_meta"] = {"provider": "groq-discovery", "model": GROQ_MODEL}
     return plan
+
+def discover_and_plan(agents: List[Dict[str, Any]], prompt: str, messages: Optional[List[Dict[str, str]]] = None, provider: str = "groq") -> Dict[str, Any]:
+    """Synchronous wrapper around discover_and_plan_async."""
+    return _run_sync(discover_and_plan_async(agents, prompt, messages=messages, provider=provider))
@@ -1,6 +1,5 @@
 # orchestrator/llm_utils.py
 import json
-from jsonschema import ValidationError
 from .schemas import validate_plan_schema
 
 def parse_llm_output(text: str):
@@ -1,4 +1,7 @@
 # orchestrator/main.py
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -8,36 +11,48 @@ env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 import os
+import asyncio
+import copy
 import json
+import time
 import hashlib
-from typing import Any, Dict, List, Optional
-from orchestrator.llm_adapter import plan_with_llm, discover_and_plan
+import base64
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+from orchestrator.llm_adapter import plan_with_llm_async, discover_and_plan_async, close_llm_clients
+from orchestrator.plan_cache import get_plan_cache
 from orchestrator.llm_utils import validate_llm_plan
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from nacl.signing import VerifyKey
-from nacl.encoding import HexEncoder
-from ic.candid import Types, encode, decode
-
-
 from orchestrator.runner import execute_plan
+from orchestrator.http_pool import init_http_pool, get_http_pool, close_http_pool
+from orchestrator.cache import TTLCache, NOT_FOUND, is_miss
+from orchestrator.manifest_verify import (
+    verify_manifest, verify_manifests_bulk_async, verification_cache_stats,
+    ManifestHashMismatch, MODE_SIGNATURE, MODE_HASH,
+)
+from orchestrator.audit_writer import AuditWriter
+from orchestrator.health_monitor import get_health_monitor, HEALTH_MONITOR_ENABLED
+from orchestrator.agent_index import get_agent_index, AGENT_SHORTLIST_ENABLED
+from orchestrator.singleflight import SingleFlight, request_key
+from orchestrator.candid_decoder import RegistryDecoder, CandidDecodeError, canister_from_did
+from orchestrator.metrics import REGISTRY as METRICS, STAGE_SECONDS, ERRORS, HTTP_SECONDS, HTTP_IN_FLIGHT
+from orchestrator.tracing import install_tracing, span as trace_span, inject as inject_trace
 
 
 
-# ic-py
-from ic.client import Client
-from ic.identity import Identity
-from ic.agent import Agent
-from ic.canister import Canister
-from ic.principal import Principal as ICPrincipal
+# ic-py is imported lazily (registry init / first principal parse), not at import time
+if TYPE_CHECKING:
+    from ic.principal import Principal as ICPrincipal
 
 import httpx
 from httpx import ConnectError, HTTPStatusError, TimeoutException
 
 REQUIRE_SIGNATURE = os.getenv("REQUIRE_SIGNATURE", "false").lower() in ("1","true","yes")
+PREVERIFY_MANIFESTS = os.getenv("PREVERIFY_MANIFESTS", "true").lower() in ("1","true","yes")
 
 
 # ====== Configuration (edit paths if your layout differs) ======
@@ -46,6 +61,19 @@ DFX_IDS_PATH = os.getenv("DFX_IDS_PATH", "../canisters/registery/.dfx/local/cani
 REGISTRY_DID_PATH = os.getenv("REGISTRY_DID_PATH", "../canisters/registery/registry_backend/registry_backend.did")
 REGISTRY_CANISTER_NAME = os.getenv("REGISTRY_CANISTER_NAME", "registry_backend")
 MCP_ENDPOINT = os.getenv("MCP_ENDPOINT", "http://localhost:9000")
+MANIFEST_CACHE_TTL = float(os.getenv("MANIFEST_CACHE_TTL", "300"))
+MANIFEST_CACHE_NEGATIVE_TTL = float(os.getenv("MANIFEST_CACHE_NEGATIVE_TTL", "10"))
+MANIFEST_CACHE_MAX = int(os.getenv("MANIFEST_CACHE_MAX", "1024"))
+# How long (seconds) a normalized list_agents result is reused before asking the canister again
+AGENTS_LIST_TTL = float(os.getenv("AGENTS_LIST_TTL", "5"))
+AGENTS_PAGE_MAX = int(os.getenv("AGENTS_PAGE_MAX", "500"))
+# Request-level deadline (seconds) for everything /execute does before running the plan
+EXECUTE_PREPARE_DEADLINE = float(os.getenv("EXECUTE_PREPARE_DEADLINE", "90"))
+# How long (seconds) a request arriving during startup waits for registry initialization
+STARTUP_WAIT_TIMEOUT = float(os.getenv("STARTUP_WAIT_TIMEOUT", "30"))
+# Failed registry connects are retried with exponential backoff (seconds), capped at the max
+REGISTRY_INIT_RETRY_BASE = float(os.getenv("REGISTRY_INIT_RETRY_BASE", "1"))
+REGISTRY_INIT_RETRY_MAX = float(os.getenv("REGISTRY_INIT_RETRY_MAX", "60"))
 # ===============================================================
 
 app = FastAPI(title="MCP Agent Hub — Orchestrator (dev)")
@@ -57,13 +85,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Trace-Id"],
 )
 
+# Server span per request + traceparent propagation to MCP / agents (see tracing.py)
+install_tracing(app, "orchestrator")
+
 _registry_canister: Any | None = None
+# Typed decoders compiled from registry_backend.did at startup (None with the mock registry)
+_registry_decoder: Optional[RegistryDecoder] = None
+
+# Fully normalized manifest dicts keyed by agent id (see get_normalized_manifest)
+_manifest_cache = TTLCache(maxsize=MANIFEST_CACHE_MAX, ttl=MANIFEST_CACHE_TTL, negative_ttl=MANIFEST_CACHE_NEGATIVE_TTL)
+
+# Normalized registry listing + its version hash (see get_agent_list); invalidated by /register
+_agent_list_cache = TTLCache(maxsize=1, ttl=AGENTS_LIST_TTL)
+
+# Concurrent identical /plan and /chat/plan requests share one computation
+_plan_flights = SingleFlight()
+
+# Receipts are written to the registry in the background (see audit_writer.py)
+_audit_writer = AuditWriter(lambda: _registry_canister)
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    # Labelled by route template (/agents/{agent_id}), not raw path, to keep cardinality bounded.
+    # Streaming routes are measured until their headers are sent.
+    started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_SECONDS.labels(getattr(route, "path", "unmatched"), request.method, status).observe(time.perf_counter() - started)
+
+def _cache_metric_families():
+    """Hit/miss counters of the orchestrator caches, read from their stats() at scrape time."""
+    caches = {"manifest": _manifest_cache.stats(), "agent_list": _agent_list_cache.stats(),
+              "verify": verification_cache_stats()}
+    plan_cache = get_plan_cache()
+    if plan_cache is not None:
+        caches["plan"] = plan_cache.stats()
+    yield ("agenthub_cache_hits_total", "Cache hits (including negative hits).", "counter",
+           [({"cache": n}, st.get("hits", 0) + st.get("negative_hits", 0)) for n, st in caches.items()])
+    yield ("agenthub_cache_misses_total", "Cache misses.", "counter",
+           [({"cache": n}, st.get("misses", 0)) for n, st in caches.items()])
+    yield ("agenthub_cache_entries", "Current cache occupancy.", "gauge",
+           [({"cache": n}, st.get("size", 0)) for n, st in caches.items()])
+    flights = _plan_flights.stats()
+    yield ("agenthub_plan_requests_coalesced_total", "/plan and /chat/plan calls served by an in-flight duplicate.", "counter",
+           [({}, flights["coalesced"])])
+    audit = _audit_writer.stats()
+    yield ("agenthub_audit_queue_depth", "Receipts waiting for the background audit writer.", "gauge",
+           [({}, audit["queued"] + audit["in_flight"])])
+    yield ("agenthub_audit_journaled_total", "Receipts left in the journal for the next start (queue full, retries exhausted, shutdown).", "counter",
+           [({}, audit["journaled"])])
+
+METRICS.register_collector(_cache_metric_families)
 
 # Mock Registry for debugging when IC is not reachable
 USE_MOCK_REGISTRY = os.getenv("USE_MOCK_REGISTRY", "false").lower() == "true"
 MOCK_AGENTS = {}
+MOCK_AUDITS: List[dict] = []
 
 class MockRegistry:
     async def register_agent_async(self, manifest: dict) -> bool:
@@ -83,6 +170,16 @@ class MockRegistry:
     async def get_agent_async(self, agent_id: str) -> Optional[dict]:
         return MOCK_AGENTS.get(agent_id)
 
+    async def write_audit_async(self, manifest_id: str, user: str, receipt: Any) -> bool:
+        MOCK_AUDITS.append({"manifest_id": manifest_id, "user": user, "receipt": receipt})
+        return True
+
+    async def write_audit_batch_async(self, records: List[tuple]) -> bool:
+        # stand-in for a batched canister update: one call, many receipts
+        for manifest_id, user, receipt in records:
+            MOCK_AUDITS.append({"manifest_id": manifest_id, "user": user, "receipt": receipt})
+        return True
+
 # ----------------- Helper: robust normalization -----------------
 def normalize_serialized_manifest(x, expected_id=None):
     """
@@ -141,63 +238,17 @@ def normalize_serialized_manifest(x, expected_id=None):
     # if we get here, we couldn't recover to a dict -> error
     raise ValueError(f"Could not normalize manifest shape: {type(x)}. Content preview: {str(x)[:400]}")
 
-# ----------------- Replace /execute route with this (paste entire function) -----------------
-@app.post("/execute")
-async def execute_agent(request: Request):
-    """
-    Execute a previously planned sequence (or generate a plan then execute).
-    Expects:
-      - manifest_id: str
-      - prompt: str
-      - user: str (principal text)
-      - optional: plan: { "steps": [...] }  (if frontend passed it after approval)
-      - optional: abort_on_error: bool
-    """
-    payload = await request.json()
-    manifest_id = payload.get("manifest_id")
-    prompt = payload.get("prompt", "")
-    user_text = payload.get("user", "2vxsx-fae")
-    abort_on_error = bool(payload.get("abort_on_error", True))
-    provided_plan = payload.get("plan")
-
-    if not manifest_id:
-        raise HTTPException(status_code=400, detail="manifest_id required")
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
-
-    # Fetch manifest from canister
-    try:
-        raw_manifest = await _registry_canister.get_agent_async(manifest_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error reading manifest from canister: {e}")
-
-    if raw_manifest is None:
-        raise HTTPException(status_code=404, detail="Agent manifest not found")
-
-    # Serialize and normalize manifest into a dict
-    try:
-        serialized = py_serialize(raw_manifest)
-        # Check for empty/wrapped empty results
-        if not serialized or serialized == [[]] or serialized == []:
-             raise HTTPException(status_code=404, detail="Agent manifest not found (empty result)")
-             
-        manifest_dict = normalize_serialized_manifest(serialized, expected_id=manifest_id)
-    except ValueError as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected manifest shape after serialization: {e}")
-    except Exception as e:
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=f"Failed to serialize/normalize manifest: {e}")
 
-    # ---- NORMALIZE OPTIONAL FIELDS (unwrap candid/opt shapes) ----
-    def _unwrap_opt(v):
-        # ic-py/candid often encodes optional vals as [] or [value]
-        if isinstance(v, (list, tuple)):
-            if len(v) == 0:
-                return None
-            return v[0]
-        return v
+# ---- NORMALIZE OPTIONAL FIELDS (unwrap candid/opt shapes) ----
+def _unwrap_opt(v):
+    # ic-py/candid often encodes optional vals as [] or [value]
+    if isinstance(v, (list, tuple)):
+        if len(v) == 0:
+            return None
+        return v[0]
+    return v
 
+def unwrap_manifest_opts(manifest_dict: dict) -> dict:
     # Unwrap common opt/text fields that came back as lists
     manifest_dict["endpoint"] = _unwrap_opt(manifest_dict.get("endpoint"))
     manifest_dict["health_check"] = _unwrap_opt(manifest_dict.get("health_check"))
@@ -218,55 +269,208 @@ async def execute_agent(request: Request):
     dev = manifest_dict.get("developer")
     if isinstance(dev, (list, tuple)):
         manifest_dict["developer"] = _unwrap_opt(dev)
+    return manifest_dict
 
-    # Verification (graded)
-    try:
-        # Full signature verification (preferred)
-        if manifest_dict.get("signature") and manifest_dict.get("pubkey"):
+def normalize_agent_list(raw_agents: Any) -> List[dict]:
+    """Normalize a list_agents_async result into manifest dicts (typed decoder when available)."""
+    if _registry_decoder is not None:
+        try:
+            return _registry_decoder.agent_list(raw_agents)
+        except CandidDecodeError as e:
+            print(f"[orchestrator] warning: typed list_agents decode failed ({e}); using untyped path")
+    return normalize_agent_list_untyped(raw_agents)
+
+def normalize_agent_list_untyped(raw_agents: Any) -> List[dict]:
+    """Normalize a list_agents_async result ([[a1, a2]] or [a1, a2]) into manifest dicts; skips malformed entries."""
+    agents = py_serialize(raw_agents)
+    normalized_agents = []
+    if isinstance(agents, list) and len(agents) > 0:
+        # list_agents_async usually returns [ [agent1, agent2, ...] ] or similar
+        flat = agents[0] if isinstance(agents[0], list) else agents
+        for ag in flat:
             try:
-                verify_manifest_signature(manifest_dict)
-            except ValueError as e:
-                # signature present but invalid -> reject
-                raise HTTPException(status_code=400, detail=f"Invalid manifest signature: {e}")
-
-        # Integrity check via manifest_hash if signature not present
-        elif manifest_dict.get("manifest_hash") and manifest_dict.get("pubkey"):
-            tmp = {k: v for k, v in manifest_dict.items() if k != "manifest_hash"}
-            computed = hashlib.sha256(canonical_json(tmp).encode("utf-8")).hexdigest()
-            onchain = str(manifest_dict.get("manifest_hash"))
-            if computed != onchain:
-                raise HTTPException(status_code=400, detail="Manifest hash mismatch (on-chain manifest may be tampered).")
-            else:
-                print(f"[orchestrator] warning: manifest {manifest_id} has manifest_hash but no signature. Integrity OK, authenticity not verified.")
+                normalized_agents.append(unwrap_manifest_opts(normalize_serialized_manifest(ag)))
+            except Exception:
+                continue
+    return normalized_agents
 
-        # No signature/hash present — permit in dev but warn (toggle for prod)
-        else:
-            print(f"[orchestrator] warning: manifest {manifest_id} missing signature and manifest_hash. Proceeding without cryptographic verification.")
-    except HTTPException:
-        raise
+async def get_agent_list() -> Dict[str, Any]:
+    """
+    Normalized registry listing, sorted by id, as {"version": str, "agents": [...]}.
+    version is a content hash of the listing (changes whenever any manifest changes) and
+    backs the /agents ETag. Reused for AGENTS_LIST_TTL seconds; treat the result as read-only.
+    """
+    cached = _agent_list_cache.get("all")
+    if cached is not None:
+        return cached
+    with STAGE_SECONDS.labels("registry_fetch").time():
+        raw_agents = await _registry_canister.list_agents_async()
+    with STAGE_SECONDS.labels("normalize").time():
+        agents = normalize_agent_list(raw_agents)
+    agents.sort(key=lambda a: str(a.get("id", "")))
+    version = hashlib.sha256(json.dumps(agents, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    listing = {"version": version, "agents": agents}
+    _agent_list_cache.set("all", listing)
+    return listing
+
+async def get_normalized_manifest(manifest_id: str) -> Optional[dict]:
+    """
+    Fetch a manifest from the registry and return it fully normalized (typed Candid decoder,
+    or py_serialize -> normalize_serialized_manifest -> opt unwrapping), or None if unknown.
+    Results (including unknown ids) are cached in _manifest_cache; callers get a private copy.
+    """
+    cached = _manifest_cache.lookup(manifest_id)
+    if cached is NOT_FOUND:
+        return None
+    if not is_miss(cached):
+        return copy.deepcopy(cached)
+
+    # Fetch manifest from canister
+    try:
+        with STAGE_SECONDS.labels("registry_fetch").time():
+            raw_manifest = await _registry_canister.get_agent_async(manifest_id)
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Manifest verification error: {e}")
+        ERRORS.labels("registry_fetch").inc()
+        raise HTTPException(status_code=500, detail=f"Error reading manifest from canister: {e}")
 
-    # Get plan: prefer client-provided plan (frontend approval). Otherwise generate.
-    plan = None
-    if provided_plan:
-        plan = provided_plan
-    else:
-        # Attempt to fetch context snippets from MCP (best-effort)
-        context_snippets = None
+    if raw_manifest is None:
+        _manifest_cache.set_missing(manifest_id)
+        return None
+
+    with STAGE_SECONDS.labels("normalize").time():
+        return _normalize_manifest(manifest_id, raw_manifest)
+
+def _normalize_manifest(manifest_id: str, raw_manifest: Any) -> Optional[dict]:
+    """Decode a get_agent result, cache it and return a private copy (None if unknown)."""
+    if _registry_decoder is not None:
         try:
-            async with httpx.AsyncClient() as tmp_client:
-                resp = await tmp_client.post(f"{MCP_ENDPOINT}/tool/search_docs", json={"query": prompt, "k": 3}, timeout=6.0)
-                if resp.status_code == 200:
-                    context_snippets = resp.json().get("results")
-        except Exception:
-            context_snippets = None
+            manifest_dict = _registry_decoder.manifest(raw_manifest)
+            if manifest_dict is None:
+                _manifest_cache.set_missing(manifest_id)
+                return None
+            _manifest_cache.set(manifest_id, manifest_dict)
+            return copy.deepcopy(manifest_dict)
+        except CandidDecodeError as e:
+            print(f"[orchestrator] warning: typed get_agent decode failed ({e}); using untyped path")
 
-        # Generate plan via the LLM adapter (synchronous function in your code)
+    # Serialize and normalize manifest into a dict
+    try:
+        serialized = py_serialize(raw_manifest)
+        # Check for empty/wrapped empty results
+        if not serialized or serialized == [[]] or serialized == []:
+            _manifest_cache.set_missing(manifest_id)
+            return None
+
+        manifest_dict = normalize_serialized_manifest(serialized, expected_id=manifest_id)
+    except ValueError as e:
+        ERRORS.labels("normalize").inc()
+        raise HTTPException(status_code=500, detail=f"Unexpected manifest shape after serialization: {e}")
+    except Exception as e:
+        ERRORS.labels("normalize").inc()
+        raise HTTPException(status_code=500, detail=f"Failed to serialize/normalize manifest: {e}")
+
+    unwrap_manifest_opts(manifest_dict)
+    _manifest_cache.set(manifest_id, manifest_dict)
+    return copy.deepcopy(manifest_dict)
+
+async def prepare_execution(request: Request, payload: Dict[str, Any], watch_disconnect: bool = True) -> Dict[str, Any]:
+    """
+    Everything /execute does before running the plan: fetch + verify the manifest,
+    obtain the plan (client-provided or generated), append the agent call and enforce
+    allowed_tools / plan schema. Raises HTTPException on any failure.
+    watch_disconnect=False is used by the streaming route, whose response task is already
+    cancelled when the client goes away.
+    """
+    manifest_id = payload.get("manifest_id")
+    prompt = payload.get("prompt", "")
+    user_text = payload.get("user", "2vxsx-fae")
+    abort_on_error = bool(payload.get("abort_on_error", True))
+    provided_plan = payload.get("plan")
+
+    if not manifest_id:
+        raise HTTPException(status_code=400, detail="manifest_id required")
+    await require_registry()
+
+    # Stages: [manifest fetch -> verify] and [context fetch] run concurrently (the context
+    # query only needs the prompt); the planner starts once both are ready. All stages
+    # share one request-level deadline and report their durations in timings.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + EXECUTE_PREPARE_DEADLINE
+    timings: Dict[str, float] = {}
+    stage = "manifest"
+
+    def remaining() -> float:
+        return max(0.0, deadline - loop.time())
+
+    async def timed(name: str, aw):
+        started = time.perf_counter()
+        try:
+            with trace_span(name):
+                return await aw
+        finally:
+            timings[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+    context_task = None
+    if not provided_plan:
+        context_task = asyncio.ensure_future(timed("context", fetch_context_snippets(prompt, timeout=min(6.0, EXECUTE_PREPARE_DEADLINE))))
+
+    try:
+        manifest_dict = await asyncio.wait_for(timed("manifest", get_normalized_manifest(manifest_id)), remaining())
+        if manifest_dict is None:
+            raise HTTPException(status_code=404, detail="Agent manifest not found")
+
+        # Verification (graded): signature preferred, then manifest_hash integrity check.
+        # Results are memoized per (id, signature, pubkey, content digest) in manifest_verify.
+        stage = "verify"
+        verify_started = time.perf_counter()
         try:
-            plan = plan_with_llm(manifest_dict, prompt, context_snippets)
+            with trace_span("verify"):
+                mode = verify_manifest(manifest_dict)
+            if mode == MODE_HASH:
+                print(f"[orchestrator] warning: manifest {manifest_id} has manifest_hash but no signature. Integrity OK, authenticity not verified.")
+            elif mode != MODE_SIGNATURE:
+                # No signature/hash present — permit in dev but warn (toggle for prod)
+                print(f"[orchestrator] warning: manifest {manifest_id} missing signature and manifest_hash. Proceeding without cryptographic verification.")
+        except ManifestHashMismatch as e:
+            ERRORS.labels("verify").inc()
+            raise HTTPException(status_code=400, detail=str(e))
+        except ValueError as e:
+            # signature present but invalid -> reject
+            ERRORS.labels("verify").inc()
+            raise HTTPException(status_code=400, detail=f"Invalid manifest signature: {e}")
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"LLM planning error: {e}")
+            ERRORS.labels("verify").inc()
+            raise HTTPException(status_code=400, detail=f"Manifest verification error: {e}")
+        finally:
+            verify_s = time.perf_counter() - verify_started
+            STAGE_SECONDS.labels("verify").observe(verify_s)
+            timings["verify_ms"] = round(verify_s * 1000, 2)
+
+        # Get plan: prefer client-provided plan (frontend approval). Otherwise generate.
+        plan = None
+        if provided_plan:
+            plan = provided_plan
+        else:
+            stage = "context"
+            context_snippets = await asyncio.wait_for(context_task, remaining())
+
+            # Generate plan via the LLM adapter (async; abandoned if the client goes away)
+            stage = "plan"
+            try:
+                planning = plan_with_llm_async(manifest_dict, prompt, context_snippets)
+                if watch_disconnect:
+                    planning = run_until_disconnect(request, planning)
+                plan = await asyncio.wait_for(timed("plan", planning), remaining())
+            except (HTTPException, asyncio.TimeoutError):
+                raise
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"LLM planning error: {e}")
+    except asyncio.TimeoutError:
+        ERRORS.labels("deadline").inc()
+        raise HTTPException(status_code=504, detail=f"Execution preparation exceeded {EXECUTE_PREPARE_DEADLINE}s deadline (stage: {stage})")
+    finally:
+        if context_task is not None and not context_task.done():
+            context_task.cancel()
 
     # If plan is a list (older shape), normalize to {"steps": ...}
     if isinstance(plan, list):
@@ -333,32 +537,140 @@ async def execute_agent(request: Request):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid plan provided/generated: {e}")
 
-    # Execute the plan via runner
+    return {
+        "manifest_id": manifest_id,
+        "manifest": manifest_dict,
+        "plan": plan,
+        "prompt": prompt,
+        "user": user_text,
+        "abort_on_error": abort_on_error,
+        "timings": timings,
+    }
+
+async def fetch_context_snippets(prompt: str, timeout: float = 6.0) -> Optional[List[dict]]:
+    """Best-effort MCP search_docs call; None if MCP is unavailable or the search fails."""
     try:
-        async with httpx.AsyncClient() as client:
-            run_result = await execute_plan(
-                plan=plan,
-                manifest=manifest_dict,
-                prompt=prompt,
-                user=user_text,
-                client=client,
-                mcp_endpoint=MCP_ENDPOINT,
-                abort_on_error=abort_on_error
-            )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Execution error: {e}")
+        with STAGE_SECONDS.labels("context_fetch").time():
+            resp = await get_http_pool().post(f"{MCP_ENDPOINT}/tool/search_docs", json={"query": prompt, "k": 3},
+                                              headers=inject_trace(), timeout=timeout)
+        if resp.status_code == 200:
+            return resp.json().get("results")
+    except Exception:
+        pass
+    ERRORS.labels("context_fetch").inc()
+    return None
 
-    # Best-effort: write audit on-chain if supported
+def write_audit(manifest_id: str, user_text: str, run_result: Dict[str, Any]):
+    # Best-effort: queue the receipt for the background audit writer (off the response path)
     try:
-        user_principal_obj = to_principal(user_text)
-        user_principal_text = user_principal_obj.to_str()
-        if hasattr(_registry_canister, "write_audit_async"):
-            await _registry_canister.write_audit_async(manifest_id, user_principal_text, run_result.get("receipt"))
+        user_principal_text = to_principal(user_text).to_str()
+        _audit_writer.submit(manifest_id, user_principal_text, run_result.get("receipt"))
     except Exception as e:
+        ERRORS.labels("audit_write").inc()
         print(f"[orchestrator] warning: audit write failed: {e}")
 
+# ----------------- Replace /execute route with this (paste entire function) -----------------
+@app.post("/execute")
+async def execute_agent(request: Request):
+    """
+    Execute a previously planned sequence (or generate a plan then execute).
+    Expects:
+      - manifest_id: str
+      - prompt: str
+      - user: str (principal text)
+      - optional: plan: { "steps": [...] }  (if frontend passed it after approval)
+      - optional: abort_on_error: bool
+    """
+    payload = await request.json()
+    ex = await prepare_execution(request, payload)
+
+    # Execute the plan via runner
+    try:
+        run_result = await execute_plan(
+            plan=ex["plan"],
+            manifest=ex["manifest"],
+            prompt=ex["prompt"],
+            user=ex["user"],
+            client=get_http_pool(),
+            mcp_endpoint=MCP_ENDPOINT,
+            abort_on_error=ex["abort_on_error"]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Execution error: {e}")
+
+    write_audit(ex["manifest_id"], ex["user"], run_result)
+    # not part of the receipt: per-stage preparation timings
+    run_result["_meta"] = {"timings": ex["timings"]}
     return JSONResponse(run_result)
 
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@app.post("/execute/stream")
+async def execute_agent_stream(request: Request):
+    """
+    Streaming variant of /execute (same request body) using Server-Sent Events.
+    Events, in order:
+      accepted                     - sent immediately (time-to-first-byte)
+      plan                         - the validated plan that will run
+      step_started / step_finished / step_failed - per step, as they happen
+      receipt                      - final event with the full run_result (as /execute returns)
+      error                        - {status, detail} if preparation or execution fails
+    Every event carries t_ms: milliseconds since the request was received.
+    """
+    t0 = time.perf_counter()
+    payload = await request.json()
+    if not payload.get("manifest_id"):
+        raise HTTPException(status_code=400, detail="manifest_id required")
+
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - t0) * 1000, 2)
+
+    async def event_stream():
+        yield _sse("accepted", {"manifest_id": payload.get("manifest_id"), "t_ms": elapsed_ms()})
+        try:
+            ex = await prepare_execution(request, payload, watch_disconnect=False)
+        except HTTPException as e:
+            yield _sse("error", {"status": e.status_code, "detail": e.detail, "t_ms": elapsed_ms()})
+            return
+        yield _sse("plan", {"plan": ex["plan"], "timings": ex["timings"], "t_ms": elapsed_ms()})
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def on_event(ev: Dict[str, Any]):
+            queue.put_nowait(dict(ev, t_ms=elapsed_ms()))
+
+        task = asyncio.create_task(execute_plan(
+            plan=ex["plan"],
+            manifest=ex["manifest"],
+            prompt=ex["prompt"],
+            user=ex["user"],
+            client=get_http_pool(),
+            mcp_endpoint=MCP_ENDPOINT,
+            abort_on_error=ex["abort_on_error"],
+            on_event=on_event,
+        ))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                ev = await queue.get()
+                if ev is None:
+                    break
+                yield _sse(ev["event"], ev)
+            try:
+                run_result = task.result()
+            except Exception as e:
+                yield _sse("error", {"status": 500, "detail": f"Execution error: {e}", "t_ms": elapsed_ms()})
+                return
+            write_audit(ex["manifest_id"], ex["user"], run_result)
+            yield _sse("receipt", dict(run_result, t_ms=elapsed_ms()))
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ----------------- Utilities -----------------
 def load_canister_id() -> str:
     if not os.path.exists(DFX_IDS_PATH):
@@ -373,8 +685,18 @@ def load_canister_id() -> str:
     except KeyError:
         raise KeyError(f"Canister name '{REGISTRY_CANISTER_NAME}' not found in {DFX_IDS_PATH}.")
 
+_ICPrincipal = None
+
+def _principal_cls():
+    """ic.principal.Principal, imported on first use (importing ic pulls in the whole ic-py package)."""
+    global _ICPrincipal
+    if _ICPrincipal is None:
+        from ic.principal import Principal
+        _ICPrincipal = Principal
+    return _ICPrincipal
+
 def py_serialize(obj: Any) -> Any:
-    if isinstance(obj, ICPrincipal):
+    if isinstance(obj, _principal_cls()):
         return obj.to_str()
     if isinstance(obj, (bytes, bytearray)):
         return obj.hex()
@@ -393,7 +715,8 @@ def canonical_json(obj: Any) -> str:
     # deterministic JSON encoding for receipts
     return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
 
-def to_principal(x: Any) -> ICPrincipal:
+def to_principal(x: Any) -> "ICPrincipal":
+    ICPrincipal = _principal_cls()
     if isinstance(x, ICPrincipal):
         return x
     if isinstance(x, (bytes, bytearray)):
@@ -425,18 +748,10 @@ def to_principal(x: Any) -> ICPrincipal:
     raise ValueError(f"Unsupported principal type: {type(x)}. Expected text or ic-py Principal.")
 
 def verify_manifest_signature(manifest: dict):
-    try:
-        sig = manifest.get("signature")
-        pub = manifest.get("pubkey")
-        if not sig or not pub:
-            raise ValueError("Missing signature or pubkey.")
-        m = {k: v for k, v in manifest.items() if k not in ("signature", "pubkey")}
-        canonical = canonical_json(m).encode()
-        vk = VerifyKey(pub, encoder=HexEncoder)
-        vk.verify(canonical, bytes.fromhex(sig))
-        return True
-    except Exception as e:
-        raise ValueError(f"Manifest signature verification failed: {e}")
+    if not manifest.get("signature") or not manifest.get("pubkey"):
+        raise ValueError("Manifest signature verification failed: Missing signature or pubkey.")
+    verify_manifest(manifest)  # memoized; raises ValueError on a bad signature
+    return True
 
 # Robust MCP call wrapper
 async def call_mcp_tool(client: httpx.AsyncClient, tool: str, args: dict):
@@ -455,73 +770,342 @@ async def call_mcp_tool(client: httpx.AsyncClient, tool: str, args: dict):
     except Exception as e:
         raise RuntimeError(f"Error calling MCP server {url}: {e}")
     
+# ----------------- Client-disconnect cancellation -----------------
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "0.25"))
+
+async def run_until_disconnect(request: Request, coro, poll_interval: float = DISCONNECT_POLL_INTERVAL):
+    """
+    Await coro (e.g. an LLM call) but cancel it as soon as the HTTP client disconnects,
+    so abandoned requests stop holding provider concurrency slots.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                print("[orchestrator] client disconnected; cancelled in-flight LLM call")
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
 # ----------------- Health check helper -----------------
 async def check_agent_health(manifest: dict, timeout: float = 3.0) -> bool:
     """
     Return True if the agent appears alive via health_check or endpoint/health.
     Expects manifest to contain either 'health_check' or 'endpoint'.
+    The outcome is recorded in the health monitor (latency EWMA + circuit breaker).
     """
-    # prefer explicit health_check
-    url = manifest.get("health_check")
-    if not url:
-        ep = manifest.get("endpoint")
-        if ep:
-            url = ep.rstrip("/") + "/health"
-    if not url:
-        return False
+    return await get_health_monitor().probe(manifest)
+
+async def list_agents_for_health() -> List[dict]:
+    if _registry_canister is None:
+        return []
+    return (await get_agent_list())["agents"]
+
+async def warm_agent_index():
+    """Background: embed every registered agent once so the first /chat/plan doesn't pay for it."""
     try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get(url, timeout=timeout)
-            # accept 200 OK as healthy; optionally parse JSON content if you want
-            return r.status_code == 200
-    except Exception:
-        return False
+        agents = await list_agents_for_health()
+        changed = await get_agent_index().sync_async(agents)
+        print(f"[orchestrator] agent index ready: {changed} agents embedded")
+    except Exception as e:
+        print(f"[orchestrator] warning: agent index warm-up failed: {e}")
+
+def start_background_tasks():
+    _audit_writer.start()
+    if HEALTH_MONITOR_ENABLED:
+        get_health_monitor().start(list_agents_for_health)
+    if AGENT_SHORTLIST_ENABLED:
+        asyncio.create_task(warm_agent_index())
 
 
 # ----------------- Startup -----------------
-@app.on_event("startup")
-async def startup_event():
-    global _registry_canister
+# Per-phase startup timings (served at /debug/startup). The process starts serving as soon
+# as the HTTP pool exists; registry connection and warm-up run in the background and
+# /ready reports 200 once they are done (/health stays a pure liveness check).
+_startup: Dict[str, Any] = {"import_ms": None, "phases": {}, "ready": False, "error": None, "attempts": 0,
+                            "started_at": None, "ready_at": None, "total_ms": None, "candid_cache_hit": None}
+_startup_t0: Optional[float] = None
+_registry_init: Optional[asyncio.Task] = None
+
+@contextmanager
+def startup_phase(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _startup["phases"][name] = round((time.perf_counter() - started) * 1000, 2)
+
+def connect_registry(canister_id: str, candid_text: str):
+    """Blocking part of registry setup (identity, agent, Candid interface); runs on a worker thread."""
+    with startup_phase("ic_import"):
+        from ic.agent import Agent
+        from ic.client import Client
+        from ic.identity import Identity
+    with startup_phase("ic_agent"):
+        agent = Agent(Identity(), Client(url=IC_HOST))
+    with startup_phase("candid_interface"):
+        canister, cache_hit = canister_from_did(agent, canister_id, candid_text)
+    _startup["candid_cache_hit"] = cache_hit
+    return canister
+
+def prewarm():
+    """Import / build what the first request would otherwise pay for (plan schema validator, ic principal)."""
+    from orchestrator.schemas import plan_validator
+    plan_validator()
+    _principal_cls()
+
+async def open_registry():
+    """Create the registry client (mock, or ic-py against the local replica); raises on failure."""
+    global _registry_canister, _registry_decoder
     if USE_MOCK_REGISTRY:
         print("[orchestrator] WARNING: Using MOCK REGISTRY (in-memory). Data will be lost on restart.")
         _registry_canister = MockRegistry()
         return
+    with startup_phase("did_load"):
+        canister_id = load_canister_id()
+        if not os.path.exists(REGISTRY_DID_PATH):
+            raise FileNotFoundError(f"Candid file not found at {REGISTRY_DID_PATH}. Run `dfx generate`.")
+        with open(REGISTRY_DID_PATH, "r", encoding="utf-8") as f:
+            candid_text = f.read()
+    with startup_phase("registry_connect"):
+        canister = await asyncio.to_thread(connect_registry, canister_id, candid_text)
+    with startup_phase("decoder_compile"):
+        try:
+            _registry_decoder = RegistryDecoder.from_canister(canister)
+        except Exception as e:
+            print(f"[orchestrator] warning: could not compile typed registry decoder ({e}); using untyped path")
+    _registry_canister = canister
+    print(f"[orchestrator] connected to canister {canister_id} at {IC_HOST}")
+
+async def init_registry():
+    """
+    Connect to the registry, retrying with backoff until it succeeds (a missing DID file or
+    canister id may appear after `dfx deploy`), then start background tasks and warm up.
+    """
+    attempt = 0
+    while True:
+        try:
+            await open_registry()
+            break
+        except Exception as e:
+            attempt += 1
+            delay = min(REGISTRY_INIT_RETRY_MAX, REGISTRY_INIT_RETRY_BASE * 2 ** (attempt - 1))
+            _startup["error"] = f"{type(e).__name__}: {e}"
+            _startup["attempts"] = attempt
+            print(f"[orchestrator] ERROR: registry initialization failed (attempt {attempt}): {e}; retrying in {delay:g}s")
+            await asyncio.sleep(delay)
+    _startup["error"] = None
+    try:
+        with startup_phase("background_tasks"):
+            start_background_tasks()
+            if PREVERIFY_MANIFESTS and not USE_MOCK_REGISTRY:
+                asyncio.create_task(preverify_registry())
+        with startup_phase("prewarm"):
+            await asyncio.to_thread(prewarm)
+    except Exception as e:
+        _startup["error"] = f"{type(e).__name__}: {e}"
+        print(f"[orchestrator] ERROR: startup warm-up failed: {e}")
+        raise
+    _startup["ready"] = True
+    _startup["ready_at"] = time.time()
+    _startup["total_ms"] = round((time.perf_counter() - _startup_t0) * 1000, 2)
+    print(f"[orchestrator] ready in {_startup['total_ms']} ms (import {_startup['import_ms']} ms; phases {_startup['phases']})")
+
+async def require_registry():
+    """
+    Raise unless the registry client is usable. Requests that arrive while it is still
+    initializing wait for it (up to STARTUP_WAIT_TIMEOUT) instead of failing; while a failed
+    connect is being retried they get a 503 straight away.
+    """
+    if _registry_canister is not None:
+        return
+    if _startup["error"] and _registry_init is not None and not _registry_init.done():
+        raise HTTPException(status_code=503, detail=f"Registry unavailable ({_startup['error']}); retrying.")
+    if _registry_init is not None and not _registry_init.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(_registry_init), STARTUP_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Registry still initializing; retry shortly.")
+        except Exception:
+            pass
+    if _registry_canister is None:
+        raise HTTPException(status_code=500, detail="Canister not initialized.")
 
-    canister_id = load_canister_id()
-    if not os.path.exists(REGISTRY_DID_PATH):
-        raise FileNotFoundError(f"Candid file not found at {REGISTRY_DID_PATH}. Run `dfx generate`.")
-    candid_text = open(REGISTRY_DID_PATH, "r", encoding="utf-8").read()
+@app.on_event("startup")
+async def startup_event():
+    global _registry_init, _startup_t0
+    _startup_t0 = time.perf_counter()
+    _startup["started_at"] = time.time()
+    with startup_phase("http_pool"):
+        init_http_pool()
+    _registry_init = asyncio.create_task(init_registry())
+    # connect failures are retried inside the task; a failed warm-up is reported by /ready and
+    # /debug/startup, so don't leave it unretrieved
+    _registry_init.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+async def preverify_registry():
+    """Background: list the registry, warm the manifest cache and pre-verify every signed manifest."""
+    try:
+        agents = normalize_agent_list(await _registry_canister.list_agents_async())
+        for ag in agents:
+            if ag.get("id"):
+                _manifest_cache.set(ag["id"], ag)
+        report = await verify_manifests_bulk_async(agents)
+        failed = [mid for mid, r in report.items() if not r["ok"]]
+        verified = sum(1 for r in report.values() if r["ok"] and r["mode"] in (MODE_SIGNATURE, MODE_HASH))
+        print(f"[orchestrator] pre-verified {verified}/{len(agents)} manifests" + (f"; FAILED: {failed}" if failed else ""))
+    except Exception as e:
+        print(f"[orchestrator] warning: manifest pre-verification failed: {e}")
 
-    identity = Identity()
-    client = Client(url=IC_HOST)
-    agent = Agent(identity, client)
-    _registry_canister = Canister(agent=agent, canister_id=canister_id, candid=candid_text)
-    print(f"[orchestrator] connected to canister {canister_id} at {IC_HOST}")
+@app.on_event("shutdown")
+async def shutdown_event():
+    if _registry_init is not None and not _registry_init.done():
+        _registry_init.cancel()
+    await get_health_monitor().stop()
+    await _audit_writer.aclose()
+    await close_llm_clients()
+    await close_http_pool()
 
 # ----------------- Routes -----------------
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once the registry is connected and warm-up is done, 503 before (or while retrying)."""
+    if _startup["ready"]:
+        return {"status": "ready"}
+    if _startup["error"]:
+        status = "retrying" if _registry_init is not None and not _registry_init.done() else "failed"
+    else:
+        status = "starting"
+    return JSONResponse({"status": status, "error": _startup["error"], "attempts": _startup["attempts"],
+                         "phases": _startup["phases"]}, status_code=503)
+
+@app.get("/debug/startup")
+async def startup_report():
+    """Import time and per-phase startup breakdown (ms), Candid cache hit, readiness."""
+    return _startup
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition: per-stage / LLM / tool-step latency histograms, errors, cache hit ratios."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/debug/http-pool")
+async def http_pool_stats():
+    """Idle/active connections and request counters per upstream host."""
+    return get_http_pool().stats()
+
+@app.get("/debug/audit")
+async def audit_writer_stats():
+    """Background audit queue depth, batch/retry counters and journal usage."""
+    return _audit_writer.stats()
+
+@app.get("/debug/agent-index")
+async def agent_index_stats():
+    """Agent shortlisting index: size, k/threshold, embedding rebuild counters and last selection."""
+    return get_agent_index().stats()
+
+@app.get("/debug/singleflight")
+async def singleflight_stats():
+    """How many /plan and /chat/plan calls were collapsed onto an in-flight duplicate."""
+    return _plan_flights.stats()
+
+@app.get("/debug/manifest-cache")
+async def manifest_cache_stats():
+    """Hit/miss counters and occupancy of the in-process manifest cache."""
+    return _manifest_cache.stats()
+
+@app.get("/debug/verify-cache")
+async def verify_cache_stats():
+    """Hit/miss counters of the memoized manifest verification."""
+    return verification_cache_stats()
+
+@app.get("/debug/plan-cache")
+async def plan_cache_stats():
+    """Hit/miss counters of the LLM plan cache (or disabled)."""
+    cache = get_plan_cache()
+    return cache.stats() if cache is not None else {"backend": "none"}
+
+def _encode_cursor(agent_id: str) -> str:
+    return base64.urlsafe_b64encode(agent_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _agent_matches(agent: dict, tool: Optional[str], developer: Optional[str], name_prefix: Optional[str]) -> bool:
+    if tool and tool not in (agent.get("allowed_tools") or []):
+        return False
+    if developer and agent.get("developer") != developer:
+        return False
+    if name_prefix and not str(agent.get("name") or "").lower().startswith(name_prefix.lower()):
+        return False
+    return True
+
 @app.get("/agents")
-async def list_agents():
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
+async def list_agents(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None,
+                      tool: Optional[str] = None, developer: Optional[str] = None,
+                      name_prefix: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Registry listing, ordered by id: {"agents": [...], "next_cursor": str|None, "total": int, "version": str}.
+      - limit / cursor : keyset pagination (pass next_cursor back as cursor)
+      - tool, developer, name_prefix : filters (tool in allowed_tools, exact developer, case-insensitive name prefix)
+      - fields : comma-separated projection (id is always included)
+    A strong ETag (registry version + query) is returned; If-None-Match with it yields 304.
+    """
+    await require_registry()
+    if limit is not None and not (1 <= limit <= AGENTS_PAGE_MAX):
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {AGENTS_PAGE_MAX}")
     try:
-        res = await _registry_canister.list_agents_async()
-        return JSONResponse(py_serialize(res))
+        listing = await get_agent_list()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calling canister: {e}")
 
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.items()))
+    etag = '"' + listing["version"][:32] + "-" + hashlib.sha256(query.encode("utf-8")).hexdigest()[:12] + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+
+    after = _decode_cursor(cursor) if cursor else None
+    matched = [a for a in listing["agents"] if _agent_matches(a, tool, developer, name_prefix)]
+    page = [a for a in matched if after is None or str(a.get("id", "")) > after]
+    next_cursor = None
+    if limit is not None and len(page) > limit:
+        page = page[:limit]
+        next_cursor = _encode_cursor(str(page[-1].get("id", "")))
+    if fields:
+        wanted = {"id"} | {f.strip() for f in fields.split(",") if f.strip()}
+        page = [{k: v for k, v in a.items() if k in wanted} for a in page]
+
+    body = {"agents": page, "next_cursor": next_cursor, "total": len(matched), "version": listing["version"]}
+    return JSONResponse(body, headers=headers)
+
+# Declared before /agents/{agent_id} so "health" is not taken as an agent id
+@app.get("/agents/health")
+async def agents_health():
+    """Health table from the background monitor: per-endpoint status, latency EWMA and breaker state."""
+    return get_health_monitor().snapshot()
+
 @app.get("/agents/{agent_id}")
 async def get_agent(agent_id: str):
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
+    await require_registry()
     try:
-        res = await _registry_canister.get_agent_async(agent_id)
-        if res is None:
+        manifest = await get_normalized_manifest(agent_id)
+        if manifest is None:
             raise HTTPException(status_code=404, detail="Agent not found")
-        return JSONResponse(py_serialize(res))
+        return JSONResponse(manifest)
     except HTTPException:
         raise
     except Exception as e:
@@ -541,29 +1125,25 @@ async def plan_agent(request: Request):
     if not manifest_id:
         raise HTTPException(status_code=400, detail="manifest_id required")
 
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
+    await require_registry()
 
     # fetch manifest to ensure agent exists
-    manifest = await _registry_canister.get_agent_async(manifest_id)
+    manifest = await get_normalized_manifest(manifest_id)
     if manifest is None:
         raise HTTPException(status_code=404, detail="Agent not found")
 
-    # Attempt to fetch context snippets from MCP (best-effort)
-    context_snippets = None
-    try:
-        async with httpx.AsyncClient() as client:
-            # call the MCP server search_docs tool to produce context
-            # If MCP isn't available or search fails, we silently continue with no context.
-            resp = await client.post(f"{MCP_ENDPOINT}/tool/search_docs", json={"query": prompt, "k": 3}, timeout=8.0)
-            if resp.status_code == 200:
-                context_snippets = resp.json().get("results")
-    except Exception:
-        context_snippets = None
+    async def compute_plan():
+        # Context snippets from MCP search_docs are best-effort; no context if MCP is unavailable
+        context_snippets = await fetch_context_snippets(prompt, timeout=8.0)
+        # call the adapter (defaults to stub unless OPENAI configured)
+        return await plan_with_llm_async(manifest, prompt, context_snippets)
 
-    # call the adapter (defaults to stub unless OPENAI configured)
+    # identical concurrent requests await the same search_docs + LLM call
     try:
-        plan = plan_with_llm(manifest, prompt, context_snippets)
+        key = request_key("/plan", manifest_id, prompt)
+        plan = await run_until_disconnect(request, _plan_flights.do(key, compute_plan))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM planning error: {e}")
 
@@ -590,46 +1170,35 @@ async def chat_plan(request: Request):
     if not prompt and not messages:
         raise HTTPException(status_code=400, detail="prompt or messages required")
 
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
+    await require_registry()
 
-    # 1. List all agents
-    try:
-        raw_agents = await _registry_canister.list_agents_async()
-        # Normalize agents
-        agents = py_serialize(raw_agents)
-        # Handle nested list structure if present (similar to normalize_serialized_manifest logic)
-        # list_agents_async usually returns [ [agent1, agent2, ...] ] or similar
-        normalized_agents = []
-        
-        # unwrapping logic
-        if isinstance(agents, list) and len(agents) > 0:
-            if isinstance(agents[0], list):
-                # [[a1, a2]]
-                flat = agents[0]
-            else:
-                flat = agents
-            
-            for ag in flat:
-                try:
-                    # use normalize_serialized_manifest to clean up each agent
-                    norm = normalize_serialized_manifest(ag)
-                    # unwrap optional fields for better LLM context
-                    norm["endpoint"] = norm.get("endpoint", [None])[0] if isinstance(norm.get("endpoint"), list) else norm.get("endpoint")
-                    norm["allowed_tools"] = norm.get("allowed_tools", [[]])[0] if isinstance(norm.get("allowed_tools"), list) and len(norm.get("allowed_tools")) > 0 and isinstance(norm.get("allowed_tools")[0], list) else norm.get("allowed_tools")
-                    
-                    normalized_agents.append(norm)
-                except Exception:
-                    continue
-        else:
-            normalized_agents = []
+    async def compute_plan():
+        # 1. List all agents
+        try:
+            normalized_agents = (await get_agent_list())["agents"]
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error listing agents: {e}")
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error listing agents: {e}")
+        # Don't offer agents whose circuit breaker is open to the planner
+        available_agents = get_health_monitor().filter_agents(normalized_agents)
+        if len(available_agents) < len(normalized_agents):
+            skipped = [a.get("id") for a in normalized_agents if a not in available_agents]
+            print(f"[orchestrator] excluding unhealthy agents from discovery: {skipped}")
+        normalized_agents = available_agents
+
+        # Only the top-k agents most relevant to the request go into the discovery prompt
+        if AGENT_SHORTLIST_ENABLED:
+            normalized_agents = await get_agent_index().shortlist(normalized_agents, prompt, messages)
 
-    # 2. Generate Plan
+        # 2. Generate Plan
+        return await discover_and_plan_async(normalized_agents, prompt, messages=messages)
+
+    # identical concurrent requests (same prompt + history) await the same discovery call
     try:
-        plan = discover_and_plan(normalized_agents, prompt, messages=messages)
+        key = request_key("/chat/plan", None, prompt, messages)
+        plan = await run_until_disconnect(request, _plan_flights.do(key, compute_plan))
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         print(traceback.format_exc())
@@ -642,8 +1211,7 @@ async def chat_plan(request: Request):
 async def register_agent(request: Request):
     payload = await request.json()
 
-    if _registry_canister is None:
-        raise HTTPException(status_code=500, detail="Canister not initialized.")
+    await require_registry()
 
     try:
         if "id" not in payload or "name" not in payload:
@@ -678,10 +1246,9 @@ async def register_agent(request: Request):
         health_url = payload.get("health_check") or (endpoint.rstrip("/") + "/health" if endpoint else None)
         if endpoint and health_url:
             try:
-                async with httpx.AsyncClient() as hc:
-                    r = await hc.get(health_url, timeout=3.0)
-                    if r.status_code != 200:
-                        raise HTTPException(status_code=400, detail=f"Agent health_check failed: {health_url} returned {r.status_code}")
+                r = await get_http_pool().get(health_url, timeout=3.0)
+                if r.status_code != 200:
+                    raise HTTPException(status_code=400, detail=f"Agent health_check failed: {health_url} returned {r.status_code}")
             except HTTPException:
                 raise
             except Exception as e:
@@ -732,6 +1299,14 @@ async def register_agent(request: Request):
 
 # call canister with dict
         res = await _registry_canister.register_agent_async(rec)
+        if res:
+            _manifest_cache.invalidate(rec["id"])
+            _agent_list_cache.clear()
+            if AGENT_SHORTLIST_ENABLED:
+                try:
+                    await get_agent_index().upsert_async([unwrap_manifest_opts(py_serialize(rec))])
+                except Exception as e:
+                    print(f"[orchestrator] warning: agent index update failed: {e}")
         return JSONResponse({"ok": bool(res)})
 
 # ... (rest unchanged)
@@ -747,6 +1322,8 @@ async def register_agent(request: Request):
         raise HTTPException(status_code=500, detail=f"Error registering agent: {e}")
 
 
+_startup["import_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 2)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
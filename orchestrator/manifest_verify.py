@@ -0,0 +1,156 @@
+# orchestrator/manifest_verify.py
+"""
+Memoized manifest verification.
+
+A manifest that verified once is remembered under (manifest id, signature or claimed
+manifest_hash, pubkey, content digest), so repeated /execute calls for the same manifest
+skip the Ed25519 verify (and the VerifyKey parse). Any change to the content, signature,
+claimed hash or key yields a new cache key and is verified again. Failures are never cached.
+
+verify_manifests_bulk() checks many manifests at once across a process pool; it is
+used at orchestrator startup to pre-verify the registry and by tools/manifest_signer.py.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache import TTLCache
+
+VERIFY_CACHE_MAX = int(os.getenv("VERIFY_CACHE_MAX", "4096"))
+VERIFY_CACHE_TTL = float(os.getenv("VERIFY_CACHE_TTL", "3600"))
+VERIFY_BULK_WORKERS = int(os.getenv("VERIFY_BULK_WORKERS", "0")) or None  # None -> os.cpu_count()
+# Below this many manifests a process pool costs more than it saves
+VERIFY_BULK_MIN_PARALLEL = int(os.getenv("VERIFY_BULK_MIN_PARALLEL", "32"))
+
+MODE_SIGNATURE = "signature"
+MODE_HASH = "hash"
+MODE_UNVERIFIED = "unverified"
+
+_verified = TTLCache(maxsize=VERIFY_CACHE_MAX, ttl=VERIFY_CACHE_TTL)
+
+
+class ManifestHashMismatch(ValueError):
+    pass
+
+
+def canonical_json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _signature_key(manifest: Dict[str, Any]) -> Tuple[Tuple, bytes]:
+    sig = manifest.get("signature")
+    pub = manifest.get("pubkey")
+    payload = canonical_json({k: v for k, v in manifest.items() if k not in ("signature", "pubkey")}).encode()
+    digest = hashlib.sha256(payload).hexdigest()
+    return (manifest.get("id"), sig, pub, digest), payload
+
+
+def _hash_key(manifest: Dict[str, Any]) -> Tuple[Tuple, str]:
+    tmp = {k: v for k, v in manifest.items() if k != "manifest_hash"}
+    computed = hashlib.sha256(canonical_json(tmp).encode("utf-8")).hexdigest()
+    # the claimed hash is part of the key: a hit means this exact claim already matched
+    return (manifest.get("id"), str(manifest.get("manifest_hash")), manifest.get("pubkey"), computed), computed
+
+
+def _check_signature(payload: bytes, sig_hex: str, pub_hex: str):
+    try:
+        from nacl.signing import VerifyKey
+        from nacl.encoding import HexEncoder
+        vk = VerifyKey(pub_hex, encoder=HexEncoder)
+        vk.verify(payload, bytes.fromhex(sig_hex))
+    except Exception as e:
+        raise ValueError(f"Manifest signature verification failed: {e}")
+
+
+def _verify(manifest: Dict[str, Any], use_cache: bool) -> Tuple[str, Optional[Tuple]]:
+    """Returns (mode, cache key); raises ValueError when verification fails."""
+    if manifest.get("signature") and manifest.get("pubkey"):
+        key, payload = _signature_key(manifest)
+        if not (use_cache and _verified.get(key)):
+            _check_signature(payload, manifest["signature"], manifest["pubkey"])
+        return MODE_SIGNATURE, key
+    if manifest.get("manifest_hash") and manifest.get("pubkey"):
+        key, computed = _hash_key(manifest)
+        if not (use_cache and _verified.get(key)) and computed != str(manifest.get("manifest_hash")):
+            raise ManifestHashMismatch("Manifest hash mismatch (on-chain manifest may be tampered).")
+        return MODE_HASH, key
+    return MODE_UNVERIFIED, None
+
+
+def verify_manifest(manifest: Dict[str, Any]) -> str:
+    """
+    Verify a normalized manifest, consulting the verification cache first.
+    Returns the mode that applied ("signature", "hash" or "unverified").
+    Raises ValueError (ManifestHashMismatch for the hash branch) when verification fails.
+    """
+    mode, key = _verify(manifest, use_cache=True)
+    if key is not None:
+        _verified.set(key, True)
+    return mode
+
+
+def _bulk_worker(manifest: Dict[str, Any]) -> Tuple[Any, str, Optional[Tuple], Optional[str]]:
+    try:
+        mode, key = _verify(manifest, use_cache=False)
+        return manifest.get("id"), mode, key, None
+    except Exception as e:
+        return manifest.get("id"), "failed", None, str(e)
+
+
+def _verify_batch(manifests: List[Dict[str, Any]]) -> List[Tuple]:
+    # top-level so it can be pickled into pool workers; never touches the cache
+    return [_bulk_worker(m) for m in manifests]
+
+
+def _chunks(items: List[Dict[str, Any]], workers: int) -> List[List[Dict[str, Any]]]:
+    size = max(1, len(items) // (workers * 4))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _record(outcomes: Iterable[Tuple], keys: Optional[Sequence[Any]] = None) -> Dict[Any, Dict[str, Any]]:
+    report = {}
+    for i, (manifest_id, mode, key, err) in enumerate(outcomes):
+        if key is not None:
+            _verified.set(key, True)
+        report[keys[i] if keys is not None else manifest_id] = {"ok": err is None, "mode": mode, "error": err}
+    return report
+
+
+def verify_manifests_bulk(manifests: Iterable[Dict[str, Any]], max_workers: Optional[int] = VERIFY_BULK_WORKERS,
+                          keys: Optional[Sequence[Any]] = None) -> Dict[Any, Dict[str, Any]]:
+    """
+    Verify many manifests in parallel across a process pool and warm the cache.
+    Returns {manifest_id: {"ok": bool, "mode": str, "error": str|None}}; pass keys (one per
+    manifest, e.g. file paths) to key the report by something other than the manifest id.
+    """
+    items: List[Dict[str, Any]] = list(manifests)
+    if len(items) < VERIFY_BULK_MIN_PARALLEL or max_workers == 1:
+        return _record(_verify_batch(items), keys)
+    workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_verify_batch, _chunks(items, workers)))
+    return _record((o for batch in results for o in batch), keys)
+
+
+async def verify_manifests_bulk_async(manifests: Iterable[Dict[str, Any]], max_workers: Optional[int] = VERIFY_BULK_WORKERS,
+                                      keys: Optional[Sequence[Any]] = None) -> Dict[Any, Dict[str, Any]]:
+    """Event-loop friendly verify_manifests_bulk: crypto runs off-loop, cache updates on-loop."""
+    items: List[Dict[str, Any]] = list(manifests)
+    loop = asyncio.get_running_loop()
+    if len(items) < VERIFY_BULK_MIN_PARALLEL or max_workers == 1:
+        return _record(await loop.run_in_executor(None, _verify_batch, items), keys)
+    workers = max_workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        results = await asyncio.gather(*(loop.run_in_executor(pool, _verify_batch, c) for c in _chunks(items, workers)))
+    finally:
+        pool.shutdown(wait=False)
+    return _record((o for batch in results for o in batch), keys)
+
+
+def verification_cache_stats() -> Dict[str, Any]:
+    return _verified.stats()
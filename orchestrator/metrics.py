@@ -0,0 +1,253 @@
+# orchestrator/metrics.py
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4) for the orchestrator, served at /metrics.
+
+No client library: counters, gauges and fixed-bucket histograms keyed by label tuples.
+Recording is a dict lookup plus a bisect, cheap enough to leave on in production.
+Intended for use from the event loop (no locking).
+
+Cache hit/miss counters are not recorded on the hot path; they are read from the
+caches' own stats() at scrape time via register_collector().
+"""
+
+import abc
+import bisect
+import math
+import time
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets (seconds) spanning in-process work (~0.5 ms) up to slow LLM/canister calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _fmt(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return repr(v)
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(d: Dict[str, str]) -> str:
+    if not d:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in d.items()) + "}"
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        ...
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        ...
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for key, child in self._children.items():
+            yield self.name + "_total", dict(zip(self.labelnames, key)), child.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self.labels().dec(amount)
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def samples(self):
+        for key, child in self._children.items():
+            yield self.name, dict(zip(self.labelnames, key)), child.value
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._t0)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self):
+        for key, child in self._children.items():
+            base = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += n
+                yield self.name + "_bucket", dict(base, le=_fmt(bound)), cumulative
+            yield self.name + "_sum", base, child.sum
+            yield self.name + "_count", base, child.count
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _get_or_create(self, cls, name, help, labelnames, **kw):
+        m = self._metrics.get(name)
+        if m is None:
+            m = self._metrics[name] = cls(name, help, labelnames, **kw)
+        return m
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def register_collector(self, fn: Collector):
+        """fn() yields (name, help, type, [(labels, value), ...]) families, evaluated at scrape time."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics.values():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        for fn in self._collectors:
+            try:
+                families = list(fn())
+            except Exception as e:
+                lines.append(f"# collector error: {_escape(str(e))}")
+                continue
+            for name, help, kind, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(float(value))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ---- orchestrator metrics ----
+STAGE_SECONDS = REGISTRY.histogram(
+    "agenthub_stage_duration_seconds",
+    "Latency of orchestrator pipeline stages (registry_fetch, normalize, verify, context_fetch, audit_write).",
+    ("stage",))
+LLM_SECONDS = REGISTRY.histogram(
+    "agenthub_llm_request_duration_seconds",
+    "Latency of uncached LLM planning calls.",
+    ("kind", "provider", "model"))
+TOOL_STEP_SECONDS = REGISTRY.histogram(
+    "agenthub_tool_step_duration_seconds",
+    "Latency of plan steps executed by the runner.",
+    ("tool", "status"))
+HTTP_SECONDS = REGISTRY.histogram(
+    "agenthub_http_request_duration_seconds",
+    "Orchestrator HTTP request latency (until response headers for streaming routes).",
+    ("route", "method", "status"))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "agenthub_http_requests_in_flight",
+    "Orchestrator HTTP requests currently being handled.")
+ERRORS = REGISTRY.counter(
+    "agenthub_errors",
+    "Errors by stage.",
+    ("stage",))
@@ -0,0 +1,292 @@
+# orchestrator/plan_cache.py
+"""
+Plan cache for plan_with_llm_async / discover_and_plan_async.
+
+Keyed by (kind, normalized prompt, manifest content hash, context snippet ids,
+conversation history hash, provider, model). Plans are stored as JSON text so every
+hit hands back a private copy (callers append steps to plans).
+
+Backends (PLAN_CACHE_BACKEND):
+  - memory : in-process LRU with TTL (default)
+  - sqlite : on-disk SQLite file (PLAN_CACHE_PATH) so plans survive restarts
+  - none   : disabled
+"""
+
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import TTLCache
+
+PLAN_CACHE_BACKEND = os.getenv("PLAN_CACHE_BACKEND", "memory").lower()
+PLAN_CACHE_TTL = float(os.getenv("PLAN_CACHE_TTL", "600"))
+PLAN_CACHE_MAX = int(os.getenv("PLAN_CACHE_MAX", "2048"))
+PLAN_CACHE_PATH = os.getenv("PLAN_CACHE_PATH", str(os.path.join(os.path.dirname(__file__), "plan_cache.sqlite3")))
+
+_WS = re.compile(r"\s+")
+
+
+def _canonical_json(obj: Any) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def normalize_prompt(prompt: str) -> str:
+    return _WS.sub(" ", str(prompt or "")).strip().lower()
+
+
+def content_hash(obj: Any) -> str:
+    return hashlib.sha256(_canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+def _snippet_ids(context_snippets: Optional[List[Dict[str, Any]]]) -> List[str]:
+    ids = []
+    for s in context_snippets or []:
+        sid = s.get("id") if isinstance(s, dict) else None
+        # fall back to the snippet text when the search backend returned no id
+        ids.append(str(sid) if sid else content_hash(s)[:16])
+    return ids
+
+
+def plan_cache_key(kind: str, prompt: str, manifest: Any, context_snippets: Optional[List[Dict[str, Any]]],
+                   provider: str, model: Optional[str], messages: Optional[List[Dict[str, Any]]] = None) -> str:
+    parts = {
+        "kind": kind,
+        "prompt": normalize_prompt(prompt),
+        "manifest": content_hash(manifest),
+        "snippets": _snippet_ids(context_snippets),
+        "history": content_hash(messages) if messages else None,
+        "provider": provider,
+        "model": model,
+    }
+    return content_hash(parts)
+
+
+class PlanCache(abc.ABC):
+    """Backend interface. Values are plan JSON strings; get returns (plan_json, created_at)."""
+    backend = "none"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # hits dropped because the cached plan no longer validated
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        ...
+
+    @abc.abstractmethod
+    def set(self, key: str, plan_json: str):
+        ...
+
+    @abc.abstractmethod
+    def invalidate(self, key: str):
+        ...
+
+    @abc.abstractmethod
+    def clear(self):
+        ...
+
+    @abc.abstractmethod
+    def size(self) -> int:
+        ...
+
+    def discard_stale(self, key: str):
+        """Drop a hit the caller rejected (the cached plan no longer validates) and count it."""
+        self.stale += 1
+        self.invalidate(key)
+
+    async def aget(self, key: str) -> Optional[Tuple[str, float]]:
+        return self.get(key)
+
+    async def aset(self, key: str, plan_json: str):
+        self.set(key, plan_json)
+
+    async def adiscard_stale(self, key: str):
+        self.discard_stale(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryPlanCache(PlanCache):
+    backend = "memory"
+
+    def __init__(self, maxsize: int = PLAN_CACHE_MAX, ttl: float = PLAN_CACHE_TTL):
+        super().__init__()
+        self._lru = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        hit = self._lru.get(key)
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    def set(self, key, plan_json):
+        self._lru.set(key, (plan_json, time.time()))
+
+    def invalidate(self, key):
+        self._lru.invalidate(key)
+
+    def clear(self):
+        self._lru.clear()
+
+    def size(self):
+        return len(self._lru)
+
+    def stats(self):
+        st = super().stats()
+        st.update({"maxsize": self._lru.maxsize, "ttl": self._lru.ttl, "evictions": self._lru.evictions})
+        return st
+
+
+class SqlitePlanCache(PlanCache):
+    """
+    On-disk cache; LRU by last access. Blocking sqlite calls run on a worker thread.
+    Hits only note the access time in memory; the pending touches are written in the
+    same transaction as the next set (the only place LRU order matters) or on close.
+    """
+    backend = "sqlite"
+
+    def __init__(self, path: str = PLAN_CACHE_PATH, maxsize: int = PLAN_CACHE_MAX, ttl: float = PLAN_CACHE_TTL):
+        super().__init__()
+        self.path = path
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = float(ttl)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}  # key -> last hit not yet written to last_access
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plans ("
+                " key TEXT PRIMARY KEY, plan TEXT NOT NULL,"
+                " created_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS plans_last_access ON plans(last_access)")
+            self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT plan, created_at, expires_at FROM plans WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[2] <= now:
+                if row is not None:
+                    self._touched.pop(key, None)
+                    self._conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._touched[key] = now
+        self.hits += 1
+        return row[0], row[1]
+
+    def set(self, key, plan_json):
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (key, plan, created_at, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, plan_json, now, now + self.ttl, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+            if count > self.maxsize:
+                self._conn.execute("DELETE FROM plans WHERE expires_at <= ?", (now,))
+                over = self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0] - self.maxsize
+                if over > 0:
+                    self._conn.execute(
+                        "DELETE FROM plans WHERE key IN (SELECT key FROM plans ORDER BY last_access ASC LIMIT ?)", (over,)
+                    )
+                    self.evictions += over
+            self._conn.commit()
+
+    def _flush_touches(self):
+        """Write pending hit times to last_access (caller holds the lock and commits)."""
+        if self._touched:
+            self._conn.executemany("UPDATE plans SET last_access = ? WHERE key = ?",
+                                   [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM plans")
+            self._conn.commit()
+
+    def size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, plan_json):
+        await asyncio.to_thread(self.set, key, plan_json)
+
+    async def adiscard_stale(self, key):
+        await asyncio.to_thread(self.discard_stale, key)
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+    def stats(self):
+        st = super().stats()
+        st.update({"path": self.path, "maxsize": self.maxsize, "ttl": self.ttl, "evictions": self.evictions})
+        return st
+
+
+_plan_cache: Optional[PlanCache] = None
+_plan_cache_ready = False
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """Process-wide plan cache selected by PLAN_CACHE_BACKEND (None when disabled)."""
+    global _plan_cache, _plan_cache_ready
+    if not _plan_cache_ready:
+        _plan_cache_ready = True
+        if PLAN_CACHE_BACKEND == "sqlite":
+            try:
+                _plan_cache = SqlitePlanCache()
+            except Exception as e:
+                print(f"[orchestrator] warning: sqlite plan cache unavailable ({e}); using in-memory cache")
+                _plan_cache = MemoryPlanCache()
+        elif PLAN_CACHE_BACKEND in ("memory", "mem", "lru"):
+            _plan_cache = MemoryPlanCache()
+        else:
+            _plan_cache = None
+    return _plan_cache
+
+
+def set_plan_cache(cache: Optional[PlanCache]):
+    """Swap the process-wide cache (tests, or a custom backend)."""
+    global _plan_cache, _plan_cache_ready
+    _plan_cache, _plan_cache_ready = cache, True
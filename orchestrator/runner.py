@@ -1,11 +1,18 @@
 # orchestrator/runner.py
 import asyncio
+import functools
 import json
 import hashlib
-from typing import Any, Dict, List, Optional
+import os
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
 import httpx
-from jinja2 import Environment, StrictUndefined
+from jinja2 import Environment, StrictUndefined, Template, TemplateSyntaxError, nodes
 from datetime import datetime
+from .http_pool import get_http_pool
+from .health_monitor import get_health_monitor
+from .metrics import TOOL_STEP_SECONDS
+from .tracing import span as trace_span, inject as inject_trace
 
 # If your call_mcp_tool is in main.py, import it. Otherwise copy the implementation here.
 # from main import call_mcp_tool, MCP_ENDPOINT
@@ -13,6 +20,14 @@ from datetime import datetime
 
 env = Environment(undefined=StrictUndefined)  # fail fast if template refers to missing keys
 
+# Max concurrently running independent plan steps (1 = sequential, the default; opt in to parallelism)
+RUNNER_MAX_PARALLEL = int(os.getenv("RUNNER_MAX_PARALLEL", "1"))
+# Tools without side effects. With abort_on_error every other tool is an ordering barrier:
+# it starts only after all earlier steps finished, so nothing after a failed step has executed.
+RUNNER_READONLY_TOOLS = frozenset(t.strip() for t in os.getenv("RUNNER_READONLY_TOOLS", "search_docs,answer_user").split(",") if t.strip())
+# Compiled-template LRU size (keyed by template source)
+TEMPLATE_CACHE_SIZE = int(os.getenv("TEMPLATE_CACHE_SIZE", "512"))
+
 def canonical_json(obj: Any) -> str:
     return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
 
@@ -20,10 +35,10 @@ def compute_receipt(run_log: Dict[str, Any]) -> str:
     c = canonical_json(run_log)
     return hashlib.sha256(c.encode("utf-8")).hexdigest()
 
-async def _call_tool_with_client(client: httpx.AsyncClient, base_url: str, tool: str, args: dict):
+async def _call_tool_with_client(client: httpx.AsyncClient, base_url: str, tool: str, args: dict, timeout: float = 30.0):
     url = f"{base_url}/tool/{tool}"
     try:
-        resp = await client.post(url, json=args, timeout=30.0)
+        resp = await client.post(url, json=args, headers=inject_trace(), timeout=timeout)
         resp.raise_for_status()
         return resp.json()
     except httpx.ConnectError as e:
@@ -34,46 +49,185 @@ async def _call_tool_with_client(client: httpx.AsyncClient, base_url: str, tool:
     except Exception as e:
         raise RuntimeError(f"Error calling MCP tool {tool}: {e}")
 
+async def _call_agent_guarded(client, base_url: str, args: dict, timeout: float = 30.0):
+    """call_agent through the MCP proxy, short-circuited while the agent's circuit breaker is open."""
+    monitor = get_health_monitor()
+    endpoint = args.get("endpoint")
+    if not monitor.allow(endpoint):
+        raise RuntimeError(f"Agent endpoint {endpoint} is unhealthy (circuit open); call skipped")
+    try:
+        result = await _call_tool_with_client(client, base_url, "call_agent", args, timeout=timeout)
+    except Exception as e:
+        monitor.record_failure(endpoint, str(e))
+        raise
+    monitor.record_success(endpoint)
+    return result
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(source: str) -> Template:
+    """Compiled Jinja template for a source string (bounded LRU shared by all runs)."""
+    return env.from_string(source)
+
+def _is_template(value: str) -> bool:
+    return "{{" in value and "}}" in value
+
+class _TemplateLeaf:
+    __slots__ = ("source",)
+
+    def __init__(self, source: str):
+        self.source = source
+
+class _DictNode:
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+class _ListNode:
+    __slots__ = ("items",)
+
+    def __init__(self, items):
+        self.items = items
+
+_NODE_TYPES = (_TemplateLeaf, _DictNode, _ListNode)
+
+class CompiledArgs:
+    """
+    Result of the one-time precompile pass over a step's args: a render tree in which
+    static subtrees are kept as plain values (rendering returns them without walking),
+    plus the template sources found (used for dependency analysis).
+    """
+    __slots__ = ("tree", "sources")
+
+    def __init__(self, tree: Any, sources: List[str]):
+        self.tree = tree
+        self.sources = sources
+
+    @property
+    def is_static(self) -> bool:
+        return not self.sources
+
+def _precompile(value: Any, sources: List[str]) -> Any:
+    if isinstance(value, str):
+        if _is_template(value):
+            sources.append(value)
+            return _TemplateLeaf(value)
+        return value
+    if isinstance(value, dict):
+        items = [(k, _precompile(v, sources)) for k, v in value.items()]
+        if any(isinstance(v, _NODE_TYPES) for _, v in items):
+            return _DictNode(items)
+        return value
+    if isinstance(value, list):
+        items = [_precompile(x, sources) for x in value]
+        if any(isinstance(x, _NODE_TYPES) for x in items):
+            return _ListNode(items)
+        return value
+    return value  # numbers, booleans, None
+
+def precompile_args(raw_args: Any) -> CompiledArgs:
+    """Walk raw_args once and record which leaves are templates."""
+    sources: List[str] = []
+    return CompiledArgs(_precompile(raw_args, sources), sources)
+
+def _render(node: Any, context: Dict[str, Any]) -> Any:
+    if isinstance(node, _TemplateLeaf):
+        return compile_template(node.source).render(**context)
+    if isinstance(node, _DictNode):
+        return {k: _render(v, context) for k, v in node.items}
+    if isinstance(node, _ListNode):
+        return [_render(x, context) for x in node.items]
+    return node  # static subtree
+
+def render_compiled(compiled: CompiledArgs, context: Dict[str, Any]) -> Any:
+    return _render(compiled.tree, context)
+
 def render_args_template(raw_args: Any, context: Dict[str, Any]) -> Any:
     """
     Recursively render Jinja2 templates in raw_args (which may be dict/list/str).
     Strings are treated as templates if they contain '{{' and '}}'.
     """
-    if isinstance(raw_args, str):
-        if "{{" in raw_args and "}}" in raw_args:
-            template = env.from_string(raw_args)
-            return template.render(**context)
-        else:
-            return raw_args
-    if isinstance(raw_args, dict):
-        out = {}
-        for k, v in raw_args.items():
-            out[k] = render_args_template(v, context)
-        return out
-    if isinstance(raw_args, list):
-        return [render_args_template(x, context) for x in raw_args]
-    return raw_args  # numbers, booleans, None
+    return render_compiled(precompile_args(raw_args), context)
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _template_refs(source: str, idx: int) -> FrozenSet[int]:
+    """
+    Indices of earlier steps a template reads: steps[<int>] -> that step, `last` -> idx-1,
+    any other use of `steps` (loops, filters, negative/dynamic index) -> every earlier step.
+    """
+    try:
+        tree = env.parse(source)
+    except TemplateSyntaxError:
+        return frozenset(range(idx))  # rendering will fail anyway; keep sequential semantics
+    refs: Set[int] = set()
+    indexed = set()
+    for node in tree.find_all(nodes.Getitem):
+        if (isinstance(node.node, nodes.Name) and node.node.name == "steps"
+                and isinstance(node.arg, nodes.Const) and type(node.arg.value) is int):
+            j = node.arg.value
+            if j < 0:
+                refs.update(range(idx))
+            elif j < idx:
+                refs.add(j)
+            indexed.add(id(node.node))
+    for name in tree.find_all(nodes.Name):
+        if name.name == "last" and idx > 0:
+            refs.add(idx - 1)
+        elif name.name == "steps" and id(name) not in indexed:
+            refs.update(range(idx))
+    return frozenset(refs)
+
+def plan_dependencies(steps: List[Dict[str, Any]], compiled: Optional[List[CompiledArgs]] = None) -> List[Set[int]]:
+    """For each step, the set of earlier step indices its args templates depend on."""
+    if compiled is None:
+        compiled = [precompile_args(step.get("args", {}) or {}) for step in steps]
+    deps = []
+    for idx, c in enumerate(compiled):
+        d: Set[int] = set()
+        for src in c.sources:
+            d |= _template_refs(src, idx)
+        deps.append(d)
+    return deps
 
 async def execute_plan(plan: Dict[str, Any],
                        manifest: Dict[str, Any],
                        prompt: str,
                        user: str,
-                       client: httpx.AsyncClient,
+                       client: Optional[Any],
                        mcp_endpoint: str,
                        abort_on_error: bool = True,
-                       timeout_per_tool: int = 30) -> Dict[str, Any]:
+                       timeout_per_tool: int = 30,
+                       max_parallel: Optional[int] = None,
+                       on_event: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
-    Execute the given plan sequentially.
+    Execute the given plan as a DAG: a step waits only for the earlier steps its Jinja
+    args reference (steps[i] / last); independent steps run concurrently, at most
+    max_parallel at a time (RUNNER_MAX_PARALLEL; 1 = strictly sequential).
+    Steps are recorded in plan order with the same templating context as a sequential run.
+    With abort_on_error, side-effecting tools (not in RUNNER_READONLY_TOOLS) also wait for
+    every earlier step, and every step after the first failing index is recorded as
+    "skipped" (read-only steps that already ran are cancelled or discarded), so steps and
+    receipt are identical to a sequential run whatever the schedule.
+    client may be an httpx.AsyncClient or the shared HttpClientManager; None uses the
+    process-wide pool from http_pool.
+    on_event, if given, is called synchronously with {"event": "step_started"|"step_finished"|
+    "step_failed", "index", "tool", ...} as each step progresses (used by /execute/stream).
     Returns run_result = {
       "manifest_id": ...,
       "prompt": ...,
       "user": ...,
       "started_at": "...",
-      "steps": [ { "index":0, "tool": "...", "args": {...}, "status":"ok"/"error", "result": {...}, "error":"message" } ],
+      "steps": [ { "index":0, "tool": "...", "args": {...}, "status":"ok"/"error"/"skipped", "result": {...}, "error":"message" } ],
       "ended_at": "...",
       "receipt": "sha256..."
     }
     """
+    if client is None:
+        client = get_http_pool()
+    if max_parallel is None:
+        max_parallel = RUNNER_MAX_PARALLEL
+    max_parallel = max(1, int(max_parallel))
+
     run = {
         "manifest_id": manifest.get("id"),
         "prompt": prompt,
@@ -82,72 +236,121 @@ async def execute_plan(plan: Dict[str, Any],
         "steps": [],
     }
 
-    # context available to templates: steps (list), last (last step's result), manifest, prompt, user
-    context = {
-        "steps": [],  # will be filled with step outputs as executed
-        "last": {},
-        "manifest": manifest,
-        "prompt": prompt,
-        "user": user,
-    }
-
     steps = plan.get("steps", [])
-    for idx, step in enumerate(steps):
-        tool = step.get("tool")
-        raw_args = step.get("args", {}) or {}
-        step_record = {"index": idx, "tool": tool, "args": raw_args, "status": "pending", "result": None, "error": None}
-        run["steps"].append(step_record)
+    n = len(steps)
+    # one-time precompile pass: later renders skip static subtrees entirely
+    compiled = [precompile_args(step.get("args", {}) or {}) for step in steps]
+    if max_parallel == 1:
+        deps = [{idx - 1} if idx else set() for idx in range(n)]
+    else:
+        deps = plan_dependencies(steps, compiled)
 
-        try:
-            # Render args with current context
-            rendered_args = render_args_template(raw_args, context)
+    # Per-step templating context entries ({"tool","args","result"}), filled as steps finish
+    outputs: List[Optional[Dict[str, Any]]] = [None] * n
+    records: List[Optional[Dict[str, Any]]] = [None] * n
+    done = [asyncio.Event() for _ in range(n)]
+    sem = asyncio.Semaphore(max_parallel)
+    state = {"failed_at": None}
+    tasks: List[asyncio.Task] = []
 
-            # Convert numeric strings that should be numbers? Leave as is - tools should accept JSON text types.
-            # Call tool via HTTP client
+    def _emit(event: str, **data):
+        if on_event is not None:
             try:
-                if tool == "answer_user":
-                    # Local tool: just return the answer
-                    result = {"content": [{"type": "text", "text": rendered_args.get("answer", "")}]}
-                else:
-                    result = await _call_tool_with_client(client, mcp_endpoint, tool, rendered_args)
+                on_event({"event": event, **data})
             except Exception as e:
-                raise
-
-            # Record result
-            step_record["args"] = rendered_args
-            step_record["status"] = "ok"
-            step_record["result"] = result
-
-            # Update context: push simplified representation to steps for templating
-            # Keep entire result under steps[idx] so templates can reference it
-            simple = {
-                "tool": tool,
-                "args": rendered_args,
-                "result": result
-            }
-            context["steps"].append(simple)
-            context["last"] = simple
-
-        except Exception as e:
-            err_msg = str(e)
-            step_record["status"] = "error"
-            step_record["error"] = err_msg
-            step_record["result"] = None
-            # If abort_on_error, stop execution and produce receipt of what ran so far
-            if abort_on_error:
-                run["ended_at"] = datetime.utcnow().isoformat() + "Z"
-                # compute receipt for partial run
-                run_log_for_receipt = {k: run[k] for k in ("manifest_id","prompt","user","steps","started_at","ended_at")}
-                receipt = compute_receipt(run_log_for_receipt)
-                run["receipt"] = receipt
-                return run
-            else:
-                # continue to next step with error recorded
-                context["steps"].append({"tool": tool, "args": raw_args, "result": {"error": err_msg}})
-                context["last"] = {"tool": tool, "args": raw_args, "result": {"error": err_msg}}
-                continue
+                print(f"[runner] warning: on_event callback failed: {e}")
+
+    def _aborted_before(idx: int) -> bool:
+        return abort_on_error and state["failed_at"] is not None and state["failed_at"] < idx
+
+    def _context(idx: int) -> Dict[str, Any]:
+        # context available to templates: steps (list), last (last step's result), manifest, prompt, user
+        # Slots for steps this one does not depend on may still be running; they are not referenced.
+        prior = [outputs[j] if outputs[j] is not None else {} for j in range(idx)]
+        return {
+            "steps": prior,
+            "last": prior[-1] if prior else {},
+            "manifest": manifest,
+            "prompt": prompt,
+            "user": user,
+        }
+
+    async def _run_step(idx: int, step: Dict[str, Any]):
+        try:
+            for j in sorted(deps[idx]):
+                await done[j].wait()
+            if abort_on_error and max_parallel > 1 and step.get("tool") not in RUNNER_READONLY_TOOLS:
+                # side effects: must not run if any earlier step is going to fail
+                for j in range(idx):
+                    await done[j].wait()
+            if _aborted_before(idx):
+                return
+            async with sem:
+                if _aborted_before(idx):
+                    return
+                tool = step.get("tool")
+                raw_args = step.get("args", {}) or {}
+                step_record = {"index": idx, "tool": tool, "args": raw_args, "status": "pending", "result": None, "error": None}
+                records[idx] = step_record
+                _emit("step_started", index=idx, tool=tool)
+                started = time.perf_counter()
+                try:
+                    # Render args with current context
+                    rendered_args = render_compiled(compiled[idx], _context(idx))
+
+                    # Call tool via HTTP client (in a step span, so MCP / agent spans nest under it)
+                    with trace_span(f"step {tool}", index=idx, tool=tool):
+                        if tool == "answer_user":
+                            # Local tool: just return the answer
+                            result = {"content": [{"type": "text", "text": rendered_args.get("answer", "")}]}
+                        elif tool == "call_agent":
+                            result = await _call_agent_guarded(client, mcp_endpoint, rendered_args, timeout=timeout_per_tool)
+                        else:
+                            result = await _call_tool_with_client(client, mcp_endpoint, tool, rendered_args, timeout=timeout_per_tool)
+
+                    # Record result
+                    step_record["args"] = rendered_args
+                    step_record["status"] = "ok"
+                    step_record["result"] = result
+                    # Keep entire result under steps[idx] so templates can reference it
+                    outputs[idx] = {"tool": tool, "args": rendered_args, "result": result}
+                    TOOL_STEP_SECONDS.labels(tool, "ok").observe(time.perf_counter() - started)
+                    _emit("step_finished", index=idx, tool=tool, status="ok", args=rendered_args, result=result)
+                except asyncio.CancelledError:
+                    # read-only step started concurrently with an earlier step that failed (recorded as skipped)
+                    TOOL_STEP_SECONDS.labels(tool, "cancelled").observe(time.perf_counter() - started)
+                    _emit("step_failed", index=idx, tool=tool, status="cancelled", error="cancelled")
+                    raise
+                except Exception as e:
+                    err_msg = str(e)
+                    step_record["status"] = "error"
+                    step_record["error"] = err_msg
+                    step_record["result"] = None
+                    # continue-on-error: later steps see the error in their context
+                    outputs[idx] = {"tool": tool, "args": raw_args, "result": {"error": err_msg}}
+                    TOOL_STEP_SECONDS.labels(tool, "error").observe(time.perf_counter() - started)
+                    _emit("step_failed", index=idx, tool=tool, status="error", error=err_msg)
+                    if abort_on_error:
+                        if state["failed_at"] is None or idx < state["failed_at"]:
+                            state["failed_at"] = idx
+                        # a sequential run would never have started later steps
+                        for later in tasks[idx + 1:]:
+                            later.cancel()
+        finally:
+            done[idx].set()
+
+    tasks.extend(asyncio.create_task(_run_step(idx, step)) for idx, step in enumerate(steps))
+    await asyncio.gather(*tasks, return_exceptions=True)
 
+    # Same shape as a sequential run: everything after the first failing index is skipped
+    failed_at = state["failed_at"] if abort_on_error else None
+    for i in range(n):
+        if records[i] is None or (failed_at is not None and i > failed_at):
+            records[i] = {"index": i, "tool": steps[i].get("tool"), "args": steps[i].get("args", {}) or {},
+                          "status": "skipped", "result": None, "error": f"skipped: step {failed_at} failed"}
+    run["steps"] = records
     run["ended_at"] = datetime.utcnow().isoformat() + "Z"
     run_log_for_receipt = {k: run[k] for k in ("manifest_id","prompt","user","steps","started_at","ended_at")}
     run["receipt"] = compute_receipt(run_log_for_receipt)
+    run["dag"] = {"max_parallel": max_parallel, "dependencies": [sorted(d) for d in deps]}
     return run
@@ -1,5 +1,5 @@
 # orchestrator/schemas.py
-from jsonschema import Draft7Validator, ValidationError
+# jsonschema is imported on first validation (or by the startup prewarm), not at import time
 
 PLAN_SCHEMA = {
     "type": "object",
@@ -22,13 +22,23 @@ PLAN_SCHEMA = {
     "additionalProperties": True
 }
 
+_plan_validator = None
+
+def plan_validator():
+    """Draft7Validator for PLAN_SCHEMA, built once."""
+    global _plan_validator
+    if _plan_validator is None:
+        from jsonschema import Draft7Validator
+        _plan_validator = Draft7Validator(PLAN_SCHEMA)
+    return _plan_validator
+
 def validate_plan_schema(plan: dict):
     """
     Validate plan dict against PLAN_SCHEMA.
     Raises ValidationError if invalid.
     """
-    validator = Draft7Validator(PLAN_SCHEMA)
-    errors = sorted(validator.iter_errors(plan), key=lambda e: e.path)
+    errors = sorted(plan_validator().iter_errors(plan), key=lambda e: e.path)
     if errors:
+        from jsonschema import ValidationError
         msg = "; ".join([f"{'/'.join(map(str, e.path))}: {e.message}" for e in errors])
         raise ValidationError(msg)
@@ -0,0 +1,72 @@
+# orchestrator/singleflight.py
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one in-flight computation instead of each
+running its own search_docs + LLM call. The computation runs as a separate task so
+one caller disconnecting does not cancel it for the others; it is cancelled only
+when every waiter has gone away. Results are deep-copied per caller.
+"""
+
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .plan_cache import content_hash, normalize_prompt
+
+
+def request_key(endpoint: str, manifest_id: Optional[str], prompt: str, messages: Any = None) -> tuple:
+    """(endpoint, manifest_id, normalized prompt, message history hash)."""
+    return (endpoint, manifest_id, normalize_prompt(prompt), content_hash(messages) if messages else None)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.leaders = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            self.leaders += 1
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+        else:
+            self.coalesced += 1
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # every caller gave up (e.g. all clients disconnected)
+                flight.task.cancel()
+                self.cancelled += 1
+        return copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executed": self.leaders,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "in_flight": len(self._flights),
+            "waiters": sum(f.waiters for f in self._flights.values()),
+        }
@@ -0,0 +1,54 @@
+# orchestrator/test_agent_index.py
+import asyncio
+
+from orchestrator.agent_index import AgentIndex, HashingEmbedder, agent_text
+
+AGENTS = [
+    {"id": "email_agent", "name": "Email Agent", "description": "Send emails to recipients", "allowed_tools": [["send_email"]]},
+    {"id": "web_search_agent", "name": "Web Search", "description": "Search the web for latest news", "allowed_tools": ["call_api"]},
+    {"id": "summarise_agent", "name": "Summariser", "description": "Summarize long documents into bullet points"},
+    {"id": "dev_agent", "name": "Dev Agent", "description": "Create tickets and review code", "allowed_tools": ["create_ticket"]},
+]
+
+
+def test_agent_text_includes_tools():
+    assert "send_email" in agent_text(AGENTS[0])
+    assert "Summarize" in agent_text(AGENTS[2])
+
+
+def test_shortlist_returns_most_relevant_agents():
+    idx = AgentIndex(embedder=HashingEmbedder(), k=2, threshold=0.05)
+    picked = asyncio.run(idx.shortlist(AGENTS, "please send an email to bob"))
+    assert picked[0]["id"] == "email_agent"
+    assert len(picked) <= 2
+    assert idx.stats()["last_query"]["candidates"] == 4
+
+    picked = asyncio.run(idx.shortlist(AGENTS, "latest news on the web"))
+    assert [a["id"] for a in picked][0] == "web_search_agent"
+
+
+def test_shortlist_never_comes_back_empty():
+    idx = AgentIndex(embedder=HashingEmbedder(), k=2, threshold=0.99)
+    picked = asyncio.run(idx.shortlist(AGENTS, "send an email"))
+    assert [a["id"] for a in picked] == ["email_agent"]  # below threshold: top-k by score instead
+    assert idx.stats()["last_query"]["fallback"] == "top_k"
+
+    picked = asyncio.run(idx.shortlist(AGENTS, "zzz qqq"))  # nothing matches at all: capped at k
+    assert [a["id"] for a in picked] == ["email_agent", "web_search_agent"]
+    assert idx.stats()["last_query"]["fallback"] == "first_k"
+
+
+def test_small_registry_is_passed_through():
+    idx = AgentIndex(embedder=HashingEmbedder(), k=10)
+    assert asyncio.run(idx.shortlist(AGENTS, "anything")) is AGENTS
+    assert idx.stats()["size"] == 0
+
+
+def test_sync_only_reembeds_changed_agents():
+    idx = AgentIndex(embedder=HashingEmbedder())
+    assert idx.sync(AGENTS) == 4
+    assert idx.sync(AGENTS) == 0
+    changed = [dict(AGENTS[0], description="Send and read emails")] + AGENTS[1:3]
+    assert idx.sync(changed) == 1
+    st = idx.stats()
+    assert st["size"] == 3 and st["embedded"] == 5 and st["rebuilds"] == 2
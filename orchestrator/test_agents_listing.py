@@ -0,0 +1,54 @@
+# orchestrator/test_agents_listing.py
+from fastapi.testclient import TestClient
+
+from orchestrator import main
+from orchestrator.cache import TTLCache
+
+
+def _setup(monkeypatch):
+    agents = {}
+    for i in range(5):
+        agents[f"agent_{i}"] = {
+            "id": f"agent_{i}", "name": ("Search " if i % 2 else "Mail ") + str(i),
+            "description": "d", "developer": "dev-a" if i < 3 else "dev-b",
+            "endpoint": [f"http://127.0.0.1:{7000 + i}"], "allowed_tools": [["search_docs"] if i % 2 else ["send_email"]],
+        }
+    monkeypatch.setattr(main, "MOCK_AGENTS", agents)
+    monkeypatch.setattr(main, "_registry_canister", main.MockRegistry())
+    monkeypatch.setattr(main, "_agent_list_cache", TTLCache(maxsize=1, ttl=60))
+    return TestClient(main.app), agents
+
+
+def test_cursor_pagination_filters_and_projection(monkeypatch):
+    client, _ = _setup(monkeypatch)
+    first = client.get("/agents", params={"limit": 2}).json()
+    assert [a["id"] for a in first["agents"]] == ["agent_0", "agent_1"]
+    assert first["total"] == 5 and first["next_cursor"]
+    second = client.get("/agents", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    third = client.get("/agents", params={"limit": 2, "cursor": second["next_cursor"]}).json()
+    assert [a["id"] for a in second["agents"] + third["agents"]] == ["agent_2", "agent_3", "agent_4"]
+    assert third["next_cursor"] is None
+
+    by_tool = client.get("/agents", params={"tool": "search_docs", "developer": "dev-a"}).json()
+    assert [a["id"] for a in by_tool["agents"]] == ["agent_1"]
+    by_name = client.get("/agents", params={"name_prefix": "mail", "fields": "name"}).json()
+    assert by_name["agents"][0] == {"id": "agent_0", "name": "Mail 0"}
+    assert client.get("/agents", params={"limit": 0}).status_code == 400
+
+
+def test_etag_revalidation_and_invalidation(monkeypatch):
+    client, agents = _setup(monkeypatch)
+    resp = client.get("/agents", params={"limit": 2})
+    etag = resp.headers["etag"]
+    assert etag.startswith('"') and resp.headers["cache-control"] == "no-cache"
+
+    not_modified = client.get("/agents", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    # a different query has a different ETag
+    assert client.get("/agents", params={"limit": 3}).headers["etag"] != etag
+
+    agents["agent_9"] = {"id": "agent_9", "name": "New", "allowed_tools": []}
+    main._agent_list_cache.clear()  # what /register does after a successful registration
+    changed = client.get("/agents", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert changed.json()["total"] == 6
@@ -0,0 +1,155 @@
+# orchestrator/test_audit_writer.py
+import asyncio
+import json
+
+from orchestrator.audit_writer import AuditWriter
+
+
+class BatchRegistry:
+    def __init__(self, fail_times=0):
+        self.calls = []
+        self.fail_times = fail_times
+
+    async def write_audit_batch_async(self, records):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("replica unavailable")
+        self.calls.append(list(records))
+        return True
+
+
+class SingleRegistry:
+    def __init__(self, fail_once=()):
+        self.calls = []
+        self.fail_once = set(fail_once)
+        self.in_flight = self.max_in_flight = 0
+
+    async def write_audit_async(self, manifest_id, user, receipt):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if receipt in self.fail_once:
+            self.fail_once.discard(receipt)
+            raise RuntimeError("replica unavailable")
+        self.calls.append((manifest_id, user, receipt))
+        return True
+
+
+def _writer(registry, tmp_path, **kw):
+    kw.setdefault("flush_interval", 0.01)
+    kw.setdefault("retry_base", 0.001)
+    return AuditWriter(lambda: registry, journal_path=str(tmp_path / "audit.jsonl"), **kw)
+
+
+def test_receipts_are_batched_into_one_call(tmp_path):
+    reg = BatchRegistry()
+    w = _writer(reg, tmp_path, batch_size=10)
+
+    async def run():
+        for i in range(10):
+            w.submit("agent", "user", {"n": i})
+        await asyncio.sleep(0.05)
+        await w.aclose()
+
+    asyncio.run(run())
+    assert len(reg.calls) == 1
+    assert [r[2]["n"] for r in reg.calls[0]] == list(range(10))
+    assert w.stats()["written"] == 10
+
+
+def test_falls_back_to_per_record_writes(tmp_path):
+    reg = SingleRegistry()
+    w = _writer(reg, tmp_path)
+
+    async def run():
+        w.submit("a", "u", "r1")
+        w.submit("a", "u", "r2")
+        await w.flush()
+
+    asyncio.run(run())
+    assert [c[2] for c in reg.calls] == ["r1", "r2"]
+
+
+def test_per_record_writes_are_concurrent_and_only_failures_are_retried(tmp_path):
+    reg = SingleRegistry(fail_once=("r2",))
+    w = _writer(reg, tmp_path, write_concurrency=2, flush_interval=10)
+
+    async def run():
+        for r in ("r1", "r2", "r3"):
+            w.submit("a", "u", r)
+        await w.flush()
+        await w.aclose()
+
+    asyncio.run(run())
+    assert sorted(c[2] for c in reg.calls) == ["r1", "r2", "r3"]  # r1 / r3 written once
+    assert reg.max_in_flight == 2 and w.retries == 1 and w.written == 3
+
+
+def test_retries_with_backoff_then_succeeds(tmp_path):
+    reg = BatchRegistry(fail_times=2)
+    w = _writer(reg, tmp_path, max_retries=3)
+
+    async def run():
+        w.submit("a", "u", "r")
+        await w.flush()
+
+    asyncio.run(run())
+    assert len(reg.calls) == 1
+    assert w.retries == 2 and w.journaled == 0
+
+
+def test_overflow_and_failures_spill_to_journal_and_replay(tmp_path):
+    failing = BatchRegistry(fail_times=100)
+    w = _writer(failing, tmp_path, queue_max=2, max_retries=1)
+
+    async def run_failing():
+        for i in range(3):
+            w.submit("a", "u", i)  # third record overflows straight to the journal
+        await w.aclose(timeout=1)
+
+    asyncio.run(run_failing())
+    lines = (tmp_path / "audit.jsonl").read_text().splitlines()
+    assert sorted(json.loads(l)["receipt"] for l in lines) == [0, 1, 2]
+
+    reg = BatchRegistry()
+    w2 = _writer(reg, tmp_path)
+
+    async def run_replay():
+        w2.start()
+        await w2.flush()
+        await w2.aclose()
+
+    asyncio.run(run_replay())
+    assert sorted(r[2] for call in reg.calls for r in call) == [0, 1, 2]
+    assert w2.replayed == 3
+    assert not (tmp_path / "audit.jsonl").exists()
+
+
+def test_submit_is_write_ahead_and_confirmed_records_leave_the_journal(tmp_path):
+    reg = BatchRegistry()
+    w = _writer(reg, tmp_path, queue_max=2, flush_interval=10)
+    journal = tmp_path / "audit.jsonl"
+    receipts = lambda: [json.loads(l)["receipt"] for l in journal.read_text().splitlines()]
+
+    async def run():
+        for i in range(3):
+            w.submit("a", "u", i)  # the third overflows: kept only in the journal
+        assert receipts() == [0, 1, 2]  # on disk before any registry call
+        await w.flush()
+        assert receipts() == [2]  # confirmed records compacted away
+        await w.aclose()
+
+    asyncio.run(run())
+    assert w.stats()["compactions"] == 1 and w.stats()["parked"] == 1
+
+    w2 = _writer(reg, tmp_path)
+
+    async def run_replay():
+        w2.start()
+        await w2.flush()
+        await w2.aclose()
+
+    asyncio.run(run_replay())
+    assert [r[2] for call in reg.calls for r in call] == [0, 1, 2]
+    assert w2.replayed == 1 and not journal.exists()
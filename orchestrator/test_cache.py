@@ -0,0 +1,68 @@
+# orchestrator/test_cache.py
+import asyncio
+import time
+
+from orchestrator.cache import TTLCache, NOT_FOUND, is_miss
+from orchestrator import main
+
+
+def test_lru_eviction_and_counters():
+    c = TTLCache(maxsize=2, ttl=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1          # touch a -> b becomes LRU
+    c.set("c", 3)
+    assert is_miss(c.lookup("b"))
+    assert c.get("a") == 1 and c.get("c") == 3
+    st = c.stats()
+    assert st["evictions"] == 1 and st["hits"] == 3 and st["misses"] == 1
+
+
+def test_ttl_and_negative_caching():
+    c = TTLCache(maxsize=8, ttl=0.05, negative_ttl=60)
+    c.set("x", {"id": "x"})
+    c.set_missing("ghost")
+    assert c.lookup("ghost") is NOT_FOUND
+    time.sleep(0.06)
+    assert is_miss(c.lookup("x"))
+    assert c.lookup("ghost") is NOT_FOUND
+    assert c.stats()["negative_hits"] == 2
+    assert c.invalidate("ghost") and is_miss(c.lookup("ghost"))
+
+
+class _CountingRegistry(main.MockRegistry):
+    def __init__(self):
+        self.calls = 0
+
+    async def get_agent_async(self, agent_id):
+        self.calls += 1
+        return await super().get_agent_async(agent_id)
+
+
+def test_manifest_cache_hits_and_invalidation(monkeypatch):
+    reg = _CountingRegistry()
+    monkeypatch.setattr(main, "_registry_canister", reg)
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setitem(main.MOCK_AGENTS, "agent-x", {
+        "id": "agent-x", "name": "X", "endpoint": ["http://localhost:7001"],
+        "pubkey": [], "manifest_hash": [], "health_check": [], "allowed_tools": [["call_agent"]],
+    })
+
+    async def run():
+        m1 = await main.get_normalized_manifest("agent-x")
+        m1["name"] = "mutated by caller"
+        m2 = await main.get_normalized_manifest("agent-x")
+        assert m2["name"] == "X"
+        assert m2["endpoint"] == "http://localhost:7001"
+        assert m2["allowed_tools"] == ["call_agent"]
+        assert reg.calls == 1
+
+        assert await main.get_normalized_manifest("missing") is None
+        assert await main.get_normalized_manifest("missing") is None
+        assert reg.calls == 2
+
+        main._manifest_cache.invalidate("agent-x")
+        await main.get_normalized_manifest("agent-x")
+        assert reg.calls == 3
+
+    asyncio.run(run())
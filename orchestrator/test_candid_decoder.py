@@ -0,0 +1,74 @@
+# orchestrator/test_candid_decoder.py
+from ic.candid import decode, encode
+
+from orchestrator import main
+from orchestrator.candid_decoder import (CandidDecodeError, RegistryDecoder, canister_from_did, load_did_actor,
+                                         parse_did_methods)
+
+DID = """
+type AgentManifest = record {
+  id : text; name : text; description : text; developer : principal; version : text;
+  created_at : nat64; pubkey : opt text; manifest_hash : opt text; endpoint : opt text;
+  health_check : opt text; allowed_tools : opt vec text;
+};
+service : {
+  register_agent : (AgentManifest) -> (bool);
+  list_agents : () -> (vec AgentManifest) query;
+  get_agent : (text) -> (opt AgentManifest) query;
+}
+"""
+
+
+def _agent(i, **kw):
+    rec = {"id": f"agent_{i}", "name": f"Agent {i}", "description": "does things", "developer": "2vxsx-fae",
+           "version": "0.1.0", "created_at": 1700000000 + i, "pubkey": [], "manifest_hash": [],
+           "endpoint": [f"http://127.0.0.1:{7000 + i}"], "health_check": [], "allowed_tools": [["search_docs", "call_agent"]]}
+    rec.update(kw)
+    return rec
+
+
+def _wire(methods, method, value):
+    """Round-trip a value through Candid so it has exactly the shape ic-py returns from the canister."""
+    rets = methods[method].retTypes
+    return [r["value"] for r in decode(encode([{"type": rets[0], "value": value}]), rets)]
+
+
+def test_typed_decoder_matches_untyped_path():
+    methods = parse_did_methods(DID)
+    dec = RegistryDecoder(methods)
+    raw = _wire(methods, "list_agents", [_agent(1), _agent(2, allowed_tools=[], endpoint=[]), _agent(3, pubkey=["ab"])])
+
+    typed = dec.agent_list(raw)
+    assert typed == main.normalize_agent_list_untyped(raw)
+    assert typed[0]["developer"] == "2vxsx-fae"
+    assert typed[0]["allowed_tools"] == ["search_docs", "call_agent"]
+    assert typed[1]["endpoint"] is None and typed[1]["allowed_tools"] == []
+
+    assert dec.manifest(_wire(methods, "get_agent", [_agent(4)]))["id"] == "agent_4"
+    assert dec.manifest(_wire(methods, "get_agent", [])) is None
+
+
+def test_unexpected_shapes_fall_back_to_untyped_path(monkeypatch):
+    dec = RegistryDecoder.from_did(DID)
+    try:
+        dec.agent_list([_agent(1), _agent(2)])  # mock-registry shape, not an ic-py result
+        assert False, "expected CandidDecodeError"
+    except CandidDecodeError:
+        pass
+    monkeypatch.setattr(main, "_registry_decoder", dec)
+    mock_shaped = [_agent(1)]
+    assert main.normalize_agent_list(mock_shaped)[0]["endpoint"] == "http://127.0.0.1:7001"
+
+
+def test_parsed_did_is_cached_on_disk(tmp_path):
+    actor, hit = load_did_actor(DID, str(tmp_path))
+    assert not hit and list(tmp_path.iterdir())
+    cached, hit = load_did_actor(DID, str(tmp_path))
+    assert hit and sorted(cached["methods"]) == sorted(actor["methods"]) == ["get_agent", "list_agents", "register_agent"]
+    get_agent, fresh = cached["methods"]["get_agent"], actor["methods"]["get_agent"]
+    assert [t.name for t in get_agent.argTypes] == [t.name for t in fresh.argTypes] == ["text"]
+    assert [t.name for t in get_agent.retTypes] == [t.name for t in fresh.retTypes]
+    assert get_agent.retTypes[0].name.startswith("opt (record {") and get_agent.annotations == ["query"]
+
+    canister, hit = canister_from_did(object(), "aaaaa-aa", DID, str(tmp_path))
+    assert hit and callable(canister.get_agent_async) and callable(canister.list_agents)
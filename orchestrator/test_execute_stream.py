@@ -0,0 +1,82 @@
+# orchestrator/test_execute_stream.py
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from orchestrator import main
+from orchestrator.audit_writer import AuditWriter
+from orchestrator.cache import TTLCache
+
+
+def _events(body: str):
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def test_execute_stream_emits_step_events_and_receipt(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "_registry_canister", main.MockRegistry())
+    audit = AuditWriter(lambda: main._registry_canister, journal_path=str(tmp_path / "audit.jsonl"))
+    monkeypatch.setattr(main, "_audit_writer", audit)
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setitem(main.MOCK_AGENTS, "orchestrator_v2", {
+        "id": "orchestrator_v2", "name": "Orchestrator", "endpoint": [], "pubkey": [],
+        "manifest_hash": [], "health_check": [], "allowed_tools": [["answer_user"]],
+    })
+    plan = {"steps": [{"tool": "answer_user", "args": {"answer": "Paris"}},
+                      {"tool": "answer_user", "args": {"answer": "{{ steps[0].result.content[0].text }}!"}}]}
+    client = TestClient(main.app)
+    body = {"manifest_id": "orchestrator_v2", "prompt": "capital of France?", "plan": plan, "user": "2vxsx-fae"}
+
+    resp = client.post("/execute/stream", json=body)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _events(resp.text)
+    names = [e for e, _ in events]
+    assert names[0] == "accepted" and names[1] == "plan" and names[-1] == "receipt"
+    assert names.count("step_started") == 2 and names.count("step_finished") == 2
+    receipt = events[-1][1]
+    assert receipt["steps"][1]["args"]["answer"] == "Paris!"
+    assert all("t_ms" in data for _, data in events)
+
+    plain = client.post("/execute", json=body).json()
+    assert [s["args"] for s in plain["steps"]] == [s["args"] for s in receipt["steps"]]
+    # receipts are queued for the background writer rather than written inline
+    assert audit.stats()["submitted"] == 2
+
+
+def test_execute_stream_reports_preparation_errors(monkeypatch):
+    monkeypatch.setattr(main, "_registry_canister", main.MockRegistry())
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    client = TestClient(main.app)
+    events = _events(client.post("/execute/stream", json={"manifest_id": "nope", "prompt": "x"}).text)
+    assert [e for e, _ in events] == ["accepted", "error"]
+    assert events[1][1]["status"] == 404
+    assert client.post("/execute/stream", json={"prompt": "x"}).status_code == 400
+
+
+def test_execute_reports_stage_timings_and_enforces_deadline(monkeypatch, tmp_path):
+    class SlowRegistry(main.MockRegistry):
+        async def get_agent_async(self, agent_id):
+            await asyncio.sleep(0.5)
+            return await super().get_agent_async(agent_id)
+
+    monkeypatch.setattr(main, "_audit_writer", AuditWriter(lambda: None, journal_path=str(tmp_path / "audit.jsonl")))
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setitem(main.MOCK_AGENTS, "local_agent", {"id": "local_agent", "name": "Local", "allowed_tools": [["answer_user"]]})
+    monkeypatch.setattr(main, "_registry_canister", main.MockRegistry())
+    client = TestClient(main.app)
+    body = {"manifest_id": "local_agent", "prompt": "hi", "plan": {"steps": [{"tool": "answer_user", "args": {"answer": "hello"}}]}}
+
+    timings = client.post("/execute", json=body).json()["_meta"]["timings"]
+    assert {"manifest_ms", "verify_ms"} <= set(timings)
+
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    monkeypatch.setattr(main, "_registry_canister", SlowRegistry())
+    monkeypatch.setattr(main, "EXECUTE_PREPARE_DEADLINE", 0.1)
+    resp = client.post("/execute", json=body)
+    assert resp.status_code == 504
+    assert "stage: manifest" in resp.json()["detail"]
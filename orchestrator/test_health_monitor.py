@@ -0,0 +1,78 @@
+# orchestrator/test_health_monitor.py
+import asyncio
+import time
+
+import httpx
+
+from orchestrator import health_monitor
+from orchestrator.health_monitor import HealthMonitor, CLOSED, OPEN, HALF_OPEN
+from orchestrator.runner import execute_plan
+
+UP = {"id": "up", "endpoint": "http://up.test/"}
+DOWN = {"id": "down", "endpoint": "http://down.test", "health_check": "http://down.test/healthz"}
+
+
+def _client(calls):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        if request.url.host == "down.test":
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, json={"status": "ok"})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_probe_all_builds_table_and_opens_breaker():
+    calls = []
+
+    async def go():
+        async with _client(calls) as c:
+            mon = HealthMonitor(client=c, failure_threshold=2, reset_timeout=60)
+            for _ in range(2):
+                await mon.probe_all([UP, DOWN, dict(UP, id="up-alias")])
+            return mon
+
+    mon = asyncio.run(go())
+    assert "http://down.test/healthz" in calls and "http://up.test/health" in calls
+    assert len(calls) == 4  # one probe per endpoint per round
+    snap = mon.snapshot()["endpoints"]
+    assert snap["http://up.test"]["healthy"] is True
+    assert snap["http://up.test"]["latency_ewma_ms"] is not None
+    assert sorted(snap["http://up.test"]["agents"]) == ["up", "up-alias"]
+    assert snap["http://down.test"]["breaker"] == OPEN
+    assert snap["http://down.test"]["consecutive_failures"] == 2
+    assert [a["id"] for a in mon.filter_agents([UP, DOWN, {"id": "local"}])] == ["up", "local"]
+
+
+def test_breaker_half_open_allows_single_trial():
+    mon = HealthMonitor(failure_threshold=1, reset_timeout=0.05)
+    mon.record_failure("http://a.test", "boom")
+    assert not mon.allow("http://a.test")
+    time.sleep(0.06)
+    assert mon.is_available("http://a.test")
+    assert mon.allow("http://a.test")  # the trial call
+    assert mon._breakers["http://a.test"].state == HALF_OPEN
+    assert not mon.allow("http://a.test")
+    mon.record_success("http://a.test")
+    assert mon._breakers["http://a.test"].state == CLOSED
+    assert mon.allow("http://a.test")
+
+
+def test_runner_skips_call_agent_when_circuit_open():
+    mon = HealthMonitor(failure_threshold=1, reset_timeout=60)
+    mon.record_failure("http://down.test", "refused")
+    health_monitor.set_health_monitor(mon)
+    calls = []
+    plan = {"steps": [{"tool": "call_agent", "args": {"endpoint": "http://down.test", "payload": {"prompt": "x"}}}]}
+
+    async def go():
+        async with _client(calls) as c:
+            return await execute_plan(plan=plan, manifest={"id": "m"}, prompt="p", user="u",
+                                      client=c, mcp_endpoint="http://mcp.test")
+
+    try:
+        run = asyncio.run(go())
+    finally:
+        health_monitor.set_health_monitor(None)
+    assert calls == []
+    assert run["steps"][0]["status"] == "error"
+    assert "circuit open" in run["steps"][0]["error"]
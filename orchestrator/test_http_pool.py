@@ -0,0 +1,38 @@
+# orchestrator/test_http_pool.py
+import asyncio
+
+import httpx
+
+from orchestrator.http_pool import HttpClientManager
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/boom":
+        raise httpx.ConnectError("boom", request=request)
+    return httpx.Response(200, json={"host": request.url.host, "path": request.url.path})
+
+
+def test_one_client_per_origin_and_counters():
+    async def run():
+        pool = HttpClientManager(transport=httpx.MockTransport(_handler))
+        try:
+            r1 = await pool.post("http://localhost:9000/tool/search_docs", json={"query": "x"})
+            r2 = await pool.get("http://localhost:9000/health")
+            r3 = await pool.get("http://127.0.0.1:7001/health", timeout=1.0)
+            assert r1.json()["path"] == "/tool/search_docs"
+            assert r2.status_code == 200 and r3.status_code == 200
+            assert pool.client_for("http://localhost:9000/x") is pool.client_for("http://LOCALHOST:9000/y")
+            try:
+                await pool.get("http://localhost:9000/boom")
+            except httpx.ConnectError:
+                pass
+            hosts = pool.stats()["hosts"]
+            assert set(hosts) == {"http://localhost:9000", "http://127.0.0.1:7001"}
+            assert hosts["http://localhost:9000"]["requests"] == 3
+            assert hosts["http://localhost:9000"]["errors"] == 1
+            assert hosts["http://localhost:9000"]["in_flight"] == 0
+        finally:
+            await pool.aclose()
+        assert pool.stats()["hosts"] == {}
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+# orchestrator/test_llm_async.py
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from orchestrator import llm_adapter
+from orchestrator import main
+
+
+class _FakeCompletions:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def create(self, **kwargs):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        content = json.dumps({"steps": [{"tool": "search_docs", "args": {"query": "q", "k": 3}}]})
+        msg = type("M", (), {"content": content})
+        return type("R", (), {"choices": [type("C", (), {"message": msg})]})
+
+
+class _FakeClient:
+    def __init__(self, completions):
+        self.chat = type("Chat", (), {"completions": completions})
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def test_groq_async_reuses_client_and_caps_concurrency(monkeypatch):
+    completions = _FakeCompletions()
+    built = []
+
+    def fake_client(api_key, base_url=None):
+        clients = llm_adapter._state()["clients"]
+        if "fake" not in clients:
+            built.append(1)
+            clients["fake"] = _FakeClient(completions)
+        return clients["fake"]
+
+    monkeypatch.setattr(llm_adapter, "GROQ_API_KEY", "test-key")
+    monkeypatch.setattr(llm_adapter, "_async_openai_client", fake_client)
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_GROQ", "2")
+
+    async def run():
+        plans = await asyncio.gather(*(llm_adapter.plan_with_llm_async({"id": "a"}, "help", provider="groq") for _ in range(6)))
+        assert all(p["_meta"]["provider"] == "groq" for p in plans)
+        client = llm_adapter._state()["clients"]["fake"]
+        await llm_adapter.close_llm_clients()
+        assert client.closed
+
+    asyncio.run(run())
+    assert len(built) == 1
+    assert completions.peak == 2
+
+
+def test_sync_wrapper_still_works(monkeypatch):
+    monkeypatch.setattr(llm_adapter, "GROQ_API_KEY", "")
+    plan = llm_adapter.discover_and_plan([], "what is 2+2?")
+    assert plan["steps"]
+
+
+class _DisconnectingRequest:
+    def __init__(self, after):
+        self.after = after
+        self.polls = 0
+
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.polls >= self.after
+
+
+def test_run_until_disconnect_cancels_llm_call():
+    completions = _FakeCompletions(delay=5)
+
+    async def run():
+        with pytest.raises(HTTPException) as exc:
+            await main.run_until_disconnect(_DisconnectingRequest(after=2), completions.create(), poll_interval=0.01)
+        assert exc.value.status_code == 499
+        await asyncio.sleep(0)
+        assert completions.cancelled == 1
+        assert await main.run_until_disconnect(_DisconnectingRequest(after=99), asyncio.sleep(0, result="ok")) == "ok"
+
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+# orchestrator/test_manifest_verify.py
+import asyncio
+
+import pytest
+from nacl.signing import SigningKey
+from nacl.encoding import HexEncoder
+
+from orchestrator import manifest_verify as mv
+
+
+def _signed(mid: str, sk: SigningKey) -> dict:
+    m = {"id": mid, "name": f"Agent {mid}", "endpoint": "http://localhost:7001"}
+    m["signature"] = sk.sign(mv.canonical_json(m).encode()).signature.hex()
+    m["pubkey"] = sk.verify_key.encode(HexEncoder).decode()
+    return m
+
+
+def test_verified_manifest_skips_crypto(monkeypatch):
+    sk = SigningKey.generate()
+    m = _signed("cached-agent", sk)
+    assert mv.verify_manifest(m) == mv.MODE_SIGNATURE
+
+    def _boom(*a, **kw):
+        raise AssertionError("crypto should not run on a cache hit")
+
+    monkeypatch.setattr(mv, "_check_signature", _boom)
+    assert mv.verify_manifest(dict(m)) == mv.MODE_SIGNATURE
+
+    tampered = dict(m, name="evil")
+    with pytest.raises(AssertionError):
+        mv.verify_manifest(tampered)
+
+
+def test_bad_signature_and_hash_mismatch():
+    sk = SigningKey.generate()
+    m = _signed("bad-agent", sk)
+    with pytest.raises(ValueError):
+        mv.verify_manifest(dict(m, description="changed"))
+    with pytest.raises(mv.ManifestHashMismatch):
+        mv.verify_manifest({"id": "h", "pubkey": "00", "manifest_hash": "deadbeef"})
+    assert mv.verify_manifest({"id": "plain"}) == mv.MODE_UNVERIFIED
+
+
+def test_claimed_hash_is_checked_after_cache_hit():
+    m = {"id": "hashed", "pubkey": "00", "name": "Hashed agent"}
+    m["manifest_hash"] = mv._hash_key(m)[1]
+    assert mv.verify_manifest(m) == mv.MODE_HASH
+    assert mv.verify_manifest(dict(m)) == mv.MODE_HASH  # cache hit
+    with pytest.raises(mv.ManifestHashMismatch):
+        mv.verify_manifest(dict(m, manifest_hash="deadbeef"))
+
+
+def test_bulk_verification_process_pool():
+    sk = SigningKey.generate()
+    good = [_signed(f"bulk-{i}", sk) for i in range(6)]
+    bad = dict(_signed("bulk-bad", sk), name="tampered")
+    # force the pool path regardless of VERIFY_BULK_MIN_PARALLEL
+    orig = mv.VERIFY_BULK_MIN_PARALLEL
+    mv.VERIFY_BULK_MIN_PARALLEL = 1
+    try:
+        report = mv.verify_manifests_bulk(good + [bad], max_workers=2)
+        async_report = asyncio.run(mv.verify_manifests_bulk_async(good, max_workers=2))
+    finally:
+        mv.VERIFY_BULK_MIN_PARALLEL = orig
+    assert all(report[m["id"]]["ok"] for m in good)
+    assert report["bulk-bad"]["ok"] is False
+    assert all(r["ok"] for r in async_report.values())
+    hits_before = mv.verification_cache_stats()["hits"]
+    mv.verify_manifest(good[0])
+    assert mv.verification_cache_stats()["hits"] == hits_before + 1
+
+
+def test_bulk_report_keyed_by_caller_keys():
+    sk = SigningKey.generate()
+    m = _signed("same-id", sk)
+    report = mv.verify_manifests_bulk([m, dict(m, name="tampered")], max_workers=1, keys=["a.json", "b.json"])
+    assert report["a.json"]["ok"] is True
+    assert report["b.json"]["ok"] is False
@@ -0,0 +1,60 @@
+# orchestrator/test_metrics.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from orchestrator import main
+from orchestrator.cache import TTLCache
+from orchestrator.metrics import MetricsRegistry, STAGE_SECONDS, TOOL_STEP_SECONDS
+from orchestrator.runner import execute_plan
+
+
+def _sample(text: str, line_prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"no sample {line_prefix}")
+
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    reg = MetricsRegistry()
+    h = reg.histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.labels('a"b').observe(v)
+    c = reg.counter("t_errors", "test", ("stage",))
+    c.labels("x").inc(2)
+    reg.register_collector(lambda: [("t_hits_total", "hits", "counter", [({"cache": "m"}, 3)])])
+    text = reg.render()
+    assert _sample(text, 't_seconds_bucket{stage="a\\"b",le="0.1"}') == 1
+    assert _sample(text, 't_seconds_bucket{stage="a\\"b",le="1"}') == 2
+    assert _sample(text, 't_seconds_bucket{stage="a\\"b",le="+Inf"}') == 3
+    assert _sample(text, 't_seconds_count{stage="a\\"b"}') == 3
+    assert _sample(text, 't_errors_total{stage="x"}') == 2
+    assert _sample(text, 't_hits_total{cache="m"}') == 3
+    assert "# TYPE t_seconds histogram" in text
+
+
+def test_metrics_endpoint_reports_stages_routes_and_caches(monkeypatch):
+    monkeypatch.setattr(main, "MOCK_AGENTS", {"agent_m": {"id": "agent_m", "name": "M", "description": "d"}})
+    monkeypatch.setattr(main, "_registry_canister", main.MockRegistry())
+    monkeypatch.setattr(main, "_agent_list_cache", TTLCache(maxsize=1, ttl=60))
+    monkeypatch.setattr(main, "_manifest_cache", TTLCache(maxsize=8, ttl=60))
+    client = TestClient(main.app)
+
+    before = STAGE_SECONDS.labels("registry_fetch").count
+    assert client.get("/agents/agent_m").status_code == 200
+    resp = client.get("/metrics")
+    assert resp.status_code == 200 and resp.headers["content-type"].startswith("text/plain")
+    text = resp.text
+    assert _sample(text, 'agenthub_stage_duration_seconds_count{stage="registry_fetch"}') >= before + 1
+    # route template, not the raw path
+    assert 'agenthub_http_request_duration_seconds_count{route="/agents/{agent_id}",method="GET",status="200"}' in text
+    assert 'agenthub_cache_misses_total{cache="agent_list"}' in text
+
+
+def test_runner_records_tool_step_latency(monkeypatch):
+    child = TOOL_STEP_SECONDS.labels("answer_user", "ok")
+    before = child.count
+    plan = {"steps": [{"tool": "answer_user", "args": {"answer": "hi"}}]}
+    asyncio.run(execute_plan(plan, {"id": "m"}, "p", "u", client=None, mcp_endpoint="http://127.0.0.1:9"))
+    assert child.count == before + 1
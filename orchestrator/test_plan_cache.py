@@ -0,0 +1,101 @@
+# orchestrator/test_plan_cache.py
+import asyncio
+import json
+
+from orchestrator import llm_adapter
+from orchestrator.plan_cache import (
+    MemoryPlanCache, SqlitePlanCache, plan_cache_key, set_plan_cache,
+)
+
+MANIFEST = {"id": "agent-a", "name": "A"}
+SNIPPETS = [{"id": "doc1", "snippet": "They receive 401."}]
+
+
+def test_key_normalizes_prompt_and_tracks_inputs():
+    k = plan_cache_key("plan", "Reset  my PASSWORD ", MANIFEST, SNIPPETS, "groq", "m1")
+    assert k == plan_cache_key("plan", "reset my password", MANIFEST, SNIPPETS, "groq", "m1")
+    assert k != plan_cache_key("plan", "reset my password", dict(MANIFEST, name="B"), SNIPPETS, "groq", "m1")
+    assert k != plan_cache_key("plan", "reset my password", MANIFEST, [{"id": "doc2"}], "groq", "m1")
+    assert k != plan_cache_key("plan", "reset my password", MANIFEST, SNIPPETS, "groq", "m2")
+    assert k != plan_cache_key("plan", "reset my password", MANIFEST, SNIPPETS, "openai", "m1")
+
+
+def test_sqlite_backend_persists_and_evicts(tmp_path):
+    path = str(tmp_path / "plans.sqlite3")
+    c = SqlitePlanCache(path=path, maxsize=2, ttl=60)
+    for i in range(3):
+        c.set(f"k{i}", json.dumps({"steps": [], "i": i}))
+    assert c.size() == 2 and c.get("k0") is None
+    c.close()
+    reopened = SqlitePlanCache(path=path, maxsize=2, ttl=60)
+    plan_json, _ = reopened.get("k2")
+    assert json.loads(plan_json)["i"] == 2
+    expired = SqlitePlanCache(path=str(tmp_path / "ttl.sqlite3"), ttl=-1)
+    expired.set("k", "{}")
+    assert expired.get("k") is None
+
+
+def test_sqlite_hits_do_not_write_but_still_count_for_eviction(tmp_path):
+    c = SqlitePlanCache(path=str(tmp_path / "plans.sqlite3"), maxsize=2, ttl=60)
+    c.set("k0", "{}")
+    c.set("k1", "{}")
+    changes = c._conn.total_changes
+    assert c.get("k0") is not None and c.get("k0") is not None
+    assert c._conn.total_changes == changes  # no UPDATE/commit per hit
+    c.set("k2", "{}")  # flushes the touch on k0, so k1 is the least recently used
+    assert c.get("k1") is None and c.get("k0") is not None
+    c.close()
+
+
+def _run_with_cache(cache, monkeypatch):
+    calls = []
+
+    async def fake_groq(manifest, prompt, context_snippets):
+        calls.append(prompt)
+        return {"steps": [{"tool": "search_docs", "args": {"query": prompt, "k": 3}}],
+                "_meta": {"provider": "groq", "model": "test"}}
+
+    monkeypatch.setattr(llm_adapter, "_groq_plan_async", fake_groq)
+    set_plan_cache(cache)
+
+    async def run():
+        first = await llm_adapter.plan_with_llm_async(MANIFEST, "Customer cannot login", SNIPPETS, provider="groq")
+        first["steps"].append({"tool": "call_agent", "args": {}})  # callers mutate plans
+        second = await llm_adapter.plan_with_llm_async(MANIFEST, "customer   cannot LOGIN", SNIPPETS, provider="groq")
+        return first, second
+
+    try:
+        first, second = asyncio.run(run())
+    finally:
+        set_plan_cache(None)
+    assert len(calls) == 1
+    assert "cached" not in first["_meta"]
+    assert second["_meta"]["cached"] is True
+    assert len(second["steps"]) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_plan_with_llm_uses_memory_cache(monkeypatch):
+    _run_with_cache(MemoryPlanCache(maxsize=8, ttl=60), monkeypatch)
+
+
+def test_plan_with_llm_uses_sqlite_cache(monkeypatch, tmp_path):
+    _run_with_cache(SqlitePlanCache(path=str(tmp_path / "p.sqlite3")), monkeypatch)
+
+
+def test_invalid_cached_plan_is_recomputed(monkeypatch):
+    cache = MemoryPlanCache()
+    key = plan_cache_key("plan", "hello", MANIFEST, None, "groq", llm_adapter.GROQ_MODEL)
+    cache.set(key, json.dumps({"steps": [{"tool": "rm_rf", "args": {}}]}))
+
+    async def fake_groq(manifest, prompt, context_snippets):
+        return {"steps": [{"tool": "search_docs", "args": {"query": prompt}}]}
+
+    monkeypatch.setattr(llm_adapter, "_groq_plan_async", fake_groq)
+    set_plan_cache(cache)
+    try:
+        plan = asyncio.run(llm_adapter.plan_with_llm_async(MANIFEST, "hello", provider="groq"))
+    finally:
+        set_plan_cache(None)
+    assert plan["steps"][0]["tool"] == "search_docs"
+    assert cache.stale == 1
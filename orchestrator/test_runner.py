@@ -0,0 +1,110 @@
+# orchestrator/test_runner.py
+import asyncio
+import json
+import time
+
+import httpx
+
+from orchestrator.runner import execute_plan, plan_dependencies
+
+MCP = "http://mcp.test"
+
+
+def _client(delay=0.1, fail_tools=(), calls=None):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        tool = request.url.path.rsplit("/", 1)[-1]
+        args = json.loads(request.content or b"{}")
+        if calls is not None:
+            calls.append(tool)
+        await asyncio.sleep(delay.get(tool, 0.05) if isinstance(delay, dict) else delay)
+        if tool in fail_tools:
+            return httpx.Response(500, text="boom")
+        return httpx.Response(200, json={"tool": tool, "echo": args})
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _run(plan, **kw):
+    async def go():
+        async with _client(**{k: kw.pop(k) for k in ("delay", "fail_tools", "calls") if k in kw}) as c:
+            return await execute_plan(plan=plan, manifest={"id": "m"}, prompt="p", user="u",
+                                      client=c, mcp_endpoint=MCP, **kw)
+    return asyncio.run(go())
+
+
+def test_dependency_analysis():
+    steps = [
+        {"tool": "search_docs", "args": {"query": "a"}},
+        {"tool": "call_agent", "args": {"payload": {"prompt": "b"}}},
+        {"tool": "create_ticket", "args": {"body": "{{ steps[0].result.echo.query }}"}},
+        {"tool": "send_email", "args": {"body": ["{{ last.result }}"]}},
+        {"tool": "call_api", "args": {"n": "{% for s in steps %}{{ s.tool }}{% endfor %} {{ prompt }}"}},
+        {"tool": "call_api", "args": {"x": "{{ steps.1.result }} {{ manifest.id }}"}},
+    ]
+    assert plan_dependencies(steps) == [set(), set(), {0}, {2}, {0, 1, 2, 3}, {1}]
+
+
+def test_independent_steps_run_concurrently_in_order():
+    # read-only tools: no ordering barrier even with abort_on_error
+    plan = {"steps": [{"tool": "search_docs", "args": {"query": str(i)}} for i in range(3)]
+                     + [{"tool": "create_ticket", "args": {"body": "{{ steps[2].result.echo.query }}"}}]}
+    t0 = time.perf_counter()
+    run = _run(plan, delay=0.2, max_parallel=4)
+    elapsed = time.perf_counter() - t0
+    assert elapsed < 0.6  # 3 parallel + 1 dependent ~= 0.4s; sequential would be 0.8s
+    assert [s["index"] for s in run["steps"]] == [0, 1, 2, 3]
+    assert run["steps"][3]["args"]["body"] == "2"
+    assert run["dag"]["dependencies"] == [[], [], [], [2]]
+
+    seq = _run(plan, delay=0.01, max_parallel=1)
+    strip = lambda r: [{k: v for k, v in s.items()} for s in r["steps"]]
+    assert strip(seq) == strip(run)
+
+
+def test_abort_on_error_matches_sequential_semantics():
+    plan = {"steps": [
+        {"tool": "search_docs", "args": {"query": "a"}},
+        {"tool": "create_ticket", "args": {"title": "t"}},   # fails
+        {"tool": "send_email", "args": {"to": "x"}},
+        {"tool": "search_docs", "args": {"query": "b"}},
+    ]}
+    seq = _run(plan, delay=0.01, fail_tools=("create_ticket",), max_parallel=1)["steps"]
+    assert [s["status"] for s in seq] == ["ok", "error", "skipped", "skipped"]
+    assert seq[2]["error"] == "skipped: step 1 failed"
+    for delay in ({"create_ticket": 0.01, "send_email": 0.2}, {"create_ticket": 0.2, "search_docs": 0.01}):
+        assert _run(plan, delay=delay, fail_tools=("create_ticket",), max_parallel=4)["steps"] == seq
+
+    run = _run(plan, delay=0.05, fail_tools=("create_ticket",), abort_on_error=False, max_parallel=4)
+    assert [s["status"] for s in run["steps"]] == ["ok", "error", "ok", "ok"]
+
+
+def test_side_effects_never_run_after_a_slower_failing_step():
+    plan = {"steps": [
+        {"tool": "create_ticket", "args": {"title": "t"}},   # fails, slowly
+        {"tool": "send_email", "args": {"to": "x"}},         # independent, fast
+        {"tool": "search_docs", "args": {"query": "q"}},     # read-only, may run early
+    ]}
+    calls = []
+    run = _run(plan, delay={"create_ticket": 0.2, "send_email": 0.01, "search_docs": 0.01},
+               fail_tools=("create_ticket",), max_parallel=4, calls=calls)
+    assert "send_email" not in calls
+    assert [s["status"] for s in run["steps"]] == ["error", "skipped", "skipped"]
+
+
+def test_precompile_skips_static_subtrees_and_caches_templates():
+    from orchestrator.runner import compile_template, precompile_args, render_compiled, render_args_template
+
+    static = {"k": 3, "opts": {"a": [1, "x"]}}
+    args = {"query": "{{ prompt }}", "static": static, "list": ["plain", "{{ user }}"]}
+    compiled = precompile_args(args)
+    assert compiled.sources == ["{{ prompt }}", "{{ user }}"]
+    assert precompile_args(static).is_static
+
+    ctx = {"prompt": "hi", "user": "bob", "steps": [], "last": {}}
+    compile_template.cache_clear()
+    out = render_compiled(compiled, ctx)
+    render_compiled(compiled, ctx)
+    assert out == {"query": "hi", "static": static, "list": ["plain", "bob"]}
+    assert out["static"] is static  # static subtree returned without re-walking
+    info = compile_template.cache_info()
+    assert info.misses == 2 and info.hits == 2
+    assert render_args_template(args, ctx) == out
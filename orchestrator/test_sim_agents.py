@@ -0,0 +1,36 @@
+# orchestrator/test_sim_agents.py
+import statistics
+
+from fastapi.testclient import TestClient
+
+import sim_agents
+
+
+def test_profiles_drive_health_errors_and_latency():
+    profiles = {
+        "ok": {"median_ms": 1, "sigma": 0.0, "response_bytes": 40},
+        "broken": {"median_ms": 1, "sigma": 0.0, "error_rate": 1.0},
+        "cold": {"median_ms": 1, "startup_delay_s": 3600},
+    }
+    fleet = sim_agents.build_fleet(3, ["ok", "broken", "cold"], profiles, seed=1)
+    client = TestClient(sim_agents.create_app(fleet))
+
+    ok = client.post("/sim/sim_agent_000/execute", json={"prompt": "hi"})
+    assert ok.status_code == 200 and len(ok.json()["result"]) == 40
+    assert client.post("/sim/sim_agent_001/execute", json={"prompt": "hi"}).status_code == 500
+    assert client.get("/sim/sim_agent_002/health").status_code == 503
+    assert client.get("/sim/nope/health").status_code == 404
+
+    manifests = client.get("/sim/manifests").json()
+    assert [m["endpoint"].rsplit("/", 1)[-1] for m in manifests] == list(fleet)
+    stats = client.get("/sim/stats").json()
+    assert stats["sim_agent_001"]["errors"] == 1 and stats["sim_agent_000"]["requests"] == 1
+
+
+def test_lognormal_latency_and_slow_start():
+    agent = sim_agents.SimAgent("sim_agent_000", "x", {"median_ms": 100, "sigma": 0.5}, seed=7)
+    samples = [agent.sample_latency_s() for _ in range(2000)]
+    assert 0.09 < statistics.median(samples) < 0.11
+    cold = sim_agents.SimAgent("sim_agent_001", "x", {"median_ms": 100, "sigma": 0.0,
+                                                      "slow_start_s": 3600, "slow_start_factor": 10}, seed=7)
+    assert cold.sample_latency_s() > 0.9
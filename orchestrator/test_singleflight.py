@@ -0,0 +1,73 @@
+# orchestrator/test_singleflight.py
+import asyncio
+
+import pytest
+
+from orchestrator.singleflight import SingleFlight, request_key
+
+
+def test_request_key_normalizes_prompt():
+    assert request_key("/plan", "m", "  Hello   World ") == request_key("/plan", "m", "hello world")
+    assert request_key("/chat/plan", None, "hi", [{"role": "user", "content": "a"}]) != request_key("/chat/plan", None, "hi")
+
+
+def test_concurrent_duplicates_share_one_call():
+    sf = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"steps": [1]}
+
+    async def go():
+        return await asyncio.gather(*(sf.do("k", compute) for _ in range(5)))
+
+    results = asyncio.run(go())
+    assert len(calls) == 1
+    assert all(r == {"steps": [1]} for r in results)
+    assert results[0] is not results[1]  # each caller gets its own copy
+    st = sf.stats()
+    assert st["executed"] == 1 and st["coalesced"] == 4 and st["in_flight"] == 0
+
+
+def test_errors_propagate_to_every_waiter():
+    sf = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("llm down")
+
+    async def go():
+        return await asyncio.gather(*(sf.do("k", boom) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(go())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_computation_survives_until_last_waiter_leaves():
+    sf = SingleFlight()
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "plan"
+
+    async def go():
+        first = asyncio.ensure_future(sf.do("k", compute))
+        second = asyncio.ensure_future(sf.do("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "plan"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        lone = asyncio.ensure_future(sf.do("other", compute))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.06)
+
+    asyncio.run(go())
+    assert finished == [1]
+    assert sf.stats()["cancelled"] == 1
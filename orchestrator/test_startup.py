@@ -0,0 +1,65 @@
+# orchestrator/test_startup.py
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from orchestrator import main
+
+
+def _fresh_startup(monkeypatch):
+    monkeypatch.setattr(main, "USE_MOCK_REGISTRY", True)
+    monkeypatch.setattr(main, "HEALTH_MONITOR_ENABLED", False)
+    monkeypatch.setattr(main, "AGENT_SHORTLIST_ENABLED", False)
+    monkeypatch.setattr(main, "_registry_canister", None)
+    monkeypatch.setattr(main, "_registry_init", None)
+    monkeypatch.setattr(main, "_startup", dict(main._startup, phases={}, ready=False, error=None, attempts=0))
+
+
+def test_ready_is_separate_from_health_and_reports_phases(monkeypatch):
+    _fresh_startup(monkeypatch)
+    client = TestClient(main.app)
+    # startup has not run: alive but not ready
+    assert client.get("/health").status_code == 200
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(main.app) as started:
+        deadline = time.monotonic() + 10
+        while started.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert started.get("/ready").json() == {"status": "ready"}
+        report = started.get("/debug/startup").json()
+    assert report["ready"] and report["import_ms"] > 0
+    assert {"http_pool", "background_tasks", "prewarm"} <= set(report["phases"])
+
+
+def test_failed_registry_init_is_retried_until_it_connects(monkeypatch):
+    _fresh_startup(monkeypatch)
+    monkeypatch.setattr(main, "USE_MOCK_REGISTRY", False)
+    monkeypatch.setattr(main, "DFX_IDS_PATH", "/nonexistent/canister_ids.json")
+    monkeypatch.setattr(main, "REGISTRY_INIT_RETRY_BASE", 0.01)
+    monkeypatch.setattr(main, "REGISTRY_INIT_RETRY_MAX", 0.05)
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 10
+        while main._startup["attempts"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client.post("/plan", json={"manifest_id": "x", "prompt": "p"}).status_code == 503
+        body = client.get("/ready")
+        assert body.status_code == 503 and body.json()["status"] == "retrying"
+        assert "FileNotFoundError" in body.json()["error"]
+
+        # the registry becomes reachable: the next attempt connects and the process turns ready
+        monkeypatch.setattr(main, "USE_MOCK_REGISTRY", True)
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert client.get("/ready").json() == {"status": "ready"}
+        assert main._startup["error"] is None
+
+
+def test_import_does_not_load_ic_or_jsonschema():
+    import subprocess
+    code = ("import sys, orchestrator.main; "
+            "print(','.join(m for m in ('ic', 'jsonschema', 'nacl', 'openai') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={"USE_MOCK_REGISTRY": "true", "PATH": ""}, cwd=main.os.path.dirname(main.os.path.dirname(main.__file__)))
+    assert out.stdout.strip() == ""
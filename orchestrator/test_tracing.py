@@ -0,0 +1,68 @@
+# orchestrator/test_tracing.py
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from orchestrator import tracing
+from orchestrator.runner import execute_plan
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_parse_traceparent():
+    assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == {
+        "trace_id": TRACE_ID, "span_id": PARENT_ID, "sampled": True}
+    for bad in (None, "", "garbage", f"00-{'0' * 32}-{PARENT_ID}-01", f"00-{TRACE_ID}-{'0' * 16}-01",
+                f"ff-{TRACE_ID}-{PARENT_ID}-01", f"00-{TRACE_ID}-{PARENT_ID}-01-extra"):
+        assert tracing.parse_traceparent(bad) is None
+
+
+def test_server_span_continues_incoming_trace(monkeypatch):
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer("agent_under_test", enabled=True, export_path=""))
+    app = FastAPI()
+    tracing.install_tracing(app, "agent_under_test")
+
+    @app.post("/execute")
+    async def execute():
+        with tracing.span("work"):
+            pass
+        return {"ok": True}
+
+    client = TestClient(app)
+    resp = client.post("/execute", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert resp.headers["X-Trace-Id"] == TRACE_ID
+
+    view = client.get(f"/debug/traces/{TRACE_ID}").json()
+    server = next(s for s in view["spans"] if s["kind"] == "server")
+    work = next(s for s in view["spans"] if s["name"] == "work")
+    assert server["parent_id"] == PARENT_ID and server["service"] == "agent_under_test"
+    assert work["parent_id"] == server["span_id"]
+    assert [hop["name"] for hop in view["critical_path"]] == ["POST /execute", "work"]
+    assert client.get("/debug/traces").json()["traces"][0]["trace_id"] == TRACE_ID
+
+
+def test_runner_propagates_step_span_to_tools(monkeypatch, tmp_path):
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer("orchestrator", enabled=True, export_path=str(path)))
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(tracing.parse_traceparent(request.headers.get("traceparent")))
+        return httpx.Response(200, json={"results": []})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            with tracing.span("POST /execute", kind="server") as root:
+                await execute_plan({"steps": [{"tool": "search_docs", "args": {"query": "q"}}]},
+                                   {"id": "m"}, "p", "u", client=client, mcp_endpoint="http://mcp")
+            return root
+
+    root = asyncio.run(run())
+    assert seen[0]["trace_id"] == root.trace_id
+    spans = tracing.load_jsonl([str(path)])
+    step = next(s for s in spans if s["name"] == "step search_docs")
+    assert step["parent_id"] == root.span_id and seen[0]["span_id"] == step["span_id"]
+    assert [hop["name"] for hop in tracing.critical_path(spans)] == ["POST /execute", "step search_docs"]
@@ -0,0 +1,346 @@
+# orchestrator/tracing.py
+"""
+Minimal distributed tracing with W3C trace context (traceparent) propagation.
+
+Shared by the orchestrator, mcp-servers/mock_mcp.py and the agent apps (all run from
+the repo root, so `from orchestrator.tracing import ...` resolves). No collector and
+no OpenTelemetry dependency:
+
+  - install_tracing(app, service) adds a middleware that continues the caller's trace
+    (or starts one) with a server span per request, echoes the trace id in X-Trace-Id,
+    and mounts /debug/traces and /debug/traces/{trace_id}
+  - span(name, **attrs) records a child span of whatever span is current (contextvar)
+  - inject(headers) adds the traceparent of the current span to an outgoing request
+
+Finished spans go to an in-memory ring buffer (TRACE_BUFFER_SIZE) and, if
+TRACE_EXPORT_PATH is set, are appended to a JSONL file. Pointing every process at the
+same file (one O_APPEND write per span) gives the whole cross-process picture:
+
+    python -m orchestrator.tracing traces.jsonl [trace_id]
+"""
+
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "5000"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+TRACEPARENT = "traceparent"
+_INVALID_TRACE = "0" * 32
+_INVALID_SPAN = "0" * 16
+_HEX = frozenset("0123456789abcdef")
+# health probes, scrapes and the trace views themselves would only flood the ring buffer
+_UNTRACED_PREFIXES = ("/health", "/metrics", "/debug/")
+
+
+def _is_hex(s: str, n: int) -> bool:
+    return len(s) == n and all(c in _HEX for c in s)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """'00-<trace_id>-<parent_id>-<flags>' -> {trace_id, span_id, sampled}, or None if absent/invalid."""
+    if not value:
+        return None
+    parts = value.strip().lower().split("-")
+    if len(parts) < 4 or not _is_hex(parts[0], 2) or parts[0] == "ff":
+        return None
+    version, trace_id, span_id, flags = parts[:4]
+    if version == "00" and len(parts) != 4:
+        return None
+    if not _is_hex(trace_id, 32) or trace_id == _INVALID_TRACE:
+        return None
+    if not _is_hex(span_id, 16) or span_id == _INVALID_SPAN or not _is_hex(flags, 2):
+        return None
+    return {"trace_id": trace_id, "span_id": span_id, "sampled": bool(int(flags, 16) & 1)}
+
+
+class Span:
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start", "_t0", "duration_ms", "status", "attributes")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: Optional[str],
+                 kind: str = "internal", sampled: bool = True, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, **attrs):
+        self.attributes.update(attrs)
+
+    def error(self, message: str):
+        self.status = "error"
+        self.attributes["error"] = message
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+            if self.sampled:
+                self.tracer._record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "service": self.tracer.service, "name": self.name, "kind": self.kind,
+            "start": round(self.start, 6), "duration_ms": self.duration_ms,
+            "status": self.status, "attributes": self.attributes,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("agenthub_current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+class Tracer:
+    def __init__(self, service: str = "orchestrator", buffer_size: int = TRACE_BUFFER_SIZE,
+                 export_path: str = TRACE_EXPORT_PATH, enabled: bool = TRACING_ENABLED):
+        self.service = service
+        self.enabled = enabled
+        self.export_path = export_path
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=max(1, int(buffer_size)))
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.export_errors = 0
+
+    def _record(self, span: Span):
+        data = span.to_dict()
+        with self._lock:
+            self._spans.append(data)
+            self.recorded += 1
+        if self.export_path:
+            try:
+                line = (json.dumps(data, default=str) + "\n").encode("utf-8")
+                fd = os.open(self.export_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            except Exception:
+                self.export_errors += 1
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Dict[str, Any]] = None, kind: str = "internal", **attrs):
+        """
+        Child of the current span, or of `parent` (a parse_traceparent() result) for server
+        spans, or a new root. Yields None when tracing is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+        cur = _current.get()
+        if parent is not None:
+            sp = Span(self, name, parent["trace_id"], parent["span_id"], kind, parent["sampled"], attrs)
+        elif cur is not None:
+            sp = Span(self, name, cur.trace_id, cur.span_id, kind, cur.sampled, attrs)
+        else:
+            sp = Span(self, name, secrets.token_hex(16), None, kind, True, attrs)
+        token = _current.set(sp)
+        try:
+            yield sp
+        except BaseException as e:
+            sp.error(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            sp.end()
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._spans)
+        return [s for s in items if trace_id is None or s["trace_id"] == trace_id]
+
+    def traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent traces in the buffer, newest first, summarized."""
+        return summarize(self.spans())[:max(0, int(limit))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"service": self.service, "enabled": self.enabled, "buffered": len(self._spans),
+                "buffer_size": self._spans.maxlen, "recorded": self.recorded,
+                "export_path": self.export_path or None, "export_errors": self.export_errors}
+
+
+# ---------- trace reconstruction (works on spans from any number of processes) ----------
+def _end(s: Dict[str, Any]) -> float:
+    return s["start"] + (s.get("duration_ms") or 0.0) / 1000.0
+
+
+def summarize(spans: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    by_trace: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        by_trace.setdefault(s["trace_id"], []).append(s)
+    out = []
+    for trace_id, items in by_trace.items():
+        ids = {s["span_id"] for s in items}
+        roots = [s for s in items if s.get("parent_id") not in ids] or items
+        root = min(roots, key=lambda s: s["start"])
+        start = min(s["start"] for s in items)
+        out.append({
+            "trace_id": trace_id,
+            "root": f"{root['service']}:{root['name']}",
+            "services": sorted({s["service"] for s in items}),
+            "spans": len(items),
+            "errors": sum(1 for s in items if s.get("status") == "error"),
+            "start": start,
+            "duration_ms": round((max(_end(s) for s in items) - start) * 1000, 3),
+        })
+    out.sort(key=lambda t: t["start"], reverse=True)
+    return out
+
+
+def critical_path(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    From the earliest root, repeatedly descend into the child that finished last: the
+    chain of spans that determined the request's end-to-end latency.
+    """
+    if not spans:
+        return []
+    ids = {s["span_id"] for s in spans}
+    children: Dict[str, List[Dict[str, Any]]] = {}
+    for s in spans:
+        children.setdefault(s.get("parent_id"), []).append(s)
+    roots = [s for s in spans if s.get("parent_id") not in ids]
+    node = min(roots or spans, key=lambda s: s["start"])
+    path = []
+    while node is not None:
+        kids = children.get(node["span_id"], [])
+        child_ms = sum(k.get("duration_ms") or 0.0 for k in kids)
+        path.append({"service": node["service"], "name": node["name"], "span_id": node["span_id"],
+                     "duration_ms": node.get("duration_ms"),
+                     "self_ms": round(max(0.0, (node.get("duration_ms") or 0.0) - child_ms), 3)})
+        node = max(kids, key=_end) if kids else None
+    return path
+
+
+def trace_view(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    spans = sorted(spans, key=lambda s: s["start"])
+    return {"spans": spans, "critical_path": critical_path(spans)}
+
+
+def load_jsonl(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    spans = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        continue
+    return spans
+
+
+# ---------- process-wide tracer + helpers ----------
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    """Swap the process-wide tracer (tests)."""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attrs):
+    return _tracer.span(name, **attrs)
+
+
+def inject(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Return `headers` (or a new dict) with the current span's traceparent added."""
+    headers = dict(headers or {})
+    cur = _current.get()
+    if cur is not None:
+        headers[TRACEPARENT] = cur.traceparent
+    return headers
+
+
+def install_tracing(app: Any, service: str):
+    """Server span per request (continuing an incoming traceparent) plus the /debug/traces views."""
+    _tracer.service = service
+    if not _tracer.enabled:
+        return
+    from fastapi import HTTPException
+
+    @app.middleware("http")
+    async def trace_requests(request, call_next):
+        # streaming responses are measured until their headers are sent
+        if request.url.path.startswith(_UNTRACED_PREFIXES):
+            return await call_next(request)
+        parent = parse_traceparent(request.headers.get(TRACEPARENT))
+        with _tracer.span(f"{request.method} {request.url.path}", parent=parent, kind="server",
+                          method=request.method, path=request.url.path) as sp:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if route is not None:
+                sp.name = f"{request.method} {route.path}"
+            sp.set(status_code=response.status_code)
+            if response.status_code >= 500:
+                sp.status = "error"
+            response.headers["X-Trace-Id"] = sp.trace_id
+            return response
+
+    @app.get("/debug/traces")
+    async def debug_traces(limit: int = 20):
+        """Recent traces recorded by this process (newest first)."""
+        return {"stats": _tracer.stats(), "traces": _tracer.traces(limit)}
+
+    @app.get("/debug/traces/{trace_id}")
+    async def debug_trace(trace_id: str):
+        """This process's spans for one trace, plus the critical path through them."""
+        spans = _tracer.spans(trace_id.lower())
+        if not spans:
+            raise HTTPException(status_code=404, detail="trace not found in buffer")
+        return trace_view(spans)
+
+
+def _main(argv: List[str]) -> int:
+    if not argv:
+        print("usage: python -m orchestrator.tracing <spans.jsonl> [more.jsonl ...] [trace_id]")
+        return 2
+    trace_id = argv[-1] if _is_hex(argv[-1].lower(), 32) else None
+    paths = argv[:-1] if trace_id else argv
+    spans = load_jsonl(paths)
+    if trace_id is None:
+        for t in summarize(spans)[:20]:
+            print(f"{t['trace_id']}  {t['duration_ms']:>10.1f} ms  {t['spans']:>3} spans  "
+                  f"{','.join(t['services'])}  {t['root']}")
+        return 0
+    view = trace_view([s for s in spans if s["trace_id"] == trace_id.lower()])
+    if not view["spans"]:
+        print(f"trace {trace_id} not found")
+        return 1
+    print("critical path:")
+    for depth, hop in enumerate(view["critical_path"]):
+        print(f"{'  ' * depth}{hop['service']}:{hop['name']}  {hop['duration_ms']} ms (self {hop['self_ms']} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
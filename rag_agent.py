@@ -1,10 +1,13 @@
 import uvicorn
 import os
 import logging
+import threading
 import chromadb
 from chromadb.utils import embedding_functions
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
+from orchestrator.tracing import install_tracing
+from mcp_common.bm25 import BM25Index, is_keyword_query, rrf
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 
@@ -13,10 +16,33 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("rag_agent")
 
 app = FastAPI(title="RAG Agent (MCP Standard)")
+install_tracing(app, "rag_agent")
 
 # --- RAG Setup ---
 CHROMA_PATH = os.getenv("CHROMA_PATH", "./chroma_db")
 COLLECTION_NAME = "knowledge_base"
+# hybrid: BM25 + vector fused with RRF, keyword queries ("401", "TICKET-4821") BM25-only | vector | lexical
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid").lower()
+
+# Lexical (BM25) index over the collection: built from the stored documents at startup,
+# extended incrementally by add_document. Row i <-> _lexical_ids[i] / _lexical_docs[i];
+# _lexical_lock keeps the three in step for concurrent add_document / query_knowledge calls.
+_lexical = BM25Index()
+_lexical_ids: List[str] = []
+_lexical_docs: List[Any] = []
+_lexical_lock = threading.Lock()
+
+def _index_lexical(ids, documents, metadatas):
+    documents = [d or "" for d in documents]
+    with _lexical_lock:
+        _lexical_ids.extend(ids)
+        _lexical_docs.extend(zip(documents, [m or {} for m in metadatas]))
+        _lexical.add(documents)
+
+def _lexical_search(query: str, k: int):
+    """BM25 top-k as (doc_id, (document, metadata)) pairs."""
+    with _lexical_lock:
+        return [(_lexical_ids[row], _lexical_docs[row]) for _, row in _lexical.search(query, k)]
 
 # Initialize ChromaDB
 try:
@@ -30,6 +56,15 @@ except Exception as e:
     logger.error(f"Failed to initialize ChromaDB: {e}")
     collection = None
 
+if collection is not None:
+    try:
+        existing = collection.get(include=["documents", "metadatas"])
+        _index_lexical(existing["ids"], existing["documents"] or [],
+                       existing["metadatas"] or [None] * len(existing["ids"]))
+        logger.info(f"Lexical index built: {_lexical.stats()}")
+    except Exception as e:
+        logger.warning(f"Lexical index build failed, keyword matching limited to new documents: {e}")
+
 # --- MCP JSON-RPC Models ---
 class JsonRpcRequest(BaseModel):
     jsonrpc: str
@@ -59,6 +94,7 @@ def add_document(text: str, metadata: Dict[str, Any] = None) -> str:
             metadatas=[meta],
             ids=[doc_id]
         )
+        _index_lexical([doc_id], [text], [meta])
         return f"Document added successfully with ID: {doc_id}"
     except Exception as e:
         return f"Error adding document: {str(e)}"
@@ -68,22 +104,43 @@ def query_knowledge(query: str, n_results: int = 3) -> str:
         return "Error: Database not initialized."
     
     try:
+        # keyword-looking queries are answered from the BM25 index alone (no embedding)
+        if SEARCH_MODE == "lexical" or (SEARCH_MODE == "hybrid" and is_keyword_query(query)):
+            hits = [doc for _, doc in _lexical_search(query, n_results)]
+            if hits or SEARCH_MODE == "lexical":
+                return _format_results(hits)
+
+        total = collection.count()
+        if not total:
+            return "No relevant documents found."
+        n_vector = n_results if SEARCH_MODE == "vector" else max(4 * n_results, 20)
         results = collection.query(
             query_texts=[query],
-            n_results=n_results
+            n_results=min(n_vector, total)
         )
-        
-        # Format results
-        output = []
-        if results['documents']:
-            for i, doc in enumerate(results['documents'][0]):
-                meta = results['metadatas'][0][i] if results['metadatas'] else {}
-                output.append(f"Result {i+1}: {doc} (Metadata: {meta})")
-        
-        return "\n\n".join(output) if output else "No relevant documents found."
+        ids = results['ids'][0] if results['ids'] else []
+        docs = results['documents'][0] if results['documents'] else []
+        metas = results['metadatas'][0] if results['metadatas'] else [{}] * len(docs)
+        by_id = dict(zip(ids, zip(docs, metas)))
+        if SEARCH_MODE == "vector":
+            return _format_results([by_id[i] for i in ids[:n_results]])
+
+        # hybrid: reciprocal rank fusion of the vector and BM25 rankings
+        lexical_ids = []
+        for doc_id, doc in _lexical_search(query, n_vector):
+            lexical_ids.append(doc_id)
+            by_id.setdefault(doc_id, doc)
+        fused = rrf([ids, lexical_ids])[:n_results]
+        return _format_results([by_id[doc_id] for _, doc_id in fused])
     except Exception as e:
         return f"Error querying database: {str(e)}"
 
+def _format_results(hits) -> str:
+    output = []
+    for i, (doc, meta) in enumerate(hits):
+        output.append(f"Result {i+1}: {doc} (Metadata: {meta})")
+    return "\n\n".join(output) if output else "No relevant documents found."
+
 # --- MCP Protocol Handlers ---
 
 TOOLS = [
@@ -0,0 +1,238 @@
+# sim_agents.py -- a fleet of simulated agents with realistic latency / failure behaviour
+"""
+One process serving N virtual agents, each at its own endpoint:
+
+    http://<host>:<port>/sim/<agent_id>/execute    (what call_agent hits)
+    http://<host>:<port>/sim/<agent_id>/health
+
+Unlike the demo agents (which answer instantly) every virtual agent follows a profile:
+
+    median_ms / sigma   lognormal latency (median, log-space std dev)
+    error_rate          fraction of requests answered with HTTP 500
+    hang_rate           fraction of requests that sleep hang_s (exercises timeouts)
+    slow_start_s        after start, latency is multiplied by slow_start_factor,
+                        decaying linearly to 1x over slow_start_s seconds
+    startup_delay_s     /health returns 503 until this long after start
+    response_bytes      size of the result text
+
+Built-in profiles (fast, normal, slow, flaky, cold) are assigned round-robin; pass
+--profiles file.json ({"name": {...fields...}, ...}) to override or add profiles and
+--mix name,name,... to choose the rotation.
+
+Drop-in for start_all.sh (SIM_AGENTS=N ./start_all.sh) and register_demo_agents.py:
+
+    python sim_agents.py --agents 20 --port 7100 --register http://localhost:8000
+    curl localhost:7100/sim/stats
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from orchestrator.tracing import install_tracing
+
+SIM_AGENTS = int(os.getenv("SIM_AGENTS", "10"))
+SIM_PORT = int(os.getenv("SIM_PORT", "7100"))
+SIM_HOST = os.getenv("SIM_HOST", "127.0.0.1")
+SIM_SEED = int(os.getenv("SIM_SEED", "42"))
+SIM_MIX = os.getenv("SIM_MIX", "fast,normal,normal,slow,flaky")
+
+DEFAULT_PROFILE = {
+    "median_ms": 100.0, "sigma": 0.5, "error_rate": 0.0, "hang_rate": 0.0, "hang_s": 60.0,
+    "slow_start_s": 0.0, "slow_start_factor": 1.0, "startup_delay_s": 0.0, "response_bytes": 256,
+}
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {"median_ms": 20, "sigma": 0.3},
+    "normal": {"median_ms": 150, "sigma": 0.6, "error_rate": 0.01},
+    "slow": {"median_ms": 1500, "sigma": 0.8, "error_rate": 0.02, "response_bytes": 4096},
+    "flaky": {"median_ms": 200, "sigma": 1.0, "error_rate": 0.2, "hang_rate": 0.05},
+    "cold": {"median_ms": 100, "sigma": 0.5, "slow_start_s": 60, "slow_start_factor": 10, "startup_delay_s": 5},
+}
+
+TOPICS = ["search", "summaries", "email", "tickets", "calendar", "billing", "documentation", "translation"]
+
+
+class SimAgent:
+    def __init__(self, agent_id: str, profile_name: str, profile: Dict[str, Any], seed: int):
+        self.id = agent_id
+        self.profile_name = profile_name
+        self.profile = dict(DEFAULT_PROFILE, **profile)
+        self.rng = random.Random(seed)
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.hangs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_ms = 0.0
+
+    def ready(self) -> bool:
+        return time.monotonic() - self.started_at >= self.profile["startup_delay_s"]
+
+    def sample_latency_s(self) -> float:
+        p = self.profile
+        latency = p["median_ms"] * math.exp(p["sigma"] * self.rng.gauss(0.0, 1.0)) / 1000.0
+        warm = p["slow_start_s"]
+        age = time.monotonic() - self.started_at
+        if warm > 0 and age < warm:
+            latency *= 1.0 + (p["slow_start_factor"] - 1.0) * (1.0 - age / warm)
+        return latency
+
+    def manifest(self, base_url: str) -> Dict[str, Any]:
+        topic = TOPICS[int(self.id.rsplit("_", 1)[-1]) % len(TOPICS)]
+        return {
+            "id": self.id,
+            "name": f"Sim {topic.title()} Agent {self.id.rsplit('_', 1)[-1]}",
+            "description": f"Simulated {topic} agent ({self.profile_name} profile: median {self.profile['median_ms']} ms, "
+                           f"{self.profile['error_rate']:.0%} errors).",
+            "developer": "2vxsx-fae",
+            "endpoint": f"{base_url}/sim/{self.id}",
+            # the stub planner emits search_docs + create_ticket before the agent call
+            "allowed_tools": ["search_docs", "create_ticket", "call_agent"],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profile": self.profile_name, "ready": self.ready(), "requests": self.requests, "errors": self.errors,
+            "hangs": self.hangs, "in_flight": self.in_flight, "max_in_flight": self.max_in_flight,
+            "mean_ms": round(self.total_ms / self.requests, 2) if self.requests else None,
+        }
+
+
+def build_fleet(n: int, mix: List[str], profiles: Dict[str, Dict[str, Any]], seed: int = SIM_SEED) -> Dict[str, SimAgent]:
+    unknown = [m for m in mix if m not in profiles]
+    if unknown:
+        raise ValueError(f"unknown profiles in mix: {unknown} (known: {sorted(profiles)})")
+    fleet = {}
+    for i in range(n):
+        name = mix[i % len(mix)]
+        agent_id = f"sim_agent_{i:03d}"
+        fleet[agent_id] = SimAgent(agent_id, name, profiles[name], seed + i)
+    return fleet
+
+
+def create_app(fleet: Dict[str, SimAgent]) -> FastAPI:
+    app = FastAPI(title="Simulated Agent Fleet")
+    install_tracing(app, "sim_agents")
+
+    def lookup(agent_id: str) -> SimAgent:
+        agent = fleet.get(agent_id)
+        if agent is None:
+            raise HTTPException(status_code=404, detail="unknown simulated agent")
+        return agent
+
+    @app.get("/sim/stats")
+    async def stats():
+        return {aid: agent.stats() for aid, agent in fleet.items()}
+
+    @app.get("/sim/manifests")
+    async def manifests(request: Request):
+        """Registration manifests for the whole fleet, with endpoints on this server."""
+        base_url = str(request.base_url).rstrip("/")
+        return [agent.manifest(base_url) for agent in fleet.values()]
+
+    @app.get("/sim/{agent_id}/health")
+    async def agent_health(agent_id: str):
+        agent = lookup(agent_id)
+        if not agent.ready():
+            return JSONResponse({"status": "starting"}, status_code=503)
+        return {"status": "ok", "profile": agent.profile_name}
+
+    @app.post("/sim/{agent_id}/execute")
+    async def agent_execute(agent_id: str, request: Request):
+        agent = lookup(agent_id)
+        data = await request.json()
+        prompt = str(data.get("prompt", ""))
+        p = agent.profile
+        agent.requests += 1
+        agent.in_flight += 1
+        agent.max_in_flight = max(agent.max_in_flight, agent.in_flight)
+        started = time.perf_counter()
+        try:
+            roll = agent.rng.random()
+            if roll < p["hang_rate"]:
+                agent.hangs += 1
+                await asyncio.sleep(p["hang_s"])
+            else:
+                await asyncio.sleep(agent.sample_latency_s())
+            if not agent.ready() or agent.rng.random() < p["error_rate"]:
+                agent.errors += 1
+                return JSONResponse({"status": "error", "error": f"simulated failure in {agent_id}"}, status_code=500)
+            filler = ("lorem ipsum " * (p["response_bytes"] // 12 + 1))[:max(0, p["response_bytes"])]
+            return JSONResponse({"result": filler, "status": "success", "agent": agent_id, "prompt": prompt[:80]})
+        finally:
+            agent.in_flight -= 1
+            agent.total_ms += (time.perf_counter() - started) * 1000.0
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "agents": len(fleet)}
+
+    return app
+
+
+def register_fleet(orchestrator_url: str, fleet: Dict[str, SimAgent], base_url: str, timeout: float = 120.0):
+    """Register every virtual agent once it reports healthy (what register_demo_agents.py does for the demo agents)."""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    pending = list(fleet.values())
+    while pending and time.monotonic() < deadline:
+        still = []
+        for agent in pending:
+            if not agent.ready():
+                still.append(agent)
+                continue
+            try:
+                resp = httpx.post(orchestrator_url.rstrip("/") + "/register", json=agent.manifest(base_url), timeout=30.0)
+                if resp.status_code == 200:
+                    print(f"[sim] registered {agent.id} ({agent.profile_name})")
+                    continue
+                print(f"[sim] register {agent.id} failed: HTTP {resp.status_code} {resp.text[:200]}")
+            except httpx.HTTPError as e:
+                print(f"[sim] register {agent.id} failed: {e}")
+            still.append(agent)
+        pending = still
+        if pending:
+            time.sleep(1.0)
+    if pending:
+        print(f"[sim] gave up registering {[a.id for a in pending]}")
+
+
+def load_profiles(path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    profiles = {name: dict(p) for name, p in PROFILES.items()}
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for name, p in json.load(f).items():
+                profiles[name] = dict(profiles.get(name, {}), **p)
+    return profiles
+
+
+# module-level app so `uvicorn sim_agents:app` works with the SIM_* env settings
+app = create_app(build_fleet(SIM_AGENTS, SIM_MIX.split(","), PROFILES))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Simulated agent fleet")
+    ap.add_argument("--agents", type=int, default=SIM_AGENTS)
+    ap.add_argument("--host", default=SIM_HOST)
+    ap.add_argument("--port", type=int, default=SIM_PORT)
+    ap.add_argument("--mix", default=SIM_MIX, help="comma list of profile names, assigned round-robin")
+    ap.add_argument("--profiles", help="JSON file of profile overrides / additions")
+    ap.add_argument("--seed", type=int, default=SIM_SEED)
+    ap.add_argument("--register", metavar="ORCHESTRATOR_URL", help="register the fleet with this orchestrator")
+    args = ap.parse_args()
+
+    fleet = build_fleet(args.agents, [m.strip() for m in args.mix.split(",") if m.strip()], load_profiles(args.profiles), args.seed)
+    base_url = f"http://{'127.0.0.1' if args.host in ('0.0.0.0', '') else args.host}:{args.port}"
+    if args.register:
+        threading.Thread(target=register_fleet, args=(args.register, fleet, base_url), daemon=True).start()
+    uvicorn.run(create_app(fleet), host=args.host, port=args.port)
@@ -26,6 +26,16 @@ echo "Starting Mock MCP on port 9000..."
 
 # Start Agents (assuming they use the root or orchestrator venv)
 # You might need to adjust venv activation for each if they are different
+# SIM_AGENTS=N starts N simulated agents (sim_agents.py, port 7100) instead of the demo agents
+# and registers them with the orchestrator; SIM_MIX / SIM_PROFILES pick latency/failure profiles.
+if [ -n "$SIM_AGENTS" ]; then
+    echo "Starting $SIM_AGENTS simulated agents on port 7100..."
+    (
+        if [ -d "orchestrator/venv" ]; then source orchestrator/venv/bin/activate; fi
+        python sim_agents.py --agents "$SIM_AGENTS" --port 7100 --register http://localhost:8000 \
+            ${SIM_MIX:+--mix "$SIM_MIX"} ${SIM_PROFILES:+--profiles "$SIM_PROFILES"}
+    ) &
+else
 echo "Starting Agents..."
 (
     if [ -d "orchestrator/venv" ]; then source orchestrator/venv/bin/activate; fi
@@ -36,6 +46,7 @@ echo "Starting Agents..."
     uvicorn rag_agent:app --host 0.0.0.0 --port 7005 &
     wait
 ) &
+fi
 
 echo "All services started. Press Ctrl+C to stop."
 wait
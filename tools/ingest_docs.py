@@ -3,18 +3,29 @@
 Ingest plain text documents into Weaviate with embeddings computed locally.
 Usage:
   python tools/ingest_docs.py --source docs/ --class-name Document
+  python tools/ingest_docs.py --source docs/ --backend local --index-path vector_index
+    (embedded memmap index read by mock_mcp / bin/search_docs with VECTOR_BACKEND=local;
+     ids already in the index are skipped, --rebuild re-ingests everything into a fresh index)
   or provide a single JSON file with a list of {"id","text","title"} objects
+  --notify http://localhost:9000 tells the MCP server to drop cached search results
 """
 
 import os
+import sys
 import argparse
 import json
+import shutil
 from sentence_transformers import SentenceTransformer
-import weaviate
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from mcp_common.vector_index import LocalVectorIndex  # noqa: E402
+
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://localhost:8080")
 EMBED_MODEL = os.getenv("EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")  # lightweight & fast
+MCP_ENDPOINT = os.getenv("MCP_ENDPOINT", "")
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate").lower()
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
 
 def ensure_schema(client, class_name="Document"):
     """
@@ -64,6 +75,7 @@ def load_docs_from_folder(folder):
     return docs
 
 def ingest(docs, class_name="Document", batch_size=32):
+    import weaviate
     client = weaviate.Client(url=WEAVIATE_URL)
     model = SentenceTransformer(EMBED_MODEL)
     ensure_schema(client, class_name)
@@ -79,10 +91,56 @@ def ingest(docs, class_name="Document", batch_size=32):
             batch.add_data_object(properties, class_name, vector=embedding)
     print("Ingestion complete.")
 
+def ingest_local(docs, index_path=VECTOR_INDEX_PATH, batch_size=256, rebuild=False):
+    """
+    Append docs to the embedded vector index (mcp_common/vector_index.py), in batches.
+    The index is append-only, so docs whose id is already indexed are skipped; use
+    rebuild=True to start from an empty index (e.g. after editing documents).
+    """
+    if rebuild and os.path.isdir(index_path):
+        shutil.rmtree(index_path)  # readers keep their mapped copy until the new index.json appears
+    index = LocalVectorIndex(index_path)
+    seen = {rec.get("id") for rec in index.meta}
+    model = SentenceTransformer(EMBED_MODEL)
+    records = []
+    skipped = 0
+    for doc in docs:
+        text = doc.get("text") or doc.get("body") or doc.get("content") or ""
+        if not text:
+            continue
+        doc_id = str(doc.get("id") or doc.get("title") or len(index) + len(records))
+        if doc_id in seen:
+            skipped += 1
+            continue
+        seen.add(doc_id)
+        records.append({"id": doc_id, "title": doc.get("title") or doc.get("id") or "", "text": text,
+                        "source": doc.get("source", "")})
+    if skipped:
+        print(f"Skipping {skipped} docs already in {index_path} (use --rebuild to re-ingest them)")
+    for start in tqdm(range(0, len(records), batch_size), desc="Embedding & indexing"):
+        chunk = records[start:start + batch_size]
+        vectors = model.encode([r["text"] for r in chunk], batch_size=batch_size)
+        index.add(chunk, vectors, model=EMBED_MODEL)
+    print(f"Ingestion complete: {len(index)} rows in {index_path} ({index.stats()['mode']} search).")
+
+def notify_index_changed(mcp_endpoint):
+    """Best effort: the MCP server caches search results per index version."""
+    import httpx
+    try:
+        resp = httpx.post(mcp_endpoint.rstrip("/") + "/index/changed", timeout=5.0)
+        resp.raise_for_status()
+        print(f"Notified {mcp_endpoint}: index version {resp.json().get('index_version')}")
+    except httpx.HTTPError as e:
+        print(f"Could not notify {mcp_endpoint} of the index change: {e}")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--source", required=True, help="Folder or JSON file with docs")
     parser.add_argument("--class-name", default="Document")
+    parser.add_argument("--backend", choices=["weaviate", "local"], default=VECTOR_BACKEND)
+    parser.add_argument("--index-path", default=VECTOR_INDEX_PATH, help="embedded index directory (--backend local)")
+    parser.add_argument("--rebuild", action="store_true", help="discard the embedded index and re-ingest (--backend local)")
+    parser.add_argument("--notify", default=MCP_ENDPOINT, help="MCP server URL to invalidate its search cache")
     args = parser.parse_args()
     src = args.source
     if os.path.isdir(src):
@@ -90,4 +148,9 @@ if __name__ == "__main__":
     else:
         docs = json.load(open(src, "r", encoding="utf-8"))
     print(f"Loaded {len(docs)} docs")
-    ingest(docs, class_name=args.class_name)
+    if args.backend == "local":
+        ingest_local(docs, index_path=args.index_path, rebuild=args.rebuild)
+    else:
+        ingest(docs, class_name=args.class_name)
+    if args.notify:
+        notify_index_changed(args.notify)
@@ -1,5 +1,5 @@
 # tools/manifest_signer.py
-import json, argparse
+import json, argparse, os, sys
 from nacl.signing import SigningKey, VerifyKey
 from nacl.encoding import HexEncoder
 
@@ -31,14 +31,49 @@ def verify(manifest_path):
     vk.verify(canonical_json(m).encode(), bytes.fromhex(sig_hex))
     print("✅ Signature valid")
 
+def _collect_manifests(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(os.path.join(p, f) for f in sorted(os.listdir(p)) if f.endswith(".json"))
+        else:
+            files.append(p)
+    return files
+
+def verify_all(paths, workers=None):
+    # reuse the orchestrator's bulk verifier (process pool) when run from the repo
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from orchestrator.manifest_verify import MODE_UNVERIFIED, verify_manifests_bulk
+    files = _collect_manifests(paths)
+    # verify each manifest exactly as loaded; report by file path (ids may be missing or repeated)
+    manifests = []
+    for f in files:
+        with open(f) as fh:
+            manifests.append(json.load(fh))
+    report = verify_manifests_bulk(manifests, max_workers=workers, keys=files)
+    bad = unsigned = 0
+    for path, r in report.items():
+        if not r["ok"]:
+            bad += 1
+            print(f"❌ {path}: {r['error']}")
+        elif r["mode"] == MODE_UNVERIFIED:
+            unsigned += 1
+            print(f"⚠️  {path}: unsigned (no signature or hash)")
+        else:
+            print(f"✅ {path} ({r['mode']})")
+    print(f"{len(report) - bad - unsigned}/{len(report)} manifests valid, {unsigned} unsigned, {bad} failed")
+    return bad == 0 and unsigned == 0
+
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
     sub = p.add_subparsers(dest="cmd")
     sub.add_parser("gen-keys")
     s = sub.add_parser("sign"); s.add_argument("manifest"); s.add_argument("privkey")
     v = sub.add_parser("verify"); v.add_argument("manifest")
+    va = sub.add_parser("verify-all"); va.add_argument("paths", nargs="+", help="manifest files or directories"); va.add_argument("--workers", type=int, default=None)
     a = p.parse_args()
     if a.cmd=="gen-keys": gen_keys()
     elif a.cmd=="sign": sign(a.manifest,a.privkey)
     elif a.cmd=="verify": verify(a.manifest)
+    elif a.cmd=="verify-all": sys.exit(0 if verify_all(a.paths, a.workers) else 1)
     else: p.print_help()